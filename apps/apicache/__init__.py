@@ -0,0 +1,84 @@
+"""
+Response cache for the public read APIs.
+
+Views that mix in ResponseCacheMixin cache the serialized data of their GET responses for anonymous users. The cache
+key is made of the host, path, query parameters, active language and generation counters of the models the view
+depends on (cache_models). Saving or deleting one of these models bumps its generation (see apps.apicache.models), so
+all cached responses that depend on it are missed from then on and simply expire.
+
+Code that changes these models with queryset updates, which don't send signals, has to call bump_generation() itself.
+"""
+import hashlib
+import time
+import urllib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
+from rest_framework import status
+from rest_framework.response import Response
+
+
+# Cached responses also expire after this many seconds, for content that is published or unpublished by date.
+API_CACHE_TIMEOUT = getattr(settings, 'API_CACHE_TIMEOUT', 5 * 60)
+
+GENERATION_TIMEOUT = 30 * 24 * 60 * 60
+
+GENERATION_KEY = 'apicache:generation:{0}'
+RESPONSE_KEY = 'apicache:response:{0}'
+
+
+def model_label(model):
+    """ The 'app_label.modelname' label of a model. Proxy models share the label of their concrete model. """
+    opts = model._meta.concrete_model._meta
+    return '{0}.{1}'.format(opts.app_label, opts.object_name.lower())
+
+
+def bump_generation(model):
+    """ Invalidate all cached responses that depend on the model. """
+    key = GENERATION_KEY.format(model_label(model))
+    # New counters start at the current time so a counter that was evicted can't go back to a value that's still
+    # used in the key of a cached response.
+    if not cache.add(key, int(time.time() * 1000), GENERATION_TIMEOUT):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # The counter was evicted in the meantime.
+            cache.set(key, int(time.time() * 1000), GENERATION_TIMEOUT)
+
+
+def get_generations(labels):
+    keys = [GENERATION_KEY.format(label) for label in labels]
+    generations = cache.get_many(keys)
+    return [generations.get(key, 0) for key in keys]
+
+
+class ResponseCacheMixin(object):
+    """
+    Caches the GET responses of a DRF view for anonymous users. The view lists the models its responses depend on in
+    cache_models, as 'app_label.modelname' labels.
+    """
+    cache_models = ()
+    cache_timeout = API_CACHE_TIMEOUT
+
+    def get_response_cache_key(self, request):
+        query = sorted(request.QUERY_PARAMS.lists())
+        # The host is part of the key because the pagination links in the responses are absolute urls.
+        parts = [request.get_host(), request.path, urllib.urlencode(query, doseq=True),
+                 translation.get_language() or '']
+        parts.extend(str(generation) for generation in get_generations(self.cache_models))
+        return RESPONSE_KEY.format(hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest())
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated():
+            return super(ResponseCacheMixin, self).get(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super(ResponseCacheMixin, self).get(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, self.cache_timeout)
+        return response
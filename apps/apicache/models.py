@@ -0,0 +1,28 @@
+from django.db.models.signals import post_save, post_delete
+
+from apps.banners.models import Slide
+from apps.blogs.models import BlogPost, BlogPostProxy, NewsPostProxy
+from apps.campaigns.models import Campaign
+from apps.fundraisers.models import FundRaiser
+from apps.pages.models import Page
+from apps.projects.models import Project, ProjectPlan, ProjectCampaign, ProjectTheme
+from apps.quotes.models import Quote
+from apps.statistics.models import Statistic
+from apps.tasks.models import Task
+
+from . import bump_generation
+
+
+# The models used by the cached API responses and the homepage snapshot. Signals are sent with the class of the saved
+# instance as the sender, so the proxy models are listed as well.
+CACHED_MODELS = (Project, ProjectPlan, ProjectCampaign, ProjectTheme, Task, Page, Slide, Quote, BlogPost,
+                 BlogPostProxy, NewsPostProxy, Statistic, Campaign, FundRaiser)
+
+
+def invalidate_api_cache(sender, instance, **kwargs):
+    bump_generation(sender)
+
+
+for model in CACHED_MODELS:
+    post_save.connect(invalidate_api_cache, sender=model, weak=False)
+    post_delete.connect(invalidate_api_cache, sender=model, weak=False)
@@ -1,5 +1,6 @@
 from rest_framework import generics
 from rest_framework import permissions
+from apps.apicache import ResponseCacheMixin
 from .models import Slide
 from .serializers import SlideSerializer
 from django.utils.timezone import now
@@ -7,12 +8,13 @@ from django.db.models import Q
 
 # API views
 
-class SlideList(generics.ListAPIView):
+class SlideList(ResponseCacheMixin, generics.ListAPIView):
     model = Slide
     serializer_class = SlideSerializer
     permissions_classes = (permissions.SAFE_METHODS,)
     paginate_by = 10
     filter_fields = ('language', )
+    cache_models = ('banners.slide',)
 
     def get_queryset(self):
         qs = super(SlideList, self).get_queryset()
@@ -2,15 +2,17 @@ from apps.blogs.models import NewsPostProxy, BlogPostProxy
 from apps.blogs.serializers import BlogPostPreviewSerializer
 from rest_framework import generics
 from rest_framework import permissions
+from apps.apicache import ResponseCacheMixin
 from .models import BlogPost
 from .serializers import BlogPostSerializer
 
 
-class NewsPostPreviewList(generics.ListAPIView):
+class NewsPostPreviewList(ResponseCacheMixin, generics.ListAPIView):
     model = NewsPostProxy
     serializer_class = BlogPostPreviewSerializer
     paginate_by = 5
     filter_fields = ('language', )
+    cache_models = ('blogs.blogpost',)
 
     def get_queryset(self, *args, **kwargs):
         qs = super(NewsPostPreviewList, self).get_queryset()
@@ -18,11 +20,12 @@ class NewsPostPreviewList(generics.ListAPIView):
         return qs
 
 
-class NewsPostList(generics.ListAPIView):
+class NewsPostList(ResponseCacheMixin, generics.ListAPIView):
     model = NewsPostProxy
     serializer_class = BlogPostSerializer
     paginate_by = 5
     filter_fields = ('language', )
+    cache_models = ('blogs.blogpost',)
 
     def get_queryset(self, *args, **kwargs):
         qs = super(NewsPostList, self).get_queryset()
@@ -30,9 +33,10 @@ class NewsPostList(generics.ListAPIView):
         return qs
 
 
-class NewsPostDetail(generics.RetrieveAPIView):
+class NewsPostDetail(ResponseCacheMixin, generics.RetrieveAPIView):
     model = NewsPostProxy
     serializer_class = BlogPostSerializer
+    cache_models = ('blogs.blogpost',)
 
     def get_queryset(self, *args, **kwargs):
         qs = super(NewsPostDetail, self).get_queryset()
@@ -40,11 +44,12 @@ class NewsPostDetail(generics.RetrieveAPIView):
         return qs
 
 
-class BlogPostList(generics.ListAPIView):
+class BlogPostList(ResponseCacheMixin, generics.ListAPIView):
     model = BlogPostProxy
     serializer_class = BlogPostSerializer
     paginate_by = 5
     filter_fields = ('language', )
+    cache_models = ('blogs.blogpost',)
 
     def get_queryset(self, *args, **kwargs):
         qs = super(BlogPostList, self).get_queryset()
@@ -52,9 +57,10 @@ class BlogPostList(generics.ListAPIView):
         return qs
 
 
-class BlogPostDetail(generics.RetrieveAPIView):
+class BlogPostDetail(ResponseCacheMixin, generics.RetrieveAPIView):
     model = BlogPostProxy
     serializer_class = BlogPostSerializer
+    cache_models = ('blogs.blogpost',)
 
     def get_queryset(self, *args, **kwargs):
         qs = super(BlogPostDetail, self).get_queryset()
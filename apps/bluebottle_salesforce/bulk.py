@@ -0,0 +1,276 @@
+"""
+Batched upserts to Salesforce.
+
+Instead of fetching and saving every Salesforce object on its own, the sync functions iterate over the local records
+with a BulkUpserter. For each batch of records the existing Salesforce objects are fetched with one query, and after
+the fields have been set the changed fields are upserted by external id with the composite batch resource of the REST
+API. The incremental sync moves the SyncWatermark of the model after every batch.
+
+A hash of the fields of every synced record is kept in SyncHash, so records that haven't changed are skipped without
+any requests to Salesforce. Delete the hashes to sync all records again.
+"""
+import datetime
+import decimal
+import hashlib
+import itertools
+import json
+import logging
+import urllib
+
+import requests
+from django.conf import settings
+
+from .models import SyncHash, SyncWatermark
+
+
+logger = logging.getLogger('bluebottle.salesforce')
+
+
+def chunks(iterable, size):
+    """ Yields lists of at most size items. """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def serialize_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    return value
+
+
+class SalesforceRestClient(object):
+    """
+    Client for the Salesforce REST API that's configured in the DATABASES setting. The upserts are sent with the
+    composite batch resource, which takes at most 25 requests at a time.
+    """
+    max_batch_requests = 25
+
+    def __init__(self, database=None):
+        self.database = database or settings.SALESFORCE_DB_ALIAS
+        self.api_version = getattr(settings, 'SALESFORCE_API_VERSION', '34.0')
+        self.oauth_data = None
+
+    def authenticate(self, renew=False):
+        from salesforce import auth
+
+        if renew:
+            auth.expire_token()
+        auth.authenticate(settings.DATABASES[self.database])
+        self.oauth_data = auth.oauth_data
+
+    def fetch(self, model, field_name, values):
+        """ Returns the Salesforce objects of which the field has one of the values. """
+        return model.objects.filter(**{field_name + '__in': values})
+
+    def fetch_ids(self, model, field_name):
+        """ Returns a dictionary with the Salesforce id of every external id. """
+        return dict((unicode(external_id), salesforce_id) for external_id, salesforce_id in
+                    model.objects.values_list(field_name, 'pk') if external_id)
+
+    def upsert(self, model, external_id_column, payloads):
+        """
+        Upserts the list of (external id, fields) payloads and returns a list with None for every payload that has
+        been saved and the error message for every payload that failed.
+        """
+        errors = []
+        for batch in chunks(payloads, self.max_batch_requests):
+            try:
+                errors.extend(self._upsert_batch(model, external_id_column, batch))
+            except (requests.RequestException, ValueError) as e:
+                errors.extend([str(e)] * len(batch))
+        return errors
+
+    def _upsert_batch(self, model, external_id_column, payloads):
+        batch_requests = []
+        for external_id, fields in payloads:
+            batch_requests.append({
+                'method': 'PATCH',
+                'url': 'v{0}/sobjects/{1}/{2}/{3}'.format(self.api_version, model._meta.db_table, external_id_column,
+                                                           urllib.quote(unicode(external_id).encode('utf-8'), '')),
+                'richInput': fields
+            })
+
+        response = self._post('composite/batch', {'batchRequests': batch_requests})
+        if response.status_code == 401:
+            # The access token has expired.
+            self.authenticate(renew=True)
+            response = self._post('composite/batch', {'batchRequests': batch_requests})
+        response.raise_for_status()
+
+        errors = []
+        for result in response.json()['results']:
+            if 200 <= result['statusCode'] < 300:
+                errors.append(None)
+            else:
+                errors.append(', '.join(u'{0}: {1}'.format(error.get('errorCode'), error.get('message'))
+                                        for error in result['result'] or []) or str(result['statusCode']))
+        return errors
+
+    def _post(self, resource, data):
+        if not self.oauth_data:
+            self.authenticate()
+        url = '{0}/services/data/v{1}/{2}'.format(self.oauth_data['instance_url'], self.api_version, resource)
+        headers = {
+            'Authorization': 'OAuth {0}'.format(self.oauth_data['access_token']),
+            'Content-Type': 'application/json'
+        }
+        return requests.post(url, data=json.dumps(data), headers=headers)
+
+
+class BulkUpserter(object):
+    """
+    Iterate over the local records with sync() to get the Salesforce object of each record. The Salesforce objects of
+    a batch are upserted when the fields of all objects in the batch have been set. Only the fields that have changed
+    are sent.
+    """
+
+    def __init__(self, model, external_id_field, name, dry_run=False, batch_size=None, client=None):
+        self.model = model
+        self.external_id_field = external_id_field
+        self.external_id_column = model._meta.get_field(external_id_field).column
+        self.object_type = '{0}.{1}'.format(model._meta.db_table, self.external_id_column)
+        self.name = name
+        self.dry_run = dry_run
+        self.batch_size = batch_size or getattr(settings, 'SALESFORCE_SYNC_BATCH_SIZE', 200)
+        self.client = client or SalesforceRestClient()
+        self.success_count = 0
+        self.error_count = 0
+        self.watermark = None
+
+    def lookup(self, model, field_name='external_id'):
+        """
+        Returns a dictionary with the Salesforce id of every external id of the model so related objects can be set
+        without a query per record.
+        """
+        return self.client.fetch_ids(model, field_name)
+
+    def resume(self, records):
+        """
+        Returns the records after the sync watermark of their model. The watermark is advanced after every batch that
+        has been upserted.
+        """
+        model = records.model
+        self.watermark, created = SyncWatermark.objects.get_or_create(
+            object_type='{0}.{1}'.format(model._meta.app_label, model._meta.object_name.lower()))
+        if not created:
+            logger.info("Resuming {0} after {1}.".format(self.name, self.watermark))
+        return self.watermark.filter(records)
+
+    def get_values(self, sfobject):
+        return dict((field.column, getattr(sfobject, field.attname)) for field in self.model._meta.fields
+                    if not field.primary_key)
+
+    def get_hash(self, sfobject):
+        values = dict((column, serialize_value(value)) for column, value in self.get_values(sfobject).items())
+        return hashlib.sha1(json.dumps(values, sort_keys=True, default=unicode)).hexdigest()
+
+    def sync(self, records, prefetch=None):
+        """
+        Yields a (record, Salesforce object) pair for every record. The fields of every record are set on a new
+        Salesforce object first. Records of which the hash of these fields is the same as when they were last synced
+        are skipped. The others are yielded once more with their existing Salesforce object.
+
+        The optional prefetch function is called with every batch of records before they are yielded, so related
+        objects can be loaded for the whole batch at once.
+        """
+        skipped_count = 0
+        for batch in chunks(records, self.batch_size):
+            if prefetch:
+                prefetch(batch)
+            hashes = {}
+            for record in batch:
+                logger.debug("Syncing {0}: {1}".format(self.name, record.id))
+                sfobject = self.model()
+
+                yield record, sfobject
+
+                hashes[record.id] = self.get_hash(sfobject)
+
+            synced_hashes = dict(SyncHash.objects.filter(object_type=self.object_type, object_id__in=hashes.keys())
+                                 .values_list('object_id', 'payload_hash'))
+            changed_records = [record for record in batch if synced_hashes.get(record.id) != hashes[record.id]]
+            skipped_count += len(batch) - len(changed_records)
+
+            existing = {}
+            if changed_records:
+                for sfobject in self.client.fetch(self.model, self.external_id_field,
+                                                  [unicode(record.id) for record in changed_records]):
+                    existing[unicode(getattr(sfobject, self.external_id_field))] = sfobject
+
+            synced = []
+            for record in changed_records:
+                sfobject = existing.get(unicode(record.id))
+                if sfobject is None:
+                    sfobject = self.model()
+                original_values = self.get_values(sfobject)
+
+                yield record, sfobject
+
+                synced.append((record, sfobject, original_values))
+
+            if not self.dry_run:
+                saved_records = self.upsert(synced)
+                self.save_hashes(dict((record.id, hashes[record.id]) for record in saved_records))
+                if self.watermark:
+                    self.advance_watermark(batch, synced, saved_records)
+
+        if skipped_count:
+            logger.info("Skipped {0} {1} records that haven't changed since they were last synced.".format(
+                skipped_count, self.name))
+
+    def advance_watermark(self, batch, synced, saved_records):
+        """
+        Moves the watermark to the last record of the batch before the first record that couldn't be saved. The
+        watermark isn't moved any further in this sync after a record has failed, so the next sync starts with it.
+        """
+        failed_ids = set(record.id for record, sfobject, original_values in synced) - \
+            set(record.id for record in saved_records)
+        saved_batch = list(itertools.takewhile(lambda record: record.id not in failed_ids, batch))
+        if saved_batch:
+            self.watermark.advance(saved_batch)
+        if len(saved_batch) < len(batch):
+            logger.warn("Not advancing the {0} sync watermark after record {1} because it couldn't be saved.".format(
+                self.name, batch[len(saved_batch)].id))
+            self.watermark = None
+
+    def save_hashes(self, hashes):
+        SyncHash.objects.filter(object_type=self.object_type, object_id__in=hashes.keys()).delete()
+        SyncHash.objects.bulk_create([SyncHash(object_type=self.object_type, object_id=object_id, payload_hash=value)
+                                      for object_id, value in hashes.items()])
+
+    def upsert(self, synced):
+        """ Returns the records that have been saved. """
+        saved_records = []
+        changed = []
+        for record, sfobject, original_values in synced:
+            fields = {}
+            for column, value in self.get_values(sfobject).items():
+                if column != self.external_id_column and value != original_values[column]:
+                    fields[column] = serialize_value(value)
+
+            # Existing Salesforce objects that already have all values don't need to be sent.
+            if fields or not sfobject.pk:
+                changed.append((record, fields))
+            else:
+                self.success_count += 1
+                saved_records.append(record)
+
+        if not changed:
+            return saved_records
+
+        errors = self.client.upsert(self.model, self.external_id_column,
+                                    [(record.id, fields) for record, fields in changed])
+        for (record, fields), error in zip(changed, errors):
+            if error:
+                self.error_count += 1
+                logger.error("Error while saving {0} id {1}: ".format(self.name, record.id) + error)
+            else:
+                self.success_count += 1
+                saved_records.append(record)
+        return saved_records
@@ -1,5 +1,6 @@
 import logging
 import sys
+import threading
 import os
 from optparse import make_option
 from datetime import timedelta
@@ -9,8 +10,7 @@ from django.conf import settings
 from ...export import generate_donations_csv_file, generate_organizations_csv_file, generate_users_csv_file, \
     generate_projects_csv_file, generate_projectbudgetlines_csv_file, generate_vouchers_csv_file, \
     generate_tasks_csv_file, generate_taskmembers_csv_file
-from ...sync import sync_organizations, sync_users, sync_projects, sync_projectbudgetlines, sync_tasks, sync_taskmembers, \
-    sync_donations, sync_vouchers
+from ...sync import SYNC_PHASES, run_phases
 
 logger = logging.getLogger('bluebottle.salesforce')
 
@@ -26,6 +26,7 @@ class Command(BaseCommand):
 
     error_count = 0
     success_count = 0
+    count_lock = threading.Lock()
 
     verbosity_loglevel = {
         '0': logging.ERROR,    # 0 means no output.
@@ -44,8 +45,21 @@ class Command(BaseCommand):
         make_option('--sync-all', action='store_true', dest='sync_all',
                     help="Sync all records."),
 
+        make_option('--sync-incremental', action='store_true', dest='sync_incremental',
+                    help="Only sync the records that have been updated since the last record synced with this option. "
+                         "A sync that stopped halfway continues where it stopped."),
+
+        make_option('--batch-size', action='store', dest='batch_size', type='int', metavar='SIZE',
+                    help="Number of records to upsert to Salesforce at a time (default: SALESFORCE_SYNC_BATCH_SIZE)."),
+
+        make_option('--workers', action='store', dest='workers', type='int', default=1, metavar='N',
+                    help="Number of sync phases to run at the same time (default: 1)."),
+
         make_option('--csv-export', action='store_true', dest='csv_export', default=False,
-                    help="Generate CSV files instead of syncing data with the Salesforce REST API.")
+                    help="Generate CSV files instead of syncing data with the Salesforce REST API."),
+
+        make_option('--gzip', action='store_true', dest='gzip', default=False,
+                    help="Compress the CSV files with gzip.")
     )
 
     def handle(self, *args, **options):
@@ -53,12 +67,13 @@ class Command(BaseCommand):
         loglevel = self.verbosity_loglevel.get(options['verbosity'])
         logger.setLevel(loglevel)
 
-        if options['sync_updated'] and options['sync_all']:
-            logger.error("You cannot set both '--sync-all' and '--sync-updated'.")
+        sync_modes = [option for option in ('sync_updated', 'sync_all', 'sync_incremental') if options[option]]
+        if len(sync_modes) > 1:
+            logger.error("You can only set one of '--sync-all', '--sync-updated' and '--sync-incremental'.")
             sys.exit(1)
-        elif not options['csv_export'] and not options['sync_updated'] and not options['sync_all']:
-            logger.error("You must set either '--csv-export', '--sync-all' or '--sync-updated MINUTES'. "
-                         "See help for more information.")
+        elif not options['csv_export'] and not sync_modes:
+            logger.error("You must set either '--csv-export', '--sync-all', '--sync-updated MINUTES' or "
+                         "'--sync-incremental'. See help for more information.")
             sys.exit(1)
 
         sync_from_datetime = None
@@ -71,24 +86,24 @@ class Command(BaseCommand):
 
         if options['csv_export']:
             path = os.path.join(settings.PROJECT_ROOT, "salesforce", "dataloader_prd", "Data", "Input")
-            self.run_with_count_update(generate_organizations_csv_file, path, loglevel)
-            self.run_with_count_update(generate_users_csv_file, path, loglevel)
-            self.run_with_count_update(generate_projects_csv_file, path, loglevel)
-            self.run_with_count_update(generate_projectbudgetlines_csv_file, path, loglevel)
-            self.run_with_count_update(generate_donations_csv_file, path, loglevel)
-            # self.run_with_count_update(generate_vouchers_csv_file, path, loglevel)
-            self.run_with_count_update(generate_tasks_csv_file, path, loglevel)
-            self.run_with_count_update(generate_taskmembers_csv_file, path, loglevel)
+            self.run_with_count_update(generate_organizations_csv_file, path, loglevel, options['gzip'])
+            self.run_with_count_update(generate_users_csv_file, path, loglevel, options['gzip'])
+            self.run_with_count_update(generate_projects_csv_file, path, loglevel, options['gzip'])
+            self.run_with_count_update(generate_projectbudgetlines_csv_file, path, loglevel, options['gzip'])
+            self.run_with_count_update(generate_donations_csv_file, path, loglevel, options['gzip'])
+            # self.run_with_count_update(generate_vouchers_csv_file, path, loglevel, options['gzip'])
+            self.run_with_count_update(generate_tasks_csv_file, path, loglevel, options['gzip'])
+            self.run_with_count_update(generate_taskmembers_csv_file, path, loglevel, options['gzip'])
         else:
-            # The synchronization methods need to be run in a specific order because of foreign key dependencies.
-            self.run_with_count_update(sync_organizations, options['dry_run'], sync_from_datetime, loglevel)
-            self.run_with_count_update(sync_users, options['dry_run'], sync_from_datetime, loglevel)
-            self.run_with_count_update(sync_projects, options['dry_run'], sync_from_datetime, loglevel)
-            self.run_with_count_update(sync_projectbudgetlines, options['dry_run'], sync_from_datetime, loglevel)
-            self.run_with_count_update(sync_tasks, options['dry_run'], sync_from_datetime, loglevel)
-            self.run_with_count_update(sync_taskmembers, options['dry_run'], sync_from_datetime, loglevel)
-            self.run_with_count_update(sync_donations, options['dry_run'], sync_from_datetime, loglevel)
-            # self.run_with_count_update(sync_vouchers, options['dry_run'], sync_from_datetime, loglevel)
+            sync_args = (options['dry_run'], sync_from_datetime, loglevel, options['batch_size'],
+                         bool(options['sync_incremental']))
+
+            # The phases are run as soon as the phases they depend on because of foreign keys have finished.
+            timings = run_phases(SYNC_PHASES, max(options['workers'], 1),
+                                 lambda function: self.run_with_count_update(function, *sync_args))
+            for name, function, dependencies in SYNC_PHASES:
+                if name in timings:
+                    logger.info("{0}: {1:.1f} seconds".format(name.capitalize(), timings[name]))
 
         logger.info("Process finished at {2} with {0} successes and {1} errors.".format(self.success_count,
                                                                                         self.error_count,
@@ -97,5 +112,6 @@ class Command(BaseCommand):
 
     def run_with_count_update(self, function, *args, **kwargs):
         cur_success_count, cur_error_count = function(*args, **kwargs)
-        self.success_count += cur_success_count
-        self.error_count += cur_error_count
+        with self.count_lock:
+            self.success_count += cur_success_count
+            self.error_count += cur_error_count
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'SyncWatermark'
+        db.create_table(u'bluebottle_salesforce_syncwatermark', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('object_type', self.gf('django.db.models.fields.CharField')(unique=True, max_length=100)),
+            ('last_updated', self.gf('django.db.models.fields.DateTimeField')(null=True, blank=True)),
+            ('last_id', self.gf('django.db.models.fields.PositiveIntegerField')(null=True, blank=True)),
+            ('modified', self.gf('django.db.models.fields.DateTimeField')(auto_now=True, blank=True)),
+        ))
+        db.send_create_signal(u'bluebottle_salesforce', ['SyncWatermark'])
+
+
+    def backwards(self, orm):
+        # Deleting model 'SyncWatermark'
+        db.delete_table(u'bluebottle_salesforce_syncwatermark')
+
+
+    models = {
+        u'bluebottle_salesforce.syncwatermark': {
+            'Meta': {'object_name': 'SyncWatermark'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'last_id': ('django.db.models.fields.PositiveIntegerField', [], {'null': 'True', 'blank': 'True'}),
+            'last_updated': ('django.db.models.fields.DateTimeField', [], {'null': 'True', 'blank': 'True'}),
+            'modified': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'}),
+            'object_type': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '100'})
+        }
+    }
+
+    complete_apps = ['bluebottle_salesforce']
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'SyncHash'
+        db.create_table(u'bluebottle_salesforce_synchash', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('object_type', self.gf('django.db.models.fields.CharField')(max_length=100)),
+            ('object_id', self.gf('django.db.models.fields.PositiveIntegerField')()),
+            ('payload_hash', self.gf('django.db.models.fields.CharField')(max_length=40)),
+        ))
+        db.send_create_signal(u'bluebottle_salesforce', ['SyncHash'])
+
+        # Adding unique constraint on 'SyncHash', fields ['object_type', 'object_id']
+        db.create_unique(u'bluebottle_salesforce_synchash', ['object_type', 'object_id'])
+
+
+    def backwards(self, orm):
+        # Removing unique constraint on 'SyncHash', fields ['object_type', 'object_id']
+        db.delete_unique(u'bluebottle_salesforce_synchash', ['object_type', 'object_id'])
+
+        # Deleting model 'SyncHash'
+        db.delete_table(u'bluebottle_salesforce_synchash')
+
+
+    models = {
+        u'bluebottle_salesforce.synchash': {
+            'Meta': {'unique_together': "(('object_type', 'object_id'),)", 'object_name': 'SyncHash'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'object_id': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            'object_type': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'payload_hash': ('django.db.models.fields.CharField', [], {'max_length': '40'})
+        },
+        u'bluebottle_salesforce.syncwatermark': {
+            'Meta': {'object_name': 'SyncWatermark'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'last_id': ('django.db.models.fields.PositiveIntegerField', [], {'null': 'True', 'blank': 'True'}),
+            'last_updated': ('django.db.models.fields.DateTimeField', [], {'null': 'True', 'blank': 'True'}),
+            'modified': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'}),
+            'object_type': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '100'})
+        }
+    }
+
+    complete_apps = ['bluebottle_salesforce']
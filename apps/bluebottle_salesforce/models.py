@@ -1,5 +1,6 @@
 # from apps.bluebottle_salesforce.models import ProjectCountry
 from django.db import models
+from django.db.models import Q
 from salesforce.models import SalesforceModel
 from djchoices import DjangoChoices, ChoiceItem
 from django.utils.translation import ugettext as _
@@ -466,6 +467,45 @@ class SalesforceLoginHistory(SalesforceModel):
         managed = False
 
 
+class SyncWatermark(models.Model):
+    """
+    The last record of a model that has been synced to Salesforce by the incremental sync, by updated date and id. The
+    watermark is advanced after every batch so a sync that stopped halfway continues where it stopped.
+    """
+    object_type = models.CharField(max_length=100, unique=True)
+    last_updated = models.DateTimeField(null=True, blank=True)
+    last_id = models.PositiveIntegerField(null=True, blank=True)
+    modified = models.DateTimeField(auto_now=True)
+
+    def __unicode__(self):
+        return u'{0}: {1} ({2})'.format(self.object_type, self.last_updated, self.last_id)
+
+    def filter(self, records):
+        """ The records after the watermark, in the order in which they're synced. """
+        if self.last_updated:
+            records = records.filter(Q(updated__gt=self.last_updated) |
+                                     Q(updated=self.last_updated, id__gt=self.last_id))
+        return records.order_by('updated', 'id')
+
+    def advance(self, records):
+        """ Move the watermark to the last record of a batch that has been synced. """
+        self.last_updated, self.last_id = records[-1].updated, records[-1].id
+        self.save()
+
+
+class SyncHash(models.Model):
+    """
+    The hash of the Salesforce fields of a record when it was last synced. The object type is the Salesforce object and
+    external id field, for example 'Account.Organization_External_ID__c'.
+    """
+    object_type = models.CharField(max_length=100)
+    object_id = models.PositiveIntegerField()
+    payload_hash = models.CharField(max_length=40)
+
+    class Meta:
+        unique_together = ('object_type', 'object_id')
+
+
 # Other Salesforce models available from Force.com IDE (Eclipse based)
 # - ActivityHistory, AddtionalNumber, AggregateResult
 # - ApexClass, ApexComponent, ApexLog, ApexTestQueueItem, ApexTestResult, ApexTrigger
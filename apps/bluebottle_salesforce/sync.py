@@ -1,7 +1,13 @@
 import logging
+import Queue
+import threading
+import time
+
+from django.db import connection
 from registration.models import RegistrationProfile
-from bluebottle.accounts.models import BlueBottleUser
-from apps.cowry_docdata.models import payment_method_mapping
+from bluebottle.accounts.models import BlueBottleUser, UserAddress
+from apps.cowry.models import Payment
+from apps.cowry_docdata.models import DocDataPayment, payment_method_mapping
 from apps.projects.models import Project, ProjectBudgetLine, ProjectCampaign, ProjectPitch, ProjectPlan, \
     ProjectPhases, ProjectAmbassador
 from apps.organizations.models import Organization
@@ -9,32 +15,46 @@ from apps.tasks.models import Task, TaskMember
 from apps.fund.models import Donation, DonationStatuses, RecurringDirectDebitPayment
 from apps.vouchers.models import Voucher, VoucherStatuses
 
+from apps.bluebottle_salesforce.bulk import BulkUpserter
 from apps.bluebottle_salesforce.models import SalesforceOrganization, SalesforceContact, SalesforceProject, \
     SalesforceDonation, SalesforceProjectBudget, SalesforceTask, SalesforceTaskMembers, SalesforceVoucher
 
 logger = logging.getLogger('bluebottle.salesforce')
 
 
-def sync_organizations(dry_run, sync_from_datetime, loglevel):
+def load_payment_methods(order_ids):
+    """
+    Returns the payment method of the latest DocData payment of the latest payment of the orders, by order id.
+    """
+    latest_payments = {}
+    for order_id, payment_id in Payment.objects.filter(order__in=order_ids).order_by('created', 'id') \
+            .values_list('order_id', 'id'):
+        latest_payments[order_id] = payment_id
+
+    payment_methods = {}
+    for payment_id, payment_method in DocDataPayment.objects.filter(
+            docdata_payment_order__in=latest_payments.values()).order_by('created', 'id') \
+            .values_list('docdata_payment_order_id', 'payment_method'):
+        payment_methods[payment_id] = payment_method
+
+    return dict((order_id, payment_methods[payment_id]) for order_id, payment_id in latest_payments.items()
+                if payment_id in payment_methods)
+
+
+def sync_organizations(dry_run, sync_from_datetime, loglevel, batch_size=None, incremental=False, client=None):
     logger.setLevel(loglevel)
-    error_count = 0
-    success_count = 0
 
     organizations = Organization.objects.all()
     if sync_from_datetime:
         organizations = organizations.filter(updated__gte=sync_from_datetime)
 
-    logger.info("Syncing {0} Organization objects.".format(organizations.count()))
-
-    for organization in organizations:
-        logger.debug("Syncing Organization: {0}".format(organization.id))
+    upserter = BulkUpserter(SalesforceOrganization, 'external_id', 'organization', dry_run, batch_size, client)
+    if incremental:
+        organizations = upserter.resume(organizations)
 
-        # Find the corresponding SF organization.
-        try:
-            sforganization = SalesforceOrganization.objects.get(external_id=organization.id)
-        except SalesforceOrganization.DoesNotExist:
-            sforganization = SalesforceOrganization()
+    logger.info("Syncing {0} Organization objects.".format(organizations.count()))
 
+    for organization, sforganization in upserter.sync(organizations):
         # SF Layout: Account details section.
         sforganization.name = organization.name
         sforganization.legal_status = organization.legal_status
@@ -68,39 +88,37 @@ def sync_organizations(dry_run, sync_from_datetime, loglevel):
         sforganization.external_id = organization.id
         sforganization.created_date = organization.created
 
-        # Save the object to Salesforce
-        if not dry_run:
-            try:
-                sforganization.save()
-                success_count += 1
-            except Exception as e:
-                error_count += 1
-                logger.error("Error while saving organization id {0}: ".format(organization.id) + str(e))
-
-    return success_count, error_count
+    return upserter.success_count, upserter.error_count
 
 
-def sync_users(dry_run, sync_from_datetime, loglevel):
+def sync_users(dry_run, sync_from_datetime, loglevel, batch_size=None, incremental=False, client=None):
     logger.setLevel(loglevel)
-    error_count = 0
-    success_count = 0
 
     users = BlueBottleUser.objects.all()
 
     if sync_from_datetime:
         users = users.filter(updated__gte=sync_from_datetime)
 
+    upserter = BulkUpserter(SalesforceContact, 'external_id', 'contact', dry_run, batch_size, client)
+    if incremental:
+        users = upserter.resume(users)
+
     logger.info("Syncing {0} User objects.".format(users.count()))
 
-    for user in users:
-        logger.debug("Syncing User: {0}".format(user.id))
+    # Load the recurring payments and activation keys of the users at once.
+    recurring_payments = dict((recurring_payment.user_id, recurring_payment) for recurring_payment in
+                              RecurringDirectDebitPayment.objects.filter(user__in=users))
+    activation_keys = dict(RegistrationProfile.objects.filter(user__in=users).values_list('user_id', 'activation_key'))
 
-        # Find the corresponding SF user.
-        try:
-            contact = SalesforceContact.objects.get(external_id=user.id)
-        except SalesforceContact.DoesNotExist:
-            contact = SalesforceContact()
+    # The addresses are loaded per batch of users.
+    addresses = {}
 
+    def load_addresses(batch):
+        addresses.clear()
+        addresses.update((address.user_id, address) for address in
+                         UserAddress.objects.filter(user__in=[user.id for user in batch]).select_related('country'))
+
+    for user, contact in upserter.sync(users, prefetch=load_addresses):
         # Determine and set user type (person, group, foundation, school, company, ... )
         contact.category1 = BlueBottleUser.UserType.values[user.user_type].title()
 
@@ -141,12 +159,12 @@ def sync_users(dry_run, sync_from_datetime, loglevel):
         contact.website = user.website
 
         # Bank details of recurring payments
-        try:
-            recurring_payment = RecurringDirectDebitPayment.objects.get(user=user)
+        recurring_payment = recurring_payments.get(user.id)
+        if recurring_payment:
             contact.bank_account_city = recurring_payment.city
             contact.bank_account_holder = recurring_payment.name
             contact.bank_account_number = recurring_payment.account
-        except RecurringDirectDebitPayment.DoesNotExist:
+        else:
             contact.bank_account_city = ''
             contact.bank_account_holder = ''
             contact.bank_account_number = ''
@@ -154,26 +172,26 @@ def sync_users(dry_run, sync_from_datetime, loglevel):
         # Determine if the user has activated himself, by default assume not
         # if this is a legacy record, by default assume it has activated
         contact.has_activated = False
-        try:
-            rp = RegistrationProfile.objects.get(user_id=user.id)
-            contact.tags = rp.activation_key
-            if rp.activation_key == RegistrationProfile.ACTIVATED:
+        if user.id in activation_keys:
+            contact.tags = activation_keys[user.id]
+            if activation_keys[user.id] == RegistrationProfile.ACTIVATED:
                 contact.has_activated = True
-        except RegistrationProfile.DoesNotExist:
+        else:
             if not user.is_active and user.date_joined == user.last_login:
                 contact.has_activated = False
             else:
                 contact.has_activated = True
 
-        if user.address:
-            contact.mailing_city = user.address.city
-            contact.mailing_street = user.address.line1 + '\n' + user.address.line2
-            if user.address.country:
-                contact.mailing_country = user.address.country.name
+        address = addresses.get(user.id)
+        if address:
+            contact.mailing_city = address.city
+            contact.mailing_street = address.line1 + '\n' + address.line2
+            if address.country:
+                contact.mailing_country = address.country.name
             else:
                 contact.mailing_country = ''
-            contact.mailing_postal_code = user.address.postal_code
-            contact.mailing_state = user.address.state
+            contact.mailing_postal_code = address.postal_code
+            contact.mailing_state = address.state
         else:
             contact.mailing_city = ''
             contact.mailing_street = ''
@@ -191,66 +209,60 @@ def sync_users(dry_run, sync_from_datetime, loglevel):
         # SF: Other
         contact.external_id = user.id
 
-        # Save the object to Salesforce
-        if not dry_run:
-            try:
-                contact.save()
-                success_count += 1
-            except Exception as e:
-                error_count += 1
-                logger.error("Error while saving contact id {0}: ".format(user.id) + str(e))
-
-    return success_count, error_count
+    return upserter.success_count, upserter.error_count
 
 
-def sync_projects(dry_run, sync_from_datetime, loglevel):
+def sync_projects(dry_run, sync_from_datetime, loglevel, batch_size=None, incremental=False, client=None):
     logger.setLevel(loglevel)
-    error_count = 0
-    success_count = 0
 
     projects = Project.objects.all()
 
     if sync_from_datetime:
         projects = projects.filter(updated__gte=sync_from_datetime)
 
-    logger.info("Syncing {0} Project objects.".format(projects.count()))
-
-    for project in projects:
-        logger.debug("Syncing Project: {0}".format(project.id))
+    upserter = BulkUpserter(SalesforceProject, 'external_id', 'project', dry_run, batch_size, client)
+    if incremental:
+        projects = upserter.resume(projects)
 
-        # Find the corresponding SF project.
-        try:
-            sfproject = SalesforceProject.objects.get(external_id=project.id)
-        except SalesforceProject.DoesNotExist:
-            sfproject = SalesforceProject()
+    logger.info("Syncing {0} Project objects.".format(projects.count()))
 
+    # Load the Salesforce ids of the related objects and the campaigns, pitches, plans and ambassadors of the projects
+    # at once.
+    contact_ids = upserter.lookup(SalesforceContact)
+    organization_ids = upserter.lookup(SalesforceOrganization)
+    project_campaigns = dict((project_campaign.project_id, project_campaign) for project_campaign in
+                             ProjectCampaign.objects.filter(project__in=projects))
+    project_pitches = dict((project_pitch.project_id, project_pitch) for project_pitch in
+                           ProjectPitch.objects.filter(project__in=projects).select_related('country')
+                           .prefetch_related('tags'))
+    project_plans = dict((project_plan.project_id, project_plan) for project_plan in
+                         ProjectPlan.objects.filter(project__in=projects))
+    project_ambassadors = {}
+    for project_ambassador in ProjectAmbassador.objects.filter(project_plan__project__in=projects).order_by('id'):
+        project_ambassadors.setdefault(project_ambassador.project_plan_id, []).append(project_ambassador)
+
+    for project, sfproject in upserter.sync(projects):
         # SF Layout: 1%CLUB Project Detail section.
-        try:
-            project_campaign = ProjectCampaign.objects.get(project=project)
-        except ProjectCampaign.DoesNotExist:
-            pass
-        else:
+        project_campaign = project_campaigns.get(project.id)
+        if project_campaign:
             sfproject.amount_at_the_moment = "%01.2f" % (project_campaign.money_donated / 100)
             sfproject.amount_requested = "%01.2f" % (project_campaign.money_asked / 100)
             sfproject.amount_still_needed = "%01.2f" % (project_campaign.money_needed / 100)
             if project.phase == ProjectPhases.campaign:
                 sfproject.date_project_deadline = project_campaign.deadline
 
-        try:
-            sfproject.project_owner = SalesforceContact.objects.get(external_id=project.owner.id)
-        except SalesforceContact.DoesNotExist:
-            logger.error("Unable to find contact id {0} in Salesforce for project id {1}".format(project.owner.id,
+        if unicode(project.owner_id) in contact_ids:
+            sfproject.project_owner_id = contact_ids[unicode(project.owner_id)]
+        else:
+            logger.error("Unable to find contact id {0} in Salesforce for project id {1}".format(project.owner_id,
                                                                                                  project.id))
 
         sfproject.project_name = project.title
         sfproject.status_project = ProjectPhases.values[project.phase].title()
 
         # SF Layout: Summary Project Details section.
-        try:
-            project_pitch = ProjectPitch.objects.get(project=project)
-        except ProjectPitch.DoesNotExist:
-            pass
-        else:
+        project_pitch = project_pitches.get(project.id)
+        if project_pitch:
             if project_pitch.country:
                 sfproject.country_in_which_the_project_is_located = project_pitch.country.name
             sfproject.describe_the_project_in_one_sentence = project_pitch.pitch[:5000]
@@ -270,9 +282,8 @@ def sync_projects(dry_run, sync_from_datetime, loglevel):
             for tag in project_pitch.tags.all():
                 sfproject.tags = str(tag) + ", " + sfproject.tags
 
-        try:
-            project_plan = ProjectPlan.objects.get(project=project)
-        except ProjectPlan.DoesNotExist:
+        project_plan = project_plans.get(project.id)
+        if not project_plan:
             sfproject.organization_account = None
         else:
             sfproject.target_group_s_of_the_project = project_plan.for_who
@@ -290,33 +301,29 @@ def sync_projects(dry_run, sync_from_datetime, loglevel):
                 sfproject.date_plan_rejected = project_plan.updated
 
             # Project referrals (ambassador) - expected are three or less related values
-            try:
-                project_ambs = ProjectAmbassador.objects.filter(project_plan=project_plan)
-                if project_ambs.count() > 0:
-                    sfproject.name_referral_1 = project_ambs[0].name
-                    sfproject.description_referral_1 = project_ambs[0].description
-                    sfproject.email_address_referral_1 = project_ambs[0].email
-                if project_ambs.count() > 1:
-                    sfproject.name_referral_2 = project_ambs[1].name
-                    sfproject.description_referral_2 = project_ambs[1].description
-                    sfproject.email_address_referral_2 = project_ambs[1].email
-                if project_ambs.count() > 2:
-                    sfproject.name_referral_3 = project_ambs[2].name
-                    sfproject.description_referral_3 = project_ambs[2].description
-                    sfproject.email_address_referral_3 = project_ambs[2].email
-            except ProjectAmbassador.DoesNotExist:
-                pass
+            project_ambs = project_ambassadors.get(project_plan.id, [])
+            if len(project_ambs) > 0:
+                sfproject.name_referral_1 = project_ambs[0].name
+                sfproject.description_referral_1 = project_ambs[0].description
+                sfproject.email_address_referral_1 = project_ambs[0].email
+            if len(project_ambs) > 1:
+                sfproject.name_referral_2 = project_ambs[1].name
+                sfproject.description_referral_2 = project_ambs[1].description
+                sfproject.email_address_referral_2 = project_ambs[1].email
+            if len(project_ambs) > 2:
+                sfproject.name_referral_3 = project_ambs[2].name
+                sfproject.description_referral_3 = project_ambs[2].description
+                sfproject.email_address_referral_3 = project_ambs[2].email
 
             # TODO: determine what should be in project number_of_people_reached_indirect?
             # sfproject.number_of_people_reached_indirect = (project.fundphase.impact_indirect_male +
             #                                                project.fundphase.impact_indirect_female)
-            if project_plan.organization:
-                try:
-                    sfproject.organization_account = SalesforceOrganization.objects.get(
-                        external_id=project_plan.organization.id)
-                except SalesforceOrganization.DoesNotExist:
+            if project_plan.organization_id:
+                if unicode(project_plan.organization_id) in organization_ids:
+                    sfproject.organization_account_id = organization_ids[unicode(project_plan.organization_id)]
+                else:
                     logger.error("Unable to find organization id {0} in Salesforce for project id {1}".format(
-                        project_plan.organization.id, project.id))
+                        project_plan.organization_id, project.id))
 
         sfproject.project_url = "http://www.onepercentclub.com/en/#!/projects/{0}".format(project.slug)
 
@@ -337,97 +344,77 @@ def sync_projects(dry_run, sync_from_datetime, loglevel):
         # SF Layout: Other section.
         sfproject.external_id = project.id
 
-        # Save the object to Salesforce
-        if not dry_run:
-            try:
-                sfproject.save()
-                success_count += 1
-            except Exception as e:
-                error_count += 1
-                logger.error("Error while saving project id {0}: ".format(project.id) + str(e))
-
-    return success_count, error_count
+    return upserter.success_count, upserter.error_count
 
 
-def sync_projectbudgetlines(dry_run, sync_from_datetime, loglevel):
+def sync_projectbudgetlines(dry_run, sync_from_datetime, loglevel, batch_size=None, incremental=False, client=None):
     logger.setLevel(loglevel)
-    error_count = 0
-    success_count = 0
 
     budget_lines = ProjectBudgetLine.objects.all()
 
     if sync_from_datetime:
         budget_lines = budget_lines.filter(updated__gte=sync_from_datetime)
 
+    upserter = BulkUpserter(SalesforceProjectBudget, 'external_id', 'budget line', dry_run, batch_size, client)
+    if incremental:
+        budget_lines = upserter.resume(budget_lines)
+
     logger.info("Syncing {0} BudgetLine objects.".format(budget_lines.count()))
 
-    for budget_line in budget_lines:
-        logger.debug("Syncing BudgetLine: {0}".format(budget_line.id))
-
-        # Find the corresponding SF budget lines.
-        try:
-            sfbudget_line = SalesforceProjectBudget.objects.get(external_id=budget_line.id)
-        except SalesforceProjectBudget.DoesNotExist:
-            sfbudget_line = SalesforceProjectBudget()
+    project_ids = upserter.lookup(SalesforceProject)
 
+    for budget_line, sfbudget_line in upserter.sync(budget_lines):
         # SF Layout: Information section
         sfbudget_line.costs = "%01.2f" % (budget_line.amount / 100)
         sfbudget_line.description = budget_line.description
         sfbudget_line.external_id = budget_line.id
 
-        try:
-            sfbudget_line.project = SalesforceProject.objects.get(external_id=budget_line.project_plan.id)
-        except SalesforceProject.DoesNotExist:
+        if unicode(budget_line.project_plan_id) in project_ids:
+            sfbudget_line.project_id = project_ids[unicode(budget_line.project_plan_id)]
+        else:
             logger.error("Unable to find project id {0} in Salesforce for budget line id {1}".format(
-                budget_line.project_plan.id, budget_line.id))
-
-        # Save the object to Salesforce
-        if not dry_run:
-            try:
-                sfbudget_line.save()
-                success_count += 1
-            except Exception as e:
-                error_count += 1
-                logger.error("Error while saving budget line id {0}: ".format(budget_line.id) + str(e))
+                budget_line.project_plan_id, budget_line.id))
 
-    return success_count, error_count
+    return upserter.success_count, upserter.error_count
 
 
-def sync_donations(dry_run, sync_from_datetime, loglevel):
+def sync_donations(dry_run, sync_from_datetime, loglevel, batch_size=None, incremental=False, client=None):
     logger.setLevel(loglevel)
-    error_count = 0
-    success_count = 0
 
-    donations = Donation.objects.all()
+    donations = Donation.objects.select_related('user')
     if sync_from_datetime:
         donations = donations.filter(updated__gte=sync_from_datetime)
 
+    upserter = BulkUpserter(SalesforceDonation, 'external_id_donation', 'donation', dry_run, batch_size, client)
+    if incremental:
+        donations = upserter.resume(donations)
+
     logger.info("Syncing {0} Donation objects.".format(donations.count()))
 
-    for donation in donations:
-        logger.debug("Syncing Donation: {0}".format(donation.id))
+    contact_ids = upserter.lookup(SalesforceContact)
+    project_ids = upserter.lookup(SalesforceProject)
 
-        # Find the corresponding SF donation.
-        try:
-            sfdonation = SalesforceDonation.objects.get(external_id_donation=donation.id)
-        except SalesforceDonation.DoesNotExist:
-            sfdonation = SalesforceDonation()
+    # The payment methods of the orders are loaded per batch of donations.
+    payment_methods = {}
 
+    def load_payment_methods_of_batch(batch):
+        payment_methods.clear()
+        payment_methods.update(load_payment_methods(set(donation.order_id for donation in batch)))
+
+    for donation, sfdonation in upserter.sync(donations, prefetch=load_payment_methods_of_batch):
         # Initialize Salesforce objects.
-        if donation.user:
-            try:
-                sfContact = SalesforceContact.objects.get(external_id=donation.user.id)
-                sfdonation.receiver = sfContact
-            except SalesforceContact.DoesNotExist:
+        if donation.user_id:
+            if unicode(donation.user_id) in contact_ids:
+                sfdonation.receiver_id = contact_ids[unicode(donation.user_id)]
+            else:
                 logger.error("Unable to find contact id {0} in Salesforce for donation id {1}".format(
-                    donation.user.id, donation.id))
-        if donation.project:
-            try:
-                sfProject = SalesforceProject.objects.get(external_id=donation.project.id)
-                sfdonation.project = sfProject
-            except SalesforceProject.DoesNotExist:
+                    donation.user_id, donation.id))
+        if donation.project_id:
+            if unicode(donation.project_id) in project_ids:
+                sfdonation.project_id = project_ids[unicode(donation.project_id)]
+            else:
                 logger.error("Unable to find project id {0} in Salesforce for donation id {1}".format(
-                    donation.project.id, donation.id))
+                    donation.project_id, donation.id))
 
         # SF Layout: Donation Information section.
         sfdonation.amount = "%01.2f" % (float(donation.amount) / 100)
@@ -440,11 +427,9 @@ def sync_donations(dry_run, sync_from_datetime, loglevel):
 
         # Get the payment method from the associated order / payment
         sfdonation.payment_method = payment_method_mapping['']  # Maps to Unknown for DocData.
-        if donation.order:
-            lp = donation.order.latest_payment
-            if lp and lp.latest_docdata_payment:
-                if lp.latest_docdata_payment.payment_method in payment_method_mapping:
-                    sfdonation.payment_method = payment_method_mapping[lp.latest_docdata_payment.payment_method]
+        payment_method = payment_methods.get(donation.order_id)
+        if payment_method in payment_method_mapping:
+            sfdonation.payment_method = payment_method_mapping[payment_method]
 
         sfdonation.stage_name = DonationStatuses.values[donation.status].title()
         sfdonation.opportunity_type = donation.DonationTypes.values[donation.donation_type].title()
@@ -454,42 +439,29 @@ def sync_donations(dry_run, sync_from_datetime, loglevel):
         sfdonation.external_id_donation = donation.id
         sfdonation.record_type = "012A0000000ZK6FIAW"
 
-        # Save the object to Salesforce
-        if not dry_run:
-            try:
-                sfdonation.save()
-                success_count += 1
-            except Exception as e:
-                error_count += 1
-                logger.error("Error while saving donation id {0}: ".format(donation.id) + str(e))
-
-    return success_count, error_count
+    return upserter.success_count, upserter.error_count
 
 
-def sync_vouchers(dry_run, sync_from_datetime, loglevel):
+def sync_vouchers(dry_run, sync_from_datetime, loglevel, batch_size=None, incremental=False, client=None):
     logger.setLevel(loglevel)
-    error_count = 0
-    success_count = 0
 
-    vouchers = Voucher.objects.all()
+    vouchers = Voucher.objects.select_related('sender')
     if sync_from_datetime:
         vouchers = vouchers.filter(updated__gte=sync_from_datetime)
 
-    logger.info("Syncing {0} Voucher objects.".format(vouchers.count()))
+    upserter = BulkUpserter(SalesforceVoucher, 'external_id_voucher', 'voucher', dry_run, batch_size, client)
+    if incremental:
+        vouchers = upserter.resume(vouchers)
 
-    for voucher in vouchers:
-        logger.debug("Syncing Voucher: {0}".format(voucher.id))
+    logger.info("Syncing {0} Voucher objects.".format(vouchers.count()))
 
-        # Find the corresponding SF vouchers.
-        try:
-            sfvoucher = SalesforceVoucher.objects.get(external_id_voucher=voucher.id)
-        except SalesforceVoucher.DoesNotExist:
-            sfvoucher = SalesforceVoucher()
+    contact_ids = upserter.lookup(SalesforceContact)
 
+    for voucher, sfvoucher in upserter.sync(vouchers):
         # Initialize the Contact object that refers to the voucher purchaser
-        try:
-            sfvoucher.purchaser = SalesforceContact.objects.get(external_id=voucher.sender_id)
-        except SalesforceContact.DoesNotExist:
+        if unicode(voucher.sender_id) in contact_ids:
+            sfvoucher.purchaser_id = contact_ids[unicode(voucher.sender_id)]
+        else:
             logger.error("Unable to find purchaser contact id {0} in Salesforce for voucher id {1}".format(
                 voucher.sender_id, voucher.id))
 
@@ -508,11 +480,13 @@ def sync_vouchers(dry_run, sync_from_datetime, loglevel):
 
         #sfvoucher.payment_method = ""
 
-        if sfvoucher.purchaser and sfvoucher.purchaser.last_name:
-            if sfvoucher.purchaser.first_name:
-                sfvoucher.name = sfvoucher.purchaser.first_name + " " + sfvoucher.purchaser.last_name
+        # The name of the purchaser contact, which sync_users sets from the sender.
+        if sfvoucher.purchaser_id:
+            last_name = voucher.sender.last_name if voucher.sender.last_name.strip() else "1%MEMBER"
+            if voucher.sender.first_name:
+                sfvoucher.name = voucher.sender.first_name + " " + last_name
             else:
-                sfvoucher.name = sfvoucher.purchaser.last_name
+                sfvoucher.name = last_name
         else:
             sfvoucher.name = "1%MEMBER"
 
@@ -523,43 +497,30 @@ def sync_vouchers(dry_run, sync_from_datetime, loglevel):
         sfvoucher.external_id_voucher = voucher.id
         sfvoucher.record_type = "012A0000000BxfHIAS"
 
-        # Save the object to Salesforce
-        if not dry_run:
-            try:
-                sfvoucher.save()
-                success_count += 1
-            except Exception as e:
-                error_count += 1
-                logger.error("Error while saving voucher id {0}: ".format(voucher.id) + str(e))
-
-    return success_count, error_count
+    return upserter.success_count, upserter.error_count
 
 
-def sync_tasks(dry_run, sync_from_datetime, loglevel):
+def sync_tasks(dry_run, sync_from_datetime, loglevel, batch_size=None, incremental=False, client=None):
     logger.setLevel(loglevel)
-    error_count = 0
-    success_count = 0
 
-    tasks = Task.objects.all()
+    tasks = Task.objects.prefetch_related('tags')
     if sync_from_datetime:
         tasks = tasks.filter(updated__gte=sync_from_datetime)
 
-    logger.info("Syncing {0} Task objects.".format(tasks.count()))
+    upserter = BulkUpserter(SalesforceTask, 'external_id', 'task', dry_run, batch_size, client)
+    if incremental:
+        tasks = upserter.resume(tasks)
 
-    for task in tasks:
-        logger.debug("Syncing Task: {0}".format(task.id))
+    logger.info("Syncing {0} Task objects.".format(tasks.count()))
 
-        # Find the corresponding SF tasks.
-        try:
-            sftask = SalesforceTask.objects.get(external_id=task.id)
-        except SalesforceTask.DoesNotExist:
-            sftask = SalesforceTask()
+    project_ids = upserter.lookup(SalesforceProject)
 
+    for task, sftask in upserter.sync(tasks):
         # SF Layout: Information section.
-        try:
-            sftask.project = SalesforceProject.objects.get(external_id=task.project.id)
-        except SalesforceProject.DoesNotExist:
-            logger.error("Unable to find project id {0} in Salesforce for task id {1}".format(task.project.id, task.id))
+        if unicode(task.project_id) in project_ids:
+            sftask.project_id = project_ids[unicode(task.project_id)]
+        else:
+            logger.error("Unable to find project id {0} in Salesforce for task id {1}".format(task.project_id, task.id))
 
         sftask.deadline = task.deadline.strftime("%d %B %Y")
         sftask.effort = task.time_needed
@@ -577,60 +538,108 @@ def sync_tasks(dry_run, sync_from_datetime, loglevel):
         # SF: Other
         sftask.external_id = task.id
 
-        # Save the object to Salesforce
-        if not dry_run:
-            try:
-                sftask.save()
-                success_count += 1
-            except Exception as e:
-                error_count += 1
-                logger.error("Error while saving task id {0}: ".format(task.id) + str(e))
-
-    return success_count, error_count
+    return upserter.success_count, upserter.error_count
 
 
-def sync_taskmembers(dry_run, sync_from_datetime, loglevel):
+def sync_taskmembers(dry_run, sync_from_datetime, loglevel, batch_size=None, incremental=False, client=None):
     logger.setLevel(loglevel)
-    error_count = 0
-    success_count = 0
 
     task_members = TaskMember.objects.all()
 
     if sync_from_datetime:
         task_members = task_members.filter(updated__gte=sync_from_datetime)
 
+    upserter = BulkUpserter(SalesforceTaskMembers, 'external_id', 'task member', dry_run, batch_size, client)
+    if incremental:
+        task_members = upserter.resume(task_members)
+
     logger.info("Syncing {0} TaskMember objects.".format(task_members.count()))
 
-    for task_member in task_members:
-        logger.debug("Syncing TaskMember: {0}".format(task_member.id))
-
-        # Find the corresponding SF task members.
-        try:
-            sftaskmember = SalesforceTaskMembers.objects.get(external_id=task_member.id)
-        except SalesforceTaskMembers.DoesNotExist:
-            sftaskmember = SalesforceTaskMembers()
+    contact_ids = upserter.lookup(SalesforceContact)
+    task_ids = upserter.lookup(SalesforceTask)
 
+    for task_member, sftaskmember in upserter.sync(task_members):
         # SF Layout: Information section.
-        try:
-            sftaskmember.contacts = SalesforceContact.objects.get(external_id=task_member.member.id)
-        except SalesforceContact.DoesNotExist:
+        if unicode(task_member.member_id) in contact_ids:
+            sftaskmember.contacts_id = contact_ids[unicode(task_member.member_id)]
+        else:
             logger.error("Unable to find contact id {0} in Salesforce for task member id {1}".format(
-                task_member.member.id, task_member.id))
-        try:
-            sftaskmember.x1_club_task = SalesforceTask.objects.get(external_id=task_member.task.id)
-        except SalesforceTask.DoesNotExist:
-            logger.error("Unable to find task id {0} in Salesforce for task member id {1}".format(task_member.member.id,
+                task_member.member_id, task_member.id))
+        if unicode(task_member.task_id) in task_ids:
+            sftaskmember.x1_club_task_id = task_ids[unicode(task_member.task_id)]
+        else:
+            logger.error("Unable to find task id {0} in Salesforce for task member id {1}".format(task_member.task_id,
                                                                                                   task_member.id))
 
         sftaskmember.external_id = task_member.id
 
-        # Save the object to Salesforce
-        if not dry_run:
-            try:
-                sftaskmember.save()
-                success_count += 1
-            except Exception as e:
-                error_count += 1
-                logger.error("Error while saving task id {0}: ".format(task_member.id) + str(e))
-
-    return success_count, error_count
+    return upserter.success_count, upserter.error_count
+
+
+# The sync phases with the phases they depend on because of foreign keys. For example the projects refer to their
+# owner contacts and organizations, so they are synced after the users and organizations.
+SYNC_PHASES = (
+    ('organizations', sync_organizations, ()),
+    ('users', sync_users, ()),
+    ('projects', sync_projects, ('organizations', 'users')),
+    ('budget lines', sync_projectbudgetlines, ('projects',)),
+    ('tasks', sync_tasks, ('projects',)),
+    ('task members', sync_taskmembers, ('tasks', 'users')),
+    ('donations', sync_donations, ('users', 'projects')),
+    # ('vouchers', sync_vouchers, ('users',)),
+)
+
+
+def run_phases(phases, workers, run_phase):
+    """
+    Calls run_phase(function) for every (name, function, dependencies) phase on at most workers threads. A phase is
+    started when the phases it depends on have finished, in the order of the phases. The phases that depend on a phase
+    that failed are skipped. Returns the number of seconds each phase took by name.
+    """
+    pending = list(phases)
+    finished, failed = set(), set()
+    timings = {}
+    results = Queue.Queue()
+    running = 0
+
+    def run(name, function):
+        start = time.time()
+        try:
+            run_phase(function)
+            succeeded = True
+        except Exception:
+            logger.exception("Error while syncing {0}.".format(name))
+            succeeded = False
+        finally:
+            # Every thread has its own database connection.
+            connection.close()
+        results.put((name, succeeded, time.time() - start))
+
+    while pending or running:
+        for phase in list(pending):
+            name, function, dependencies = phase
+            failed_dependencies = failed.intersection(dependencies)
+            if failed_dependencies:
+                logger.error("Skipping {0} because {1} failed.".format(name, ', '.join(failed_dependencies)))
+                pending.remove(phase)
+                failed.add(name)
+            elif running < workers and finished.issuperset(dependencies):
+                pending.remove(phase)
+                running += 1
+                thread = threading.Thread(target=run, args=(name, function), name='sync {0}'.format(name))
+                thread.daemon = True
+                thread.start()
+
+        if not running:
+            if pending:
+                raise ValueError("Unable to run {0} because of their dependencies.".format(
+                    ', '.join(name for name, function, dependencies in pending)))
+            break
+
+        name, succeeded, duration = results.get()
+        running -= 1
+        timings[name] = duration
+        (finished if succeeded else failed).add(name)
+        logger.info("Synced {0} in {1:.1f} seconds.".format(name, duration))
+
+    return timings
@@ -2,7 +2,13 @@
 The test cases in bluebottle_salesforce are intended to be used for integration
 with Django ORM and Salesforce for Onepercentclub.
 """
+import csv
+import gzip
 import logging
+import os
+import shutil
+import tempfile
+from bluebottle.accounts.models import UserAddress
 from bluebottle.bluebottle_utils.tests import UserTestsMixin
 import requests
 from datetime import datetime
@@ -12,7 +18,13 @@ from django.core.management import call_command
 from salesforce import auth
 from requests.exceptions import ConnectionError
 from django.utils import unittest
-from .models import SalesforceOrganization, SalesforceContact, SalesforceDonation, SalesforceProject
+from apps.fund.models import RecurringDirectDebitPayment
+from apps.organizations.models import Organization
+from .bulk import BulkUpserter
+from .export import generate_organizations_csv_file, generate_users_csv_file, queryset_chunks
+from .models import SalesforceOrganization, SalesforceContact, SalesforceDonation, SalesforceProject, \
+    SalesforceTaskMembers, SyncHash, SyncWatermark
+from .sync import run_phases, sync_organizations, sync_users
 
 logger = logging.getLogger(__name__)
 
@@ -202,3 +214,321 @@ class SyncToSalesforceIntegrationTest(UserTestsMixin, TestCase):
 
         # Run the sync test.
         call_command('sync_to_salesforce', test_run=True)
+
+
+class LocalSalesforceClient(object):
+    """
+    Stand-in for the Salesforce REST API that keeps the upserted fields in memory. Upserts of the external ids in
+    failing_ids fail.
+    """
+    def __init__(self, failing_ids=()):
+        self.records = {}
+        self.failing_ids = set(unicode(external_id) for external_id in failing_ids)
+        self.fetch_count = 0
+        self.upsert_calls = []
+
+    def fetch(self, model, field_name, values):
+        self.fetch_count += 1
+        attnames = dict((field.column, field.attname) for field in model._meta.fields)
+        sfobjects = []
+        for external_id in values:
+            fields = self.records.get((model._meta.db_table, external_id))
+            if fields is not None:
+                sfobject = model(**dict((attnames[column], value) for column, value in fields.items()))
+                setattr(sfobject, field_name, external_id)
+                sfobjects.append(sfobject)
+        return sfobjects
+
+    def fetch_ids(self, model, field_name):
+        return dict((external_id, fields['Id']) for (table, external_id), fields in self.records.items()
+                    if table == model._meta.db_table)
+
+    def upsert(self, model, external_id_column, payloads):
+        self.upsert_calls.append(payloads)
+        errors = []
+        for external_id, fields in payloads:
+            if unicode(external_id) in self.failing_ids:
+                errors.append('INVALID_FIELD: Broken record')
+                continue
+            key = (model._meta.db_table, unicode(external_id))
+            if key not in self.records:
+                self.records[key] = {'Id': 'a00{0}'.format(len(self.records))}
+            self.records[key].update(fields)
+            errors.append(None)
+        return errors
+
+
+class Record(object):
+    def __init__(self, id, name):
+        self.id = id
+        self.name = name
+
+
+class BulkUpserterTest(TestCase):
+    """
+    Test cases for the batched upserts with a local stand-in for Salesforce.
+    """
+    def sync(self, client, records, dry_run=False):
+        upserter = BulkUpserter(SalesforceOrganization, 'external_id', 'organization', dry_run=dry_run, batch_size=2,
+                                client=client)
+        for record, sforganization in upserter.sync(records):
+            sforganization.name = record.name
+            sforganization.external_id = record.id
+        return upserter.success_count, upserter.error_count
+
+    def test_batches(self):
+        client = LocalSalesforceClient()
+        records = [Record(i, 'Organization {0}'.format(i)) for i in range(1, 6)]
+
+        self.assertEqual(self.sync(client, records), (5, 0))
+        self.assertEqual(client.fetch_count, 3)
+        self.assertEqual([len(payloads) for payloads in client.upsert_calls], [2, 2, 1])
+        self.assertEqual(client.records[('Account', '3')]['Name'], 'Organization 3')
+
+    def test_only_changes_sent(self):
+        client = LocalSalesforceClient()
+        records = [Record(1, 'Organization 1'), Record(2, 'Organization 2')]
+        self.sync(client, records)
+        client.upsert_calls = []
+
+        records[1].name = 'Renamed'
+        self.assertEqual(self.sync(client, records), (1, 0))
+        self.assertEqual(client.upsert_calls, [[(2, {'Name': 'Renamed'})]])
+
+    def test_unchanged_records_skipped(self):
+        client = LocalSalesforceClient()
+        records = [Record(1, 'Organization 1'), Record(2, 'Organization 2')]
+        self.sync(client, records)
+        client.fetch_count, client.upsert_calls = 0, []
+
+        # Nothing is requested from Salesforce for records that haven't changed since the last sync.
+        self.assertEqual(self.sync(client, records), (0, 0))
+        self.assertEqual((client.fetch_count, client.upsert_calls), (0, []))
+
+        # Without the hashes the records are compared with Salesforce.
+        SyncHash.objects.all().delete()
+        self.assertEqual(self.sync(client, records), (2, 0))
+        self.assertEqual((client.fetch_count, client.upsert_calls), (1, []))
+        self.assertEqual(SyncHash.objects.count(), 2)
+
+    def test_errors_per_record(self):
+        client = LocalSalesforceClient(failing_ids=[2])
+        records = [Record(i, 'Organization {0}'.format(i)) for i in range(1, 4)]
+
+        self.assertEqual(self.sync(client, records), (2, 1))
+        self.assertNotIn(('Account', '2'), client.records)
+
+    def test_prefetch(self):
+        client = LocalSalesforceClient()
+        records = [Record(i, 'Organization {0}'.format(i)) for i in range(1, 6)]
+        batches = []
+
+        upserter = BulkUpserter(SalesforceOrganization, 'external_id', 'organization', batch_size=2, client=client)
+        for record, sforganization in upserter.sync(records, prefetch=batches.append):
+            sforganization.external_id = record.id
+        self.assertEqual([[record.id for record in batch] for batch in batches], [[1, 2], [3, 4], [5]])
+
+    def test_dry_run(self):
+        client = LocalSalesforceClient()
+        records = [Record(1, 'Organization 1')]
+
+        self.assertEqual(self.sync(client, records, dry_run=True), (0, 0))
+        self.assertEqual(client.upsert_calls, [])
+
+    def test_sync_organizations(self):
+        Organization.objects.create(name='Foundation', slug='foundation', city='Amsterdam')
+        client = LocalSalesforceClient()
+
+        self.assertEqual(sync_organizations(False, None, logging.ERROR, client=client), (1, 0))
+        fields = client.records.values()[0]
+        self.assertEqual(fields['Name'], 'Foundation')
+        self.assertEqual(fields['BillingCity'], 'Amsterdam')
+
+
+class SyncUsersTest(UserTestsMixin, TestCase):
+    """
+    Test cases for the users sync with a local stand-in for Salesforce.
+    """
+    def test_recurring_payments(self):
+        user = self.create_user()
+        other_user = self.create_user()
+        RecurringDirectDebitPayment.objects.create(user=user, name='Account Holder', city='Amsterdam',
+                                                   account='123456789')
+        client = LocalSalesforceClient()
+
+        self.assertEqual(sync_users(False, None, logging.ERROR, client=client), (2, 0))
+        self.assertEqual(client.records[('Contact', unicode(user.id))]['Account_holder__c'], 'Account Holder')
+        self.assertNotIn('Account_holder__c', client.records[('Contact', unicode(other_user.id))])
+
+        # The Salesforce ids of the contacts are looked up at once.
+        upserter = BulkUpserter(SalesforceTaskMembers, 'external_id', 'task member', client=client)
+        self.assertEqual(sorted(upserter.lookup(SalesforceContact).keys()),
+                         sorted([unicode(user.id), unicode(other_user.id)]))
+
+    def test_addresses(self):
+        user = self.create_user()
+        other_user = self.create_user()
+        address, created = UserAddress.objects.get_or_create(user=user)
+        address.line1 = 'Dam 1'
+        address.city = 'Amsterdam'
+        address.postal_code = '1012JS'
+        address.save()
+        client = LocalSalesforceClient()
+
+        self.assertEqual(sync_users(False, None, logging.ERROR, batch_size=1, client=client), (2, 0))
+        self.assertEqual(client.records[('Contact', unicode(user.id))]['MailingCity'], 'Amsterdam')
+        self.assertNotIn('MailingCity', client.records[('Contact', unicode(other_user.id))])
+
+
+class CrashingSalesforceClient(LocalSalesforceClient):
+    """ Stand-in for Salesforce that stops working after a number of upserts. """
+    def __init__(self, upsert_limit):
+        super(CrashingSalesforceClient, self).__init__()
+        self.upsert_limit = upsert_limit
+
+    def upsert(self, model, external_id_column, payloads):
+        if len(self.upsert_calls) == self.upsert_limit:
+            raise RuntimeError('Salesforce went away')
+        return super(CrashingSalesforceClient, self).upsert(model, external_id_column, payloads)
+
+
+class IncrementalSyncTest(TestCase):
+    """
+    Test cases for the watermark based incremental sync.
+    """
+    def setUp(self):
+        self.organizations = [Organization.objects.create(name='Organization {0}'.format(i),
+                                                          slug='organization-{0}'.format(i)) for i in range(5)]
+
+    def sync(self, client):
+        return sync_organizations(False, None, logging.ERROR, batch_size=2, incremental=True, client=client)
+
+    def test_only_updated_records(self):
+        client = LocalSalesforceClient()
+        self.assertEqual(self.sync(client), (5, 0))
+
+        watermark = SyncWatermark.objects.get(object_type='organizations.organization')
+        self.assertEqual(watermark.last_id, self.organizations[-1].id)
+
+        # Nothing has changed.
+        self.assertEqual(self.sync(client), (0, 0))
+
+        organization = self.organizations[1]
+        organization.name = 'Renamed'
+        organization.save()
+        client.upsert_calls = []
+        self.assertEqual(self.sync(client), (1, 0))
+        self.assertEqual(client.upsert_calls, [[(organization.id, {'Name': 'Renamed'})]])
+
+    def test_resume_after_crash(self):
+        client = CrashingSalesforceClient(upsert_limit=1)
+        self.assertRaises(RuntimeError, self.sync, client)
+
+        # The first batch has been synced.
+        watermark = SyncWatermark.objects.get(object_type='organizations.organization')
+        self.assertEqual(watermark.last_id, self.organizations[1].id)
+
+        client.upsert_limit = None
+        self.assertEqual(self.sync(client), (3, 0))
+        self.assertEqual(len(client.records), 5)
+
+    def test_failed_record(self):
+        client = LocalSalesforceClient(failing_ids=[self.organizations[2].id])
+        self.assertEqual(self.sync(client), (4, 1))
+
+        # The watermark stops before the record that failed.
+        watermark = SyncWatermark.objects.get(object_type='organizations.organization')
+        self.assertEqual(watermark.last_id, self.organizations[1].id)
+
+        # The next sync tries the failed record again and skips the records that have been saved.
+        client.failing_ids = []
+        self.assertEqual(self.sync(client), (1, 0))
+        self.assertEqual(SyncWatermark.objects.get(pk=watermark.pk).last_id, self.organizations[-1].id)
+
+
+class RunPhasesTest(TestCase):
+    """
+    Test cases for running the sync phases in the order of their dependencies.
+    """
+    def setUp(self):
+        self.synced = []
+
+    def phase(self, name, error=None):
+        def sync():
+            if error:
+                raise error
+            self.synced.append(name)
+        return sync
+
+    def test_dependencies(self):
+        phases = (
+            ('users', self.phase('users'), ()),
+            ('projects', self.phase('projects'), ('users',)),
+            ('tasks', self.phase('tasks'), ('projects',)),
+            ('donations', self.phase('donations'), ('users', 'projects')),
+            ('organizations', self.phase('organizations'), ()),
+        )
+        timings = run_phases(phases, 3, lambda function: function())
+
+        self.assertEqual(sorted(timings.keys()), ['donations', 'organizations', 'projects', 'tasks', 'users'])
+        self.assertTrue(self.synced.index('users') < self.synced.index('projects'))
+        self.assertTrue(self.synced.index('projects') < self.synced.index('tasks'))
+        self.assertTrue(self.synced.index('projects') < self.synced.index('donations'))
+
+    def test_failed_dependency(self):
+        phases = (
+            ('users', self.phase('users', error=ValueError('Broken')), ()),
+            ('projects', self.phase('projects'), ('users',)),
+            ('organizations', self.phase('organizations'), ()),
+        )
+        timings = run_phases(phases, 1, lambda function: function())
+
+        self.assertEqual(self.synced, ['organizations'])
+        self.assertEqual(sorted(timings.keys()), ['organizations', 'users'])
+
+    def test_unknown_dependency(self):
+        phases = (('projects', self.phase('projects'), ('users',)),)
+        self.assertRaises(ValueError, run_phases, phases, 2, lambda function: function())
+
+
+class CsvExportTest(UserTestsMixin, TestCase):
+    """
+    Test cases for the CSV files for the Salesforce data loader.
+    """
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        for i in range(5):
+            Organization.objects.create(name='Organization {0}'.format(i), slug='organization-{0}'.format(i))
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_queryset_chunks(self):
+        chunks = list(queryset_chunks(Organization.objects.all(), chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual([organization.name for chunk in chunks for organization in chunk],
+                         ['Organization {0}'.format(i) for i in range(5)])
+
+    def test_gzip(self):
+        self.assertEqual(generate_organizations_csv_file(self.path, logging.ERROR), (5, 0))
+        self.assertEqual(generate_organizations_csv_file(self.path, logging.ERROR, compress=True), (5, 0))
+
+        filename, gzip_filename = sorted(os.listdir(self.path))
+        self.assertEqual(gzip_filename, filename + '.gz')
+        with open(os.path.join(self.path, filename), 'rb') as csv_file:
+            content = csv_file.read()
+        self.assertEqual(len(content.splitlines()), 6)
+        self.assertEqual(gzip.open(os.path.join(self.path, gzip_filename), 'rb').read(), content)
+
+    def test_user_addresses(self):
+        user = self.create_user()
+        other_user = self.create_user()
+        address, created = UserAddress.objects.get_or_create(user=user)
+        address.city = 'Amsterdam'
+        address.save()
+
+        self.assertEqual(generate_users_csv_file(self.path, logging.ERROR), (2, 0))
+        filename, = os.listdir(self.path)
+        with open(os.path.join(self.path, filename), 'rb') as csv_file:
+            cities = dict((row['Contact_External_Id__c'], row['MailingCity']) for row in csv.DictReader(csv_file))
+        self.assertEqual(cities, {str(user.id): 'Amsterdam', str(other_user.id): ''})
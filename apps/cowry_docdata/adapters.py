@@ -1,14 +1,21 @@
 # coding=utf-8
 import logging
+import os
+import tempfile
 import time
 import unicodedata
+from StringIO import StringIO
 from urllib2 import URLError
+import requests
 from apps.cowry.adapters import AbstractPaymentAdapter
 from apps.cowry.models import PaymentStatuses, PaymentLogLevels
 from django.conf import settings
+from django.utils import timezone
 from django.utils.http import urlencode
-from suds.client import Client
+from django.utils.importlib import import_module
+from suds.cache import ObjectCache
 from suds.plugin import MessagePlugin, DocumentPlugin
+from suds.transport import Transport, Reply, TransportError
 from .exceptions import DocDataPaymentException
 from .models import DocDataPaymentOrder, DocDataPayment, DocDataWebDirectDirectDebit, DocDataPaymentLogEntry
 
@@ -111,6 +118,59 @@ class DocDataBrokenWSDLPlugin(DocumentPlugin):
             location_attribute.setValue('https://secure.docdatapayments.com:443/ps/services/paymentservice/1_0')
 
 
+class KeepAliveTransport(Transport):
+    """
+    Suds transport that sends the requests with a requests Session so the connection to DocData is kept alive and
+    reused for the next requests of the adapter.
+    """
+
+    def __init__(self):
+        Transport.__init__(self)
+        self.session = requests.Session()
+
+    def open(self, request):
+        try:
+            response = self.session.get(request.url, headers=request.headers, timeout=self.options.timeout)
+        except requests.RequestException as e:
+            raise TransportError(str(e), None)
+        if response.status_code != 200:
+            raise TransportError(response.reason, response.status_code, StringIO(response.content))
+        return StringIO(response.content)
+
+    def send(self, request):
+        try:
+            response = self.session.post(request.url, data=request.message, headers=request.headers,
+                                         timeout=self.options.timeout)
+        except requests.RequestException as e:
+            raise TransportError(str(e), None)
+        if response.status_code != 200:
+            # Suds reads the SOAP fault from the content of 500 responses.
+            raise TransportError(response.reason, response.status_code, StringIO(response.content))
+        return Reply(response.status_code, response.headers, response.content)
+
+
+def create_soap_client(url, **kwargs):
+    """
+    Creates the SOAP client with the class in the COWRY_DOCDATA_SOAP_CLIENT setting. This is the Suds client by
+    default but it can be replaced by a local stand-in with the same interface.
+    """
+    path = getattr(settings, 'COWRY_DOCDATA_SOAP_CLIENT', 'suds.client.Client')
+    module, attr = path.rsplit('.', 1)
+    client_class = getattr(import_module(module), attr)
+    return client_class(url, **kwargs)
+
+
+def get_wsdl_cache(name):
+    """
+    The parsed WSDL documents are cached on disk per DocData endpoint so the WSDL doesn't have to be downloaded again
+    when the workers are restarted.
+    """
+    directory = getattr(settings, 'COWRY_DOCDATA_WSDL_CACHE_DIR', None) or \
+        os.path.join(tempfile.gettempdir(), 'docdata-wsdl')
+    return ObjectCache(location=os.path.join(directory, name),
+                       days=getattr(settings, 'COWRY_DOCDATA_WSDL_CACHE_DAYS', 30))
+
+
 class DocDataPaymentAdapter(AbstractPaymentAdapter):
     # Mapping of DocData statuses to Cowry statuses. Statuses are from:
     #
@@ -150,36 +210,46 @@ class DocDataPaymentAdapter(AbstractPaymentAdapter):
         error_message = 'Could not create Suds client to connect to DocData.'
         if self.test:
             # Test API.
-            test_url = 'https://test.docdatapayments.com/ps/services/paymentservice/1_0?wsdl'
-            logger.info('Using the test DocData API: {0}'.format(test_url))
-            try:
-                self.client = Client(test_url, plugins=[DocDataAPIVersionPlugin()])
-            except URLError as e:
-                self.client = None
-                logger.error('{0} {1}'.format(error_message, str(e)))
-            else:
-                # Setup the merchant soap object with the test password for use in all requests.
-                self.merchant = self.client.factory.create('ns0:merchant')
-                self.merchant._name = getattr(settings, "COWRY_DOCDATA_MERCHANT_NAME", None)
-                self.merchant._password = getattr(settings, "COWRY_DOCDATA_TEST_MERCHANT_PASSWORD", None)
+            url = 'https://test.docdatapayments.com/ps/services/paymentservice/1_0?wsdl'
+            logger.info('Using the test DocData API: {0}'.format(url))
+            plugins = [DocDataAPIVersionPlugin()]
+            password = getattr(settings, "COWRY_DOCDATA_TEST_MERCHANT_PASSWORD", None)
         else:
             # Live API.
-            live_url = 'https://secure.docdatapayments.com/ps/services/paymentservice/1_0?wsdl'
-            logger.info('Using the live DocData API: {0}'.format(live_url))
-            try:
-                self.client = Client(live_url, plugins=[DocDataAPIVersionPlugin(), DocDataBrokenWSDLPlugin()])
-            except URLError as e:
-                self.client = None
-                logger.error('{0} {1}'.format(error_message, str(e)))
-            else:
-                # Setup the merchant soap object for use in all requests.
-                self.merchant = self.client.factory.create('ns0:merchant')
-                self.merchant._name = getattr(settings, "COWRY_DOCDATA_MERCHANT_NAME", None)
-                self.merchant._password = getattr(settings, "COWRY_DOCDATA_LIVE_MERCHANT_PASSWORD", None)
+            url = 'https://secure.docdatapayments.com/ps/services/paymentservice/1_0?wsdl'
+            logger.info('Using the live DocData API: {0}'.format(url))
+            plugins = [DocDataAPIVersionPlugin(), DocDataBrokenWSDLPlugin()]
+            password = getattr(settings, "COWRY_DOCDATA_LIVE_MERCHANT_PASSWORD", None)
+
+        try:
+            cache = get_wsdl_cache('test' if self.test else 'live')
+            self._client = create_soap_client(url, plugins=plugins, cache=cache, transport=KeepAliveTransport())
+        except (URLError, TransportError) as e:
+            self._client = None
+            logger.error('{0} {1}'.format(error_message, str(e)))
+        else:
+            # Setup the merchant soap object for use in all requests.
+            self._merchant = self._client.factory.create('ns0:merchant')
+            self._merchant._name = getattr(settings, "COWRY_DOCDATA_MERCHANT_NAME", None)
+            self._merchant._password = password
 
     def __init__(self):
         super(DocDataPaymentAdapter, self).__init__()
-        self._init_docdata()
+        # The Suds client is created when it's first used so creating the adapter doesn't depend on DocData.
+        self._client = None
+        self._merchant = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._init_docdata()
+        return self._client
+
+    @property
+    def merchant(self):
+        if self.client is None:
+            return None
+        return self._merchant
 
     def get_payment_methods(self):
         # Override the payment_methods if they're set. This isn't in __init__ because
@@ -239,10 +309,8 @@ class DocDataPaymentAdapter(AbstractPaymentAdapter):
 
         # We can't do anything if DocData isn't available.
         if not self.client:
-            self._init_docdata()
-            if not self.client:
-                logger.error("Suds client is not configured. Can't create a remote DocData payment order.")
-                return
+            logger.error("Suds client is not configured. Can't create a remote DocData payment order.")
+            return
 
         # Preferences for the DocData system.
         paymentPreferences = self.client.factory.create('ns0:paymentPreferences')
@@ -403,6 +471,10 @@ class DocDataPaymentAdapter(AbstractPaymentAdapter):
         if not payment or not payment.payment_order_id:
             return
 
+        if not self.client:
+            logger.error("Suds client is not configured. Can't update the status of a DocData payment order.")
+            return
+
         # Execute status request.
         reply = self.client.service.status(self.merchant, payment.payment_order_id)
         if hasattr(reply, 'statusSuccess'):
@@ -419,6 +491,10 @@ class DocDataPaymentAdapter(AbstractPaymentAdapter):
             docdata_payment_logger(payment, PaymentLogLevels.error, error_message)
             return
 
+        # The API serves the last known status with the time it was received.
+        payment.status_checked = timezone.now()
+        DocDataPaymentOrder.objects.filter(id=payment.id).update(status_checked=payment.status_checked)
+
         if not hasattr(report, 'payment'):
             docdata_payment_logger(payment, PaymentLogLevels.info, "DocData status report has no payment reports.")
             return
@@ -0,0 +1,176 @@
+import Queue
+import datetime
+import logging
+import threading
+import time
+import traceback
+from optparse import make_option
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from apps.cowry.models import PaymentStatuses
+from ...adapters import DocDataPaymentAdapter
+from ...models import DocDataPaymentOrder, DocDataPaymentStatusCheck
+
+logger = logging.getLogger(__name__)
+
+
+#
+# Run with:
+# ./manage.py reconcile_docdata_payments -v 2 [--workers N] [--loop] --settings=bluebottle.settings.local
+#
+# With '--loop' the command keeps running and checks the queue every '--interval' seconds. The status changed
+# notifications from DocData are processed from the same queue.
+#
+
+# The seconds until the next status check of a payment by the number of checks that have been done. The last delay is
+# used for all following checks.
+STATUS_CHECK_BACKOFF = (60, 2 * 60, 5 * 60, 15 * 60, 60 * 60, 6 * 60 * 60, 24 * 60 * 60)
+
+RECONCILE_STATUSES = (PaymentStatuses.in_progress, PaymentStatuses.pending)
+
+# The payments that have been created longer ago than this are no longer checked, unless DocData sends a status
+# changed notification for them.
+RECONCILE_MAX_AGE_DAYS = 30
+
+# The seconds after which a status check that has been claimed by a worker that didn't finish can be claimed again.
+STATUS_CHECK_CLAIM_TIMEOUT = 10 * 60
+
+
+class Command(BaseCommand):
+    help = 'Check the status of the DocData payments that are in progress or pending.'
+    requires_model_validation = True
+
+    verbosity_loglevel = {
+        '0': logging.ERROR,    # 0 means no output.
+        '1': logging.WARNING,  # 1 means normal output (default).
+        '2': logging.INFO,     # 2 means verbose output.
+        '3': logging.DEBUG     # 3 means very verbose output.
+    }
+
+    option_list = BaseCommand.option_list + (
+        make_option('--workers', action='store', dest='workers', type='int', default=4, metavar='N',
+                    help="Number of payment statuses to check concurrently (default: 4)."),
+
+        make_option('--loop', action='store_true', dest='loop', default=False,
+                    help="Keep checking the queue instead of checking it once."),
+
+        make_option('--max-age', action='store', dest='max_age', type='int', default=RECONCILE_MAX_AGE_DAYS,
+                    metavar='DAYS', help="Only check the payments created in the last DAYS days (default: {0}).".format(
+                        RECONCILE_MAX_AGE_DAYS)),
+
+        make_option('--interval', action='store', dest='interval', type='int', default=30, metavar='SECONDS',
+                    help="Seconds between the checks of the queue with '--loop' (default: 30)."),
+    )
+
+    def handle(self, *args, **options):
+        # Setup the log level for root logger.
+        loglevel = self.verbosity_loglevel.get(options['verbosity'])
+        logger.setLevel(loglevel)
+
+        while True:
+            checked_count = reconcile_payments(workers=options['workers'], max_age=options['max_age'])
+            logger.info("Checked the status of {0} payments.".format(checked_count))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
+
+
+def enqueue_payments(max_age=RECONCILE_MAX_AGE_DAYS):
+    """
+    Adds the recent payments that are in progress or pending to the queue and removes the payments that aren't, unless
+    they have a status changed notification that hasn't been processed yet. Abandoned payments drop out of the queue
+    when they are max_age days old.
+    """
+    cutoff = timezone.now() - datetime.timedelta(days=max_age)
+    DocDataPaymentStatusCheck.objects.filter(
+        ~Q(docdata_payment_order__status__in=RECONCILE_STATUSES) | Q(docdata_payment_order__created__lt=cutoff),
+        notified__isnull=True).delete()
+
+    payment_ids = DocDataPaymentOrder.objects.filter(status__in=RECONCILE_STATUSES, status_check__isnull=True,
+                                                     created__gte=cutoff).exclude(
+        payment_order_id='').values_list('id', flat=True)
+    now = timezone.now()
+    DocDataPaymentStatusCheck.objects.bulk_create([DocDataPaymentStatusCheck(docdata_payment_order_id=payment_id,
+                                                                             next_check=now)
+                                                   for payment_id in payment_ids])
+
+
+def get_next_check(checks):
+    delay = STATUS_CHECK_BACKOFF[min(checks, len(STATUS_CHECK_BACKOFF)) - 1]
+    return timezone.now() + datetime.timedelta(seconds=delay)
+
+
+def check_payment_status(status_check_id, adapter):
+    """
+    Updates the status of the payment of the queued status check. The status check is claimed with one UPDATE first so
+    a payment is never updated by two workers at the same time. The row isn't locked while DocData is called, so the
+    notifications that arrive in the meantime are queued without waiting and are processed by the next check. Returns
+    False if the check isn't due anymore or has been claimed by another worker.
+    """
+    now = timezone.now()
+    claimable = Q(claimed__isnull=True) | Q(claimed__lt=now - datetime.timedelta(seconds=STATUS_CHECK_CLAIM_TIMEOUT))
+    if not DocDataPaymentStatusCheck.objects.filter(claimable, id=status_check_id, next_check__lte=now).update(
+            claimed=now):
+        return False
+
+    status_check = DocDataPaymentStatusCheck.objects.select_related('docdata_payment_order').get(id=status_check_id)
+    payment = status_check.docdata_payment_order
+    try:
+        with transaction.commit_on_success():
+            adapter.update_payment_status(payment, status_changed_notification=status_check.notified is not None)
+    except Exception:
+        logger.error("Error while checking the status of payment {0}:\n{1}".format(payment.id, traceback.format_exc()))
+
+    # Release the claim. A notification that arrived during the check keeps the status check due.
+    checks = status_check.checks + 1
+    if status_check.notified is None:
+        unchanged = DocDataPaymentStatusCheck.objects.filter(id=status_check.id, notified__isnull=True)
+    else:
+        unchanged = DocDataPaymentStatusCheck.objects.filter(id=status_check.id, notified=status_check.notified)
+    if not unchanged.update(checks=checks, next_check=get_next_check(checks), notified=None, claimed=None):
+        DocDataPaymentStatusCheck.objects.filter(id=status_check.id).update(claimed=None)
+    return True
+
+
+def reconcile_payments(workers=4, max_age=RECONCILE_MAX_AGE_DAYS):
+    """
+    Checks the status of the queued payments that are due with a pool of worker threads. Returns the number of payments
+    that have been checked.
+    """
+    enqueue_payments(max_age)
+
+    status_checks = Queue.Queue()
+    for status_check_id in DocDataPaymentStatusCheck.objects.filter(next_check__lte=timezone.now()).values_list(
+            'id', flat=True):
+        status_checks.put(status_check_id)
+
+    checked = []
+
+    def work():
+        # The Suds client of the adapter can't be shared by threads.
+        adapter = DocDataPaymentAdapter()
+        try:
+            while True:
+                try:
+                    status_check_id = status_checks.get_nowait()
+                except Queue.Empty:
+                    return
+
+                if check_payment_status(status_check_id, adapter):
+                    checked.append(status_check_id)
+        finally:
+            # Every thread has its own database connection.
+            connection.close()
+
+    threads = []
+    for i in range(min(max(workers, 1), status_checks.qsize())):
+        thread = threading.Thread(target=work, name='docdata status check {0}'.format(i))
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+    return len(checked)
@@ -1,5 +1,6 @@
 from apps.cowry.models import Payment, PaymentLogEntry
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.utils import timezone
 from django.utils.translation import ugettext as _
 from django_extensions.db.fields import CreationDateTimeField, ModificationDateTimeField
 from django_countries import CountryField
@@ -50,6 +51,9 @@ class DocDataPaymentOrder(Payment):
     country = CountryField()
     language = models.CharField(max_length=2, default='en')
 
+    # The last time the status has been received from DocData.
+    status_checked = models.DateTimeField(_("status checked"), null=True, blank=True)
+
     @property
     def latest_docdata_payment(self):
         if self.docdata_payments.count() > 0:
@@ -95,6 +99,49 @@ class DocDataWebDirectDirectDebit(DocDataPayment):
     bic = SWIFTBICField()
 
 
+class DocDataPaymentStatusCheck(models.Model):
+    """
+    A payment in the queue of the reconcile_docdata_payments command. The status of the payment is checked with
+    DocData until it's no longer in progress or pending. The time between the checks grows with the number of checks.
+    Status changed notifications from DocData are queued here as well, so a payment is in the queue only once.
+    """
+    docdata_payment_order = models.OneToOneField(DocDataPaymentOrder, related_name='status_check')
+    next_check = models.DateTimeField(_("next check"), db_index=True)
+    checks = models.PositiveIntegerField(_("checks"), default=0)
+    # The time of the last status changed notification that hasn't been processed yet.
+    notified = models.DateTimeField(_("notified"), null=True, blank=True)
+    # The time a worker started checking the status. The row isn't locked while DocData is called.
+    claimed = models.DateTimeField(_("claimed"), null=True, blank=True)
+    created = CreationDateTimeField(_("created"))
+
+    class Meta:
+        ordering = ('next_check',)
+        verbose_name = _("DocData Payment Status Check")
+        verbose_name_plural = _("DocData Payment Status Checks")
+
+    @classmethod
+    @transaction.commit_on_success
+    def notify(cls, payment):
+        """
+        Queues a status changed notification for the payment. The status is checked as soon as possible. Repeated
+        notifications for a payment that hasn't been checked yet result in one status check. A notification that
+        arrives while the status is being checked is kept for the next check.
+        """
+        now = timezone.now()
+        if cls.objects.filter(docdata_payment_order=payment).update(next_check=now, checks=0, notified=now):
+            return
+
+        sid = transaction.savepoint()
+        try:
+            cls.objects.create(docdata_payment_order=payment, next_check=now, notified=now)
+        except IntegrityError:
+            # Created by a concurrent notification.
+            transaction.savepoint_rollback(sid)
+            cls.objects.filter(docdata_payment_order=payment).update(next_check=now, checks=0, notified=now)
+        else:
+            transaction.savepoint_commit(sid)
+
+
 # TODO: Remove and use only PaymentLogEntry.
 class DocDataPaymentLogEntry(PaymentLogEntry):
     docdata_payment_order = models.ForeignKey(DocDataPaymentOrder, related_name='log_entries')
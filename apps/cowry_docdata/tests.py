@@ -1,13 +1,18 @@
 import requests
 from apps.cowry import factory, payments
+from apps.cowry.models import PaymentStatuses
 from apps.fund.models import Order
 from django.conf import settings
+from django.core.urlresolvers import reverse
 from django.test.testcases import TestCase
 from django.test.utils import override_settings
-from django.utils import unittest
+from django.utils import timezone, unittest
 from requests.exceptions import ConnectionError
 from rest_framework import status
-from .adapters import default_payment_methods
+from .adapters import default_payment_methods, DocDataPaymentAdapter
+from .management.commands.reconcile_docdata_payments import (enqueue_payments, get_next_check, check_payment_status,
+                                                             STATUS_CHECK_BACKOFF)
+from .models import DocDataPaymentOrder, DocDataPaymentStatusCheck
 
 
 try:
@@ -19,6 +24,123 @@ except (ConnectionError, AttributeError):
     run_docdata_tests = False
 
 
+class LocalSoapClient(object):
+    """ Stand-in for the Suds client that doesn't connect to DocData. """
+    instances = []
+
+    def __init__(self, url, **kwargs):
+        self.url = url
+        self.options = kwargs
+        self.factory = self
+        LocalSoapClient.instances.append(self)
+
+    def create(self, name):
+        return type(str(name), (object,), {})()
+
+
+@override_settings(COWRY_DOCDATA_SOAP_CLIENT='apps.cowry_docdata.tests.LocalSoapClient', COWRY_LIVE_PAYMENTS=False)
+class DocDataSoapClientTests(TestCase):
+
+    def setUp(self):
+        LocalSoapClient.instances = []
+
+    def test_lazy_client(self):
+        adapter = DocDataPaymentAdapter()
+        self.assertEqual(LocalSoapClient.instances, [])
+
+        client = adapter.client
+        self.assertTrue(isinstance(client, LocalSoapClient))
+        self.assertTrue(client.url.startswith('https://test.docdatapayments.com/'))
+        self.assertTrue(client.options['cache'] is not None)
+        self.assertEqual(adapter.merchant._name, getattr(settings, 'COWRY_DOCDATA_MERCHANT_NAME', None))
+
+        # The client is created once and reused.
+        self.assertTrue(adapter.client is client)
+        self.assertEqual(len(LocalSoapClient.instances), 1)
+
+
+class NotifyingPaymentAdapter(object):
+    """ Stand-in for the DocData adapter that receives a status changed notification while checking the status. """
+    def update_payment_status(self, payment, status_changed_notification=False):
+        DocDataPaymentStatusCheck.notify(payment)
+
+
+class ReconcileDocDataPaymentsTests(TestCase):
+
+    def test_enqueue_payments(self):
+        order = Order.objects.create()
+        payment = DocDataPaymentOrder.objects.create(order=order, payment_order_id='12345',
+                                                     status=PaymentStatuses.in_progress)
+        DocDataPaymentOrder.objects.create(order=order, status=PaymentStatuses.in_progress)
+
+        enqueue_payments()
+        enqueue_payments()
+        self.assertEqual(list(DocDataPaymentStatusCheck.objects.values_list('docdata_payment_order_id', flat=True)),
+                         [payment.id])
+
+        # Paid payments are removed from the queue.
+        DocDataPaymentOrder.objects.filter(id=payment.id).update(status=PaymentStatuses.paid)
+        enqueue_payments()
+        self.assertEqual(DocDataPaymentStatusCheck.objects.count(), 0)
+
+    def test_status_changed_notification(self):
+        order = Order.objects.create()
+        payment = DocDataPaymentOrder.objects.create(order=order, payment_order_id='12345',
+                                                     merchant_order_reference='{0}-0'.format(order.id),
+                                                     status=PaymentStatuses.paid)
+
+        # Repeated notifications are queued once.
+        for i in range(2):
+            response = self.client.get(reverse('cowry-docdata-status-changed'),
+                                       {'order': payment.merchant_order_reference})
+            self.assertEqual(response.status_code, 200)
+        status_check = DocDataPaymentStatusCheck.objects.get()
+        self.assertEqual(status_check.docdata_payment_order_id, payment.id)
+        self.assertTrue(status_check.notified is not None)
+
+        # The notification is kept in the queue until it has been processed.
+        enqueue_payments()
+        self.assertEqual(DocDataPaymentStatusCheck.objects.count(), 1)
+
+    def test_notification_during_check(self):
+        order = Order.objects.create()
+        payment = DocDataPaymentOrder.objects.create(order=order, payment_order_id='12345',
+                                                     status=PaymentStatuses.in_progress)
+        enqueue_payments()
+        status_check = DocDataPaymentStatusCheck.objects.get()
+
+        self.assertTrue(check_payment_status(status_check.id, NotifyingPaymentAdapter()))
+
+        # The claim has been released and the notification is checked next.
+        status_check = DocDataPaymentStatusCheck.objects.get()
+        self.assertEqual(status_check.claimed, None)
+        self.assertTrue(status_check.notified is not None)
+        self.assertTrue(status_check.next_check <= timezone.now())
+
+        # A status check that has been claimed by another worker is skipped.
+        DocDataPaymentStatusCheck.objects.update(claimed=timezone.now())
+        self.assertFalse(check_payment_status(status_check.id, NotifyingPaymentAdapter()))
+        self.assertEqual(payment.status_check.id, status_check.id)
+
+    def test_old_payments(self):
+        order = Order.objects.create()
+        payment = DocDataPaymentOrder.objects.create(order=order, payment_order_id='12345',
+                                                     status=PaymentStatuses.in_progress)
+        enqueue_payments()
+        self.assertEqual(DocDataPaymentStatusCheck.objects.count(), 1)
+
+        # Abandoned payments are no longer checked.
+        DocDataPaymentOrder.objects.filter(id=payment.id).update(created=timezone.now() - timezone.timedelta(days=31))
+        enqueue_payments()
+        self.assertEqual(DocDataPaymentStatusCheck.objects.count(), 0)
+        enqueue_payments(max_age=60)
+        self.assertEqual(DocDataPaymentStatusCheck.objects.count(), 1)
+
+    def test_backoff(self):
+        self.assertTrue(get_next_check(1) < timezone.now() + timezone.timedelta(seconds=STATUS_CHECK_BACKOFF[1]))
+        self.assertTrue(get_next_check(100) > timezone.now() + timezone.timedelta(seconds=STATUS_CHECK_BACKOFF[-2]))
+
+
 @override_settings(COWRY_PAYMENT_METHODS=default_payment_methods)
 class DocDataPaymentTests(TestCase):
 
@@ -1,10 +1,9 @@
 import re
-from apps.cowry import payments
 from apps.cowry.models import PaymentLogLevels
 from rest_framework import generics
 from rest_framework import response
 from rest_framework import status
-from .models import DocDataPaymentOrder, DocDataPaymentLogEntry
+from .models import DocDataPaymentOrder, DocDataPaymentLogEntry, DocDataPaymentStatusCheck
 
 import logging
 logger = logging.getLogger(__name__)
@@ -23,11 +22,12 @@ class StatusChangedNotificationView(generics.GenericAPIView):
                     logger.error('Could not find order {0} to update payment status.'.format(order))
                     return response.Response(status=status.HTTP_403_FORBIDDEN)
 
-                # Update the status for the payment.
+                # Queue the status update for the payment. The status is updated by the reconcile_docdata_payments
+                # command.
                 status_log = DocDataPaymentLogEntry(docdata_payment_order=payment, level=PaymentLogLevels.info)
                 status_log.message = 'Received status changed notification for merchant_order_reference {0}.'.format(order)
                 status_log.save()
-                payments.update_payment_status(payment, status_changed_notification=True)
+                DocDataPaymentStatusCheck.notify(payment)
 
                 # Return 200 as required by DocData when the status changed notification was consumed.
                 return response.Response(status=status.HTTP_200_OK)
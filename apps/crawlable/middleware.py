@@ -2,19 +2,25 @@ import logging
 import re
 import time
 import os
+import threading
 import urllib
 import urlparse
 import tempfile
+import Queue
 
 from django.http import HttpResponse, HttpResponseServerError
 from django.conf import settings
 from django.utils import html as html_utils
+from django.utils import translation
 
 from selenium.webdriver import DesiredCapabilities
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.common.utils import is_connectable
 from selenium.webdriver.phantomjs.webdriver import WebDriver
 from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
 
+from .snapshots import snapshot_store, normalize_url
+
 
 logger = logging.getLogger(__name__)
 
@@ -109,8 +115,158 @@ class WebCache(object):
         return self._web_driver
 
 
-# Create a single instance per process.
-web_cache = WebCache()
+# The Ember app sets this flag and marker when there are no pending AJAX requests anymore (see app.js).
+READY_SCRIPT = "return window.crawlableReady === true || document.querySelector('[data-crawlable-ready]') !== null;"
+RESET_READY_SCRIPT = "window.crawlableReady = false; " \
+                     "if (document.body) { document.body.removeAttribute('data-crawlable-ready'); }"
+
+
+def wait_until_ready(driver, max_wait=None, poll_interval=None):
+    """
+    Poll the page until the app marks it as ready, for at most CRAWLABLE_RENDER_MAX_WAIT seconds. Returns False if the
+    page wasn't ready in time.
+    """
+    if max_wait is None:
+        max_wait = getattr(settings, 'CRAWLABLE_RENDER_MAX_WAIT', 10)
+    if poll_interval is None:
+        poll_interval = getattr(settings, 'CRAWLABLE_RENDER_POLL_INTERVAL', 0.1)
+
+    deadline = time.time() + max_wait
+    while True:
+        try:
+            if driver.execute_script(READY_SCRIPT):
+                return True
+        except WebDriverException:
+            # The page is still loading.
+            pass
+        if time.time() >= deadline:
+            return False
+        time.sleep(poll_interval)
+
+
+class RenderStatistics(object):
+    """ Render times per URL of this process, to find the pages that are slow or never become ready. """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.urls = {}
+
+    def add(self, url, duration, ready):
+        with self.lock:
+            stats = self.urls.setdefault(normalize_url(url), {
+                'count': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0, 'timeouts': 0
+            })
+            stats['count'] += 1
+            stats['total'] += duration
+            stats['max'] = max(stats['max'], duration)
+            stats['last'] = duration
+            if not ready:
+                stats['timeouts'] += 1
+
+    def get(self, url):
+        """ Returns the number of renders, average, maximum and last render time and the number of timeouts. """
+        with self.lock:
+            stats = self.urls.get(normalize_url(url))
+            if not stats:
+                return None
+            return dict(stats, average=stats['total'] / stats['count'])
+
+
+render_statistics = RenderStatistics()
+
+
+def render(driver, absolute_url):
+    """ Render the page at the URL with the web driver and return the page source without scripts. """
+    start = time.time()
+    try:
+        # The driver doesn't reload the page when only the hashbang changes, so reset the flag of the previous page.
+        driver.execute_script(RESET_READY_SCRIPT)
+    except WebDriverException:
+        pass
+    driver.get(absolute_url)
+    ready = wait_until_ready(driver)
+
+    duration = time.time() - start
+    render_statistics.add(absolute_url, duration, ready)
+    if ready:
+        logger.info('Rendered "%s" in %.2f seconds.', absolute_url, duration)
+    else:
+        logger.warning('"%s" was not ready after %.2f seconds, using the page as it is.', absolute_url, duration)
+
+    content = driver.page_source
+    # Remove all javascript, since its mostly useless now.
+    script_tags_template = re.compile(r'<script([^/]*/>|(\s+[^>]*><\/script>))', re.U)
+    return script_tags_template.sub('', content)
+
+
+class RendererPool(object):
+    """
+    A bounded pool of threads that render pages into the snapshot store, each with its own web driver. A page that's
+    already queued isn't queued again. The threads are started when the first page is rendered.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queue = None
+        self.pending = {}
+        self.web_caches = []
+
+    def _start(self):
+        self.queue = Queue.Queue(maxsize=getattr(settings, 'CRAWLABLE_RENDER_QUEUE_SIZE', 100))
+        for i in range(getattr(settings, 'CRAWLABLE_RENDER_WORKERS', 2)):
+            web_cache = WebCache()
+            self.web_caches.append(web_cache)
+            thread = threading.Thread(target=self._work, args=(web_cache,), name='crawlable-renderer-%d' % i)
+            thread.daemon = True
+            thread.start()
+
+    def render(self, absolute_url, original_url, language):
+        """
+        Queue the page to be rendered into the snapshot store. Returns a ``threading.Event`` that's set when the page is
+        rendered (or failed), or None if the queue is full.
+        """
+        key = (normalize_url(absolute_url), language)
+        with self.lock:
+            if self.queue is None:
+                self._start()
+
+            event = self.pending.get(key)
+            if event is None:
+                event = threading.Event()
+                try:
+                    self.queue.put_nowait((key, absolute_url, original_url, language, event))
+                except Queue.Full:
+                    logger.warning('Not rendering "%s" for "%s", the render queue is full.', absolute_url, original_url)
+                    return None
+                self.pending[key] = event
+        return event
+
+    def _work(self, web_cache):
+        while True:
+            key, absolute_url, original_url, language, event = self.queue.get()
+            try:
+                driver = web_cache.get_driver()
+                logger.debug('Generating flat content from "%s" for "%s"%s.', absolute_url, original_url,
+                             ' (forced HTTPS)' if settings.CRAWLABLE_FORCE_HTTPS else '')
+                content = render(driver, absolute_url)
+                snapshot_store.set(absolute_url, language, content)
+            except Exception, e:
+                logger.error('There was an error rendering "%s" for "%s" with the web driver: %s', absolute_url,
+                             original_url, e)
+            finally:
+                with self.lock:
+                    self.pending.pop(key, None)
+                event.set()
+
+    def stop(self):
+        """ Stop the web drivers of the pool (they are restarted when needed). """
+        for web_cache in self.web_caches:
+            if web_cache._web_driver:
+                web_cache._web_driver.service.stop()
+
+
+# Create a single pool per process.
+renderer_pool = RendererPool()
 
 
 class HashbangMiddleware(object):
@@ -120,6 +276,9 @@ class HashbangMiddleware(object):
     These special cases are most likely requested by search engines that detected hashbangs (#!) in the URL. If such a
     request is made, the dynamic content is generated in the background, and the generated page source is served to the
     search engine.
+
+    Generated pages are kept in the snapshot store for CRAWLABLE_SNAPSHOT_TTL seconds. With CRAWLABLE_SERVE_STALE, a
+    stale snapshot is served right away while the page is generated again by the renderer pool.
     """
 
     def process_request(self, request):
@@ -148,24 +307,26 @@ class HashbangMiddleware(object):
                 parsed_url.fragment
             ])
 
-            try:
-                driver = web_cache.get_driver()
-                logger.debug('Generating flat content from "%s" for "%s"%s.', absolute_url, original_url,
-                             ' (forced HTTPS)' if settings.CRAWLABLE_FORCE_HTTPS else '')
-                driver.get(absolute_url)
-
-                # TODO: This should be replaced with something smart that waits for a certain trigger that all JS
-                # is done.
-                time.sleep(3)
-
-                content = driver.page_source
-                # Remove all javascript, since its mostly useless now.
-                script_tags_template = re.compile(r'<script([^/]*/>|(\s+[^>]*><\/script>))', re.U)
-                content = script_tags_template.sub('', content)
-            except Exception, e:
-                logger.error('There was an error rendering "%s" for "%s" with the web driver: %s', absolute_url, original_url, e)
+            language = translation.get_language()
+            snapshot = snapshot_store.get(absolute_url, language)
+            if snapshot and not snapshot.is_stale:
+                return HttpResponse(content=snapshot.content)
+
+            event = renderer_pool.render(absolute_url, original_url, language)
+            if snapshot and getattr(settings, 'CRAWLABLE_SERVE_STALE', True):
+                # Serve the stale snapshot while the page is rendered again in the background.
+                return HttpResponse(content=snapshot.content)
+
+            if event and event.wait(getattr(settings, 'CRAWLABLE_RENDER_TIMEOUT', 30)):
+                snapshot = snapshot_store.get(absolute_url, language) or snapshot
+            elif not snapshot:
+                # The page will be in the store when the search engine retries.
+                response = HttpResponse(status=503)
+                response['Retry-After'] = '60'
+                return response
+
+            if snapshot is None:
                 return HttpResponseServerError()
-
-            return HttpResponse(content=content)
+            return HttpResponse(content=snapshot.content)
 
         return None
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""
+Filesystem store for the rendered pages that are served to search engines.
+
+A snapshot is stored in a file per normalized URL and language. Snapshots older than CRAWLABLE_SNAPSHOT_TTL seconds are
+stale, and when the snapshots take more than CRAWLABLE_SNAPSHOT_MAX_SIZE bytes the least recently written ones are
+removed.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import time
+import urllib
+import urlparse
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_url(url):
+    """ Lowercase the scheme and host and sort the query parameters so equivalent URLs share their snapshot. """
+    parsed_url = urlparse.urlparse(url)
+    query = urllib.urlencode(sorted(urlparse.parse_qsl(parsed_url.query, keep_blank_values=True)))
+    return urlparse.urlunparse([parsed_url.scheme.lower(), parsed_url.netloc.lower(), parsed_url.path or '/',
+                                parsed_url.params, query, parsed_url.fragment])
+
+
+class Snapshot(object):
+
+    def __init__(self, content, created):
+        self.content = content
+        self.created = created
+
+    @property
+    def age(self):
+        return time.time() - self.created
+
+    @property
+    def is_stale(self):
+        return self.age > getattr(settings, 'CRAWLABLE_SNAPSHOT_TTL', 6 * 60 * 60)
+
+
+class SnapshotStore(object):
+    """ The settings are read on every call so they can be overridden in tests. """
+
+    @property
+    def directory(self):
+        return getattr(settings, 'CRAWLABLE_SNAPSHOT_DIR', None) or \
+            os.path.join(tempfile.gettempdir(), 'crawlable-snapshots')
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'CRAWLABLE_SNAPSHOT_MAX_SIZE', 200 * 1024 * 1024)
+
+    def get_path(self, url, language):
+        key = hashlib.sha1(u'{0}|{1}'.format(normalize_url(url), language or '').encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key[:2], key + '.html')
+
+    def get(self, url, language):
+        """ Returns the Snapshot of the URL or None. """
+        path = self.get_path(url, language)
+        try:
+            with open(path, 'rb') as snapshot_file:
+                created = os.fstat(snapshot_file.fileno()).st_mtime
+                content = snapshot_file.read().decode('utf-8')
+        except (IOError, OSError):
+            return None
+        return Snapshot(content, created)
+
+    def set(self, url, language, content):
+        path = self.get_path(url, language)
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Created by another process in the meantime.
+                pass
+
+        # Write to a temporary file first so a snapshot is never served half written.
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as snapshot_file:
+            snapshot_file.write(content.encode('utf-8'))
+        os.rename(temp_path, path)
+
+        self.prune()
+
+    def prune(self):
+        """ Remove the least recently written snapshots while the snapshots take more than the maximum size. """
+        snapshots = []
+        total_size = 0
+        for directory, dirnames, filenames in os.walk(self.directory):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                snapshots.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+        if total_size <= self.max_size:
+            return
+
+        snapshots.sort()
+        for mtime, size, path in snapshots:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+        logger.info('Pruned crawlable snapshots to %d bytes.', total_size)
+
+
+snapshot_store = SnapshotStore()
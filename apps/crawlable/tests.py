@@ -1,13 +1,22 @@
+import os
+import shutil
+import tempfile
+import time
+
 import mock
 
 from django.http import HttpResponse
 from django.test import TestCase, RequestFactory, LiveServerTestCase
 from django.test.utils import override_settings
+from django.conf import settings
+from django.utils.unittest.case import skipUnless
+from django.utils import translation
 from django.utils.text import slugify
 
 from apps.projects.models import ProjectPlan, ProjectPhases
 from apps.projects.tests import ProjectTestsMixin
-from .middleware import HASHBANG, ESCAPED_FRAGMENT, HashbangMiddleware
+from .middleware import HASHBANG, ESCAPED_FRAGMENT, HashbangMiddleware, wait_until_ready, render, render_statistics
+from .snapshots import snapshot_store, normalize_url
 
 
 def escape_url(url):
@@ -21,6 +30,14 @@ class HashbangMiddlewareTests(TestCase):
 
         self.test_url = '/en/#!/projects'
 
+        self.snapshot_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(CRAWLABLE_SNAPSHOT_DIR=self.snapshot_dir)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.snapshot_dir)
+
     def test_middleware_with_hashbang(self):
         request = self.rf.get(self.test_url)
         result = self.middleware.process_request(request)
@@ -39,6 +56,103 @@ class HashbangMiddlewareTests(TestCase):
 
         self.assertEqual(mock_get_driver.call_count, 1)
 
+        # The second request is served from the snapshot store.
+        result = self.middleware.process_request(self.rf.get(escape_url(self.test_url)))
+        self.assertContains(result, self.test_url)
+        self.assertEqual(mock_get_driver.call_count, 1)
+
+    @mock.patch('apps.crawlable.middleware.renderer_pool')
+    def test_middleware_serves_stale_snapshot(self, mock_renderer_pool):
+        absolute_url = 'https://testserver/en/#!/projects'
+        language = translation.get_language()
+        snapshot_store.set(absolute_url, language, u'<html>stale</html>')
+        created = time.time() - 7 * 24 * 60 * 60
+        os.utime(snapshot_store.get_path(absolute_url, language), (created, created))
+
+        with override_settings(CRAWLABLE_SERVE_STALE=True, CRAWLABLE_FORCE_HTTPS=True):
+            result = self.middleware.process_request(self.rf.get(escape_url(self.test_url)))
+
+        self.assertContains(result, 'stale')
+        self.assertEqual(mock_renderer_pool.render.call_count, 1)
+
+    def test_snapshot_store_size_cap(self):
+        with override_settings(CRAWLABLE_SNAPSHOT_MAX_SIZE=2500):
+            for i in range(3):
+                url = 'https://testserver/en/#!/projects/%d' % i
+                snapshot_store.set(url, 'en', u'x' * 1000)
+                created = time.time() - 60 + i
+                os.utime(snapshot_store.get_path(url, 'en'), (created, created))
+            snapshot_store.set('https://testserver/en/#!/projects/3', 'en', u'x' * 1000)
+
+            # The least recently written snapshots are removed.
+            self.assertIsNone(snapshot_store.get('https://testserver/en/#!/projects/0', 'en'))
+            self.assertIsNone(snapshot_store.get('https://testserver/en/#!/projects/1', 'en'))
+            self.assertIsNotNone(snapshot_store.get('https://testserver/en/#!/projects/2', 'en'))
+            self.assertIsNotNone(snapshot_store.get('https://testserver/en/#!/projects/3', 'en'))
+
+    def test_normalize_url(self):
+        self.assertEqual(normalize_url('HTTPS://TestServer/en/?b=2&a=1'), normalize_url('https://testserver/en/?a=1&b=2'))
+
+
+# A local page that, like the app, marks itself as ready when its (simulated) AJAX requests are done.
+READY_TEST_PAGE = """<html><body><div id="content">Loading</div><script>
+setTimeout(function() {
+    document.getElementById('content').innerHTML = 'Loaded';
+    window.crawlableReady = true;
+}, 500);
+</script></body></html>"""
+
+
+class RenderReadinessTests(TestCase):
+
+    def test_wait_until_ready(self):
+        driver = mock.MagicMock()
+        driver.execute_script.side_effect = [False, False, True]
+
+        self.assertTrue(wait_until_ready(driver, max_wait=5, poll_interval=0))
+        self.assertEqual(driver.execute_script.call_count, 3)
+
+    def test_wait_until_ready_timeout(self):
+        driver = mock.MagicMock()
+        driver.execute_script.return_value = False
+
+        start = time.time()
+        self.assertFalse(wait_until_ready(driver, max_wait=0.3, poll_interval=0.05))
+        self.assertTrue(time.time() - start < 2)
+
+    def test_render_statistics(self):
+        driver = mock.MagicMock(page_source='<html>page<script type="text/javascript"></script></html>')
+        driver.execute_script.return_value = True
+        url = 'https://testserver/en/#!/statistics-test'
+
+        self.assertEqual(render(driver, url), '<html>page</html>')
+        render(driver, url)
+
+        stats = render_statistics.get(url)
+        self.assertEqual(stats['count'], 2)
+        self.assertEqual(stats['timeouts'], 0)
+        self.assertTrue(stats['max'] >= stats['average'])
+
+    @skipUnless(getattr(settings, 'SELENIUM_TESTS', False),
+                'Selenium tests disabled. Set SELENIUM_TESTS = True in your settings.py to enable.')
+    def test_render_local_page(self):
+        from selenium.webdriver.phantomjs.webdriver import WebDriver
+
+        page_dir = tempfile.mkdtemp()
+        page = os.path.join(page_dir, 'ready.html')
+        with open(page, 'w') as page_file:
+            page_file.write(READY_TEST_PAGE)
+
+        driver = WebDriver()
+        try:
+            content = render(driver, 'file://' + page)
+        finally:
+            driver.quit()
+            shutil.rmtree(page_dir)
+
+        self.assertTrue('Loaded' in content)
+        self.assertEqual(render_statistics.get('file://' + page)['timeouts'], 0)
+
 
 class CrawlableTests(ProjectTestsMixin, LiveServerTestCase):
     """
@@ -63,10 +177,9 @@ class CrawlableTests(ProjectTestsMixin, LiveServerTestCase):
         self.client = self.client_class(SERVER_NAME=self.server_thread.host, SERVER_PORT=self.server_thread.port)
 
     def tearDown(self):
-        from .middleware import web_cache
+        from .middleware import renderer_pool
 
-        if web_cache._web_driver:
-            web_cache._web_driver.service.stop()
+        renderer_pool.stop()
 
     def test_project_list_via_hashbang(self):
         response = self.client.get(self.project_url)
@@ -0,0 +1,241 @@
+"""
+Allocation plan for the monthly donations.
+
+The plan is made before any payment is started. The campaign projects and the recurring Orders are loaded once and the
+amount of every recurring payment is divided over the projects in the monthly shopping cart of the user, or over the
+'Top Three' projects when the user hasn't selected any projects. The money the projects still need is kept track of
+for the whole run: when a donation fills up a project the balance goes to the next popular project that still needs
+money, and later donors won't donate to the projects that have been filled.
+"""
+import logging
+
+from django.utils import timezone
+
+from apps.fund.models import Order, OrderStatuses, Donation
+from apps.projects.models import Project, ProjectPhases
+
+
+logger = logging.getLogger(__name__)
+
+
+# The DocData minimum for direct debit.
+MINIMUM_DIRECT_DEBIT_AMOUNT = 113
+
+
+class PlannedDonation(object):
+
+    def __init__(self, project, amount, donation=None):
+        self.project = project
+        self.amount = amount
+        # The existing Donation in the recurring Order or None for a new Donation.
+        self.donation = donation
+
+
+class PlannedOrder(object):
+
+    def __init__(self, recurring_payment):
+        self.recurring_payment = recurring_payment
+        # The recurring Order of the user, or None when a new Order has to be created for the 'Top Three' projects.
+        self.order = None
+        self.top_three = False
+        self.donations = []
+        # The donations to projects that are no longer in the campaign phase.
+        self.removed_donations = []
+        # The projects that have been selected by the user, for recreating the monthly shopping cart.
+        self.user_selected_projects = []
+        # The reason for not processing the recurring payment.
+        self.skipped = None
+        self.error = None
+
+    @property
+    def total(self):
+        return sum(planned_donation.amount for planned_donation in self.donations)
+
+    def __unicode__(self):
+        return u', '.join(u'{0}: {1}'.format(planned_donation.project.title, planned_donation.amount)
+                          for planned_donation in self.donations)
+
+
+class AllocationPlan(object):
+
+    def __init__(self, projects, recurring_orders, recent_order_numbers):
+        # The campaign projects ordered by popularity.
+        self.projects = projects
+        self.projects_by_id = dict((project.id, project) for project in projects)
+        self.money_needed = dict((project.id, max(project.projectcampaign.money_asked -
+                                                  project.projectcampaign.money_donated, 0)) for project in projects)
+        # The recurring Orders and the numbers of the recently closed recurring Orders by user id.
+        self.recurring_orders = recurring_orders
+        self.recent_order_numbers = recent_order_numbers
+        self.orders = []
+
+    @classmethod
+    def load(cls):
+        """ Loads the campaign projects and the recurring Orders with their donations. """
+        projects = list(Project.objects.filter(phase=ProjectPhases.campaign).select_related('projectcampaign')
+                        .order_by('-popularity'))
+
+        recurring_orders = {}
+        for order in Order.objects.filter(status=OrderStatuses.recurring).prefetch_related('donations'):
+            recurring_orders.setdefault(order.user_id, []).append(order)
+
+        # A payment is skipped if there has been a recurring Order recently.
+        ten_days_ago = timezone.now() + timezone.timedelta(days=-10)
+        recent_order_numbers = {}
+        for user_id, order_number in Order.objects.filter(status=OrderStatuses.closed, recurring=True,
+                                                          updated__gt=ten_days_ago).values_list('user_id',
+                                                                                                'order_number'):
+            recent_order_numbers.setdefault(user_id, []).append(order_number)
+
+        return cls(projects, recurring_orders, recent_order_numbers)
+
+    @property
+    def top_three(self):
+        """ The three most popular projects that still need money. """
+        return [project for project in self.projects if self.money_needed[project.id] > 0][:3]
+
+    def next_project(self, planned, project):
+        """ Returns the most popular project that still needs money and isn't the project or in the planned Order. """
+        planned_project_ids = set(planned_donation.project.id for planned_donation in planned.donations)
+        planned_project_ids.add(project.id)
+        for next_project in self.projects:
+            if self.money_needed[next_project.id] > 0 and next_project.id not in planned_project_ids:
+                return next_project
+        return None
+
+    def add(self, recurring_payment):
+        """ Plans the donations of the recurring payment and returns the PlannedOrder. """
+        planned = PlannedOrder(recurring_payment)
+        self.orders.append(planned)
+
+        user_id = recurring_payment.user_id
+        if user_id in self.recent_order_numbers:
+            planned.skipped = "Skipping '{0}' because it looks like it has been processed recently with one of " \
+                              "these Orders: {1}".format(recurring_payment,
+                                                         ', '.join(self.recent_order_numbers[user_id]))
+            return planned
+
+        orders = self.recurring_orders.get(user_id, [])
+        if len(orders) > 1:
+            planned.error = "Multiple Orders with status 'recurring' returned for '{0}'. Not processing this " \
+                            "recurring donation.".format(recurring_payment)
+            return planned
+
+        if recurring_payment.amount < MINIMUM_DIRECT_DEBIT_AMOUNT:
+            planned.error = "Payment amount for '{0}' is less than the DocData minimum for direct debit ({1}). " \
+                            "Skipping.".format(recurring_payment, MINIMUM_DIRECT_DEBIT_AMOUNT)
+            return planned
+
+        selected = []
+        if orders:
+            planned.order = orders[0]
+            for donation in planned.order.donations.all():
+                if donation.project_id in self.projects_by_id:
+                    selected.append(donation)
+                else:
+                    planned.removed_donations.append(donation)
+
+        if selected:
+            planned.user_selected_projects = [self.projects_by_id[donation.project_id] for donation in selected]
+            self.divide(planned, [(self.projects_by_id[donation.project_id], donation) for donation in selected])
+        else:
+            top_three = self.top_three
+            if not top_three:
+                planned.error = "There are no projects that need money for '{0}'.".format(recurring_payment)
+                return planned
+            planned.top_three = True
+            self.divide(planned, [(project, None) for project in top_three])
+        return planned
+
+    def divide(self, planned, projects):
+        """
+        Divides the amount of the recurring payment over the (project, existing Donation or None) pairs. The last
+        project gets the remaining amount. If that's more than the project needs, the project is filled up and the
+        balance goes to the next popular projects.
+        """
+        remaining_amount = planned.recurring_payment.amount
+        amount_per_project = remaining_amount // len(projects)
+        for project, donation in projects[:-1]:
+            amount = min(amount_per_project, self.money_needed[project.id])
+            self.plan_donation(planned, project, amount, donation)
+            remaining_amount -= amount
+
+        project, donation = projects[-1]
+        while True:
+            money_needed = self.money_needed[project.id]
+            next_project = None
+            if remaining_amount > money_needed:
+                next_project = self.next_project(planned, project)
+
+            if next_project is None:
+                # The remaining amount won't fill up the project or we have no more projects to try.
+                self.plan_donation(planned, project, remaining_amount, donation)
+                return
+
+            logger.debug(u"Donation is more than project '{0}' needs. Filling up project and donating the "
+                         u"balance to '{1}'.".format(project.title, next_project.title))
+            self.plan_donation(planned, project, money_needed, donation)
+            remaining_amount -= money_needed
+            project, donation = next_project, None
+
+    def plan_donation(self, planned, project, amount, donation):
+        planned.donations.append(PlannedDonation(project, amount, donation))
+        self.money_needed[project.id] = max(self.money_needed[project.id] - amount, 0)
+
+    def save(self):
+        """ Writes the planned donations of all recurring payments that can be processed. """
+        for planned in self.orders:
+            self.save_order(planned)
+
+    def save_order(self, planned):
+        """
+        Writes the planned donations of one recurring payment with bulk queries. A new recurring Order is created for
+        the 'Top Three' projects. Call this only when the recurring payment has been claimed for processing.
+        """
+        if planned.skipped or planned.error:
+            return
+
+        if planned.removed_donations:
+            Donation.objects.filter(id__in=[donation.id for donation in planned.removed_donations]).delete()
+
+        # Update the existing donations with one UPDATE per distinct amount.
+        user = planned.recurring_payment.user
+        if planned.order is None:
+            planned.order = Order.objects.create(status=OrderStatuses.recurring, user=user, recurring=True)
+        ids_by_amount = {}
+        new_donations = []
+        for planned_donation in planned.donations:
+            if planned_donation.donation:
+                ids_by_amount.setdefault(planned_donation.amount, []).append(planned_donation.donation.id)
+            else:
+                new_donations.append(Donation(user=user, project=planned_donation.project,
+                                              amount=planned_donation.amount, currency='EUR',
+                                              donation_type=Donation.DonationTypes.recurring, order=planned.order))
+
+        for amount, ids in ids_by_amount.items():
+            Donation.objects.filter(id__in=ids).update(amount=amount, donation_type=Donation.DonationTypes.recurring)
+        Donation.objects.bulk_create(new_donations)
+
+        # The donations that have been prefetched with the recurring Order are out of date now.
+        planned.order._prefetched_objects_cache = {}
+
+
+def create_recurring_order(user, projects, amount):
+    """
+    Creates a recurring Order (monthly shopping cart) with donations to the projects. The amount is divided over the
+    projects in a simple way.
+    """
+    order = Order.objects.create(status=OrderStatuses.recurring, user=user, recurring=True)
+
+    amount_per_project = amount // len(projects)
+    donations = []
+    for i, project in enumerate(projects):
+        if i == len(projects) - 1:
+            # The last donation gets the remaining amount.
+            donation_amount = amount - amount_per_project * (len(projects) - 1)
+        else:
+            donation_amount = amount_per_project
+        donations.append(Donation(user=user, project=project, amount=donation_amount, currency='EUR',
+                                  donation_type=Donation.DonationTypes.recurring, order=order))
+    Donation.objects.bulk_create(donations)
+    return order
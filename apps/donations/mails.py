@@ -1,7 +1,7 @@
 from babel.dates import format_date
 from babel.numbers import format_currency
 from django.contrib.sites.models import Site
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.template.loader import get_template
 from django.template import Context
 from django.utils.translation import ugettext_lazy as _
@@ -30,19 +30,27 @@ def mail_monthly_donation_processed_notification(recurring_payment, recurring_or
 
 
 @task
-def mail_project_funded_monthly_donor_notification(receiver, project):
+def mail_project_funded_monthly_donor_notifications(receivers, project):
+    """ Sends the mails to all receivers over one connection. """
     # TODO: Use English base and the regular translation mechanism.
-    context = Context({'receiver_first_name': receiver.first_name.capitalize(),
-                       'project': project,
-                       'link': '/go/projects/{0}'.format(project.slug),
-                       'site': 'https://' + Site.objects.get_current().domain})
+    site = 'https://' + Site.objects.get_current().domain
+    text_template = get_template('project_full_monthly_donor.nl.mail.txt')
+    html_template = get_template('project_full_monthly_donor.nl.mail.html')
 
     subject = "Gefeliciteerd: project afgerond!"
-    text_content = get_template('project_full_monthly_donor.nl.mail.txt').render(context)
-    html_content = get_template('project_full_monthly_donor.nl.mail.html').render(context)
-    msg = EmailMultiAlternatives(subject=subject, body=text_content, to=[receiver.email])
-    msg.attach_alternative(html_content, "text/html")
-    msg.send()
+    messages = []
+    for receiver in receivers:
+        context = Context({'receiver_first_name': receiver.first_name.capitalize(),
+                           'project': project,
+                           'link': '/go/projects/{0}'.format(project.slug),
+                           'site': site})
+
+        msg = EmailMultiAlternatives(subject=subject, body=text_template.render(context), to=[receiver.email])
+        msg.attach_alternative(html_template.render(context), "text/html")
+        messages.append(msg)
+
+    if messages:
+        get_connection().send_messages(messages)
 
 
 def mail_new_oneoff_donation(donation):
@@ -1,19 +1,20 @@
+import Queue
 import csv
-import math
 import logging
+import threading
 import traceback
 import sys
-from collections import namedtuple
 from optparse import make_option
 
 import os
 from django.core.management.base import BaseCommand
+from django.db import connection
 from django.utils import timezone
 from apps.cowry_docdata.adapters import WebDirectDocDataDirectDebitPaymentAdapter
 from apps.cowry_docdata.exceptions import DocDataPaymentException
 from apps.cowry_docdata.models import DocDataPaymentOrder
-from apps.fund.models import RecurringDirectDebitPayment, Order, OrderStatuses, Donation
-from apps.projects.models import Project, ProjectPhases
+from apps.fund.models import RecurringDirectDebitPayment, OrderStatuses, MonthlyDonationJournal
+from ...allocation import AllocationPlan, create_recurring_order
 from ...mails import mail_monthly_donation_processed_notification
 
 
@@ -24,6 +25,9 @@ logger = logging.getLogger(__name__)
 # Run with:
 # ./manage.py process_monthly_donations -v 2 --settings=bluebottle.settings.local (or .production etc.)
 #
+# Running the command again in the same month continues with the recurring payments that haven't been started yet.
+# Failed recurring payments are tried again.
+#
 
 class Command(BaseCommand):
     help = 'Process monthly donations.'
@@ -49,6 +53,9 @@ class Command(BaseCommand):
         make_option('--process-one-recurring-payment', action='store', dest='process_payment_id', type='int',
                     metavar='RECURRING-PAYMENT-ID',
                     help="Process only the RecurringDirectDebitPayment specified by its primary key."),
+
+        make_option('--workers', action='store', dest='workers', type='int', default=1, metavar='N',
+                    help="Number of recurring payments to process concurrently (default: 1)."),
     )
 
     def handle(self, *args, **options):
@@ -63,8 +70,7 @@ class Command(BaseCommand):
         send_email = not options['no_email']
 
         if options['dry_run']:
-            # TODO Implement --dry-run.
-            logger.warn("Config: --dry-run not fully implemented yet. Database records and payments will be created.")
+            logger.info("Config: Only planning the donations. No database records or payments will be created.")
             logger.info("Config: Not sending emails.")
             send_email = False
 
@@ -75,7 +81,8 @@ class Command(BaseCommand):
             if options['process_payment_id']:
                 recurring_payments_queryset = recurring_payments_queryset.filter(id=options['process_payment_id'])
             try:
-                process_monthly_donations(recurring_payments_queryset, send_email)
+                process_monthly_donations(recurring_payments_queryset, send_email, options['workers'],
+                                          dry_run=options['dry_run'])
             except:
                 print traceback.format_exc()
 
@@ -91,352 +98,328 @@ def generate_monthly_donations_csv(recurring_payments_queryset):
             csvwriter.writerow([rp.user.email, rp.active, rp.amount])
 
 
-def update_last_donation(donation, remaining_amount, popular_projects):
-    """
-    Updates the last donation with the remaining amount of the payment. If the donation is more than the project
-    needs, the project will be filled and the balance will be used to fill the popular projects recursively.
-    """
-    project = Project.objects.get(id=donation.project_id)
-
-    # Base case.
-    if project.projectcampaign.money_donated + remaining_amount <= project.projectcampaign.money_asked or \
-            len(popular_projects) == 0:
-        # The remaining amount won't fill up the project or we have no more projects to try. We're done.
-        logger.debug(u"Donation is less than project '{0}' needs. No further adjustments are needed.".format(project.title))
-        donation.amount = remaining_amount
-        donation.donation_type = Donation.DonationTypes.recurring
-        donation.save()
-        return
+def remove_order(order):
+    for donation in order.donations.all():
+        donation.delete()
+    order.delete()
 
-    # Recursive case.
-    else:
-        # Fill up the project.
-        logger.debug(u"Donation is more than project '{0}' needs. Filling up project and creating new donation.".format(project.title))
-        donation.amount = project.projectcampaign.money_asked - project.projectcampaign.money_donated
-        donation.donation_type = Donation.DonationTypes.recurring
-        donation.save()
 
-        # Create a new Donation and recursively update it with the remaining amount.
-        new_project = popular_projects.pop(0)
-        new_donation = Donation.objects.create(user=donation.user, project=new_project, amount=0, currency='EUR',
-                                               donation_type=Donation.DonationTypes.recurring, order=donation.order)
-        update_last_donation(new_donation, remaining_amount - donation.amount, popular_projects)
+class RecurringPaymentSkipped(Exception):
+    """ The recurring payment looks like it has been processed recently. """
+
 
+class RecurringPaymentFailed(Exception):
+    """ The recurring payment couldn't be processed. """
 
-def create_recurring_order(user, projects, order=None):
+
+def process_recurring_payment(planned, webdirect_payment_adapter, send_email):
     """
-    Creates a recurring Order with donations to the supplied projects.
+    Creates and starts the DocData payment for the planned recurring Order and returns the recurring Order that has been
+    paid and a message with the errors that occurred after the payment was started. Raises RecurringPaymentSkipped or
+    RecurringPaymentFailed when the payment hasn't been started.
     """
-    if not order:
-        order = Order.objects.create(status=OrderStatuses.recurring, user=user, recurring=True)
+    recurring_payment = planned.recurring_payment
+    recurring_order = planned.order
+    top_three_donation = planned.top_three
+
+    if planned.skipped:
+        raise RecurringPaymentSkipped(planned.skipped)
+    if planned.error:
+        raise RecurringPaymentFailed(planned.error)
+
+    # At this point the order should be correctly setup and ready for the DocData payment.
+    if top_three_donation:
+        donation_type_message = "supporting the 'Top Three' projects"
+    else:
+        donation_type_message = "with {0} donations".format(recurring_order.donations.count())
+    logger.info("Starting payment for '{0}' {1}.".format(recurring_payment, donation_type_message))
 
-    for p in projects:
-        project = Project.objects.get(id=p.id)
-        if project.phase == ProjectPhases.campaign:
-            Donation.objects.create(user=user, project=project, amount=0, currency='EUR',
-                                    donation_type=Donation.DonationTypes.recurring, order=order)
-    return order
+    # Safety check to ensure the modifications to the donations in the recurring result in an Order total that
+    # matches the RecurringDirectDebitPayment.
+    if recurring_payment.amount != recurring_order.total:
+        # Cleanup the Order if there's an error.
+        if top_three_donation:
+            remove_order(recurring_order)
+        raise RecurringPaymentFailed(
+            "RecurringDirectDebitPayment amount: {0} does not equal recurring Order amount: {1} for '{2}'. Not processing this recurring donation.".format(
+                recurring_payment.amount, recurring_order.total, recurring_payment))
 
+    # Check if the IBAN / BIC is stored correctly on the RecurringDirectDebitPayment.
+    if recurring_payment.iban == '' or recurring_payment.bic == '' or \
+            not recurring_payment.iban.endswith(recurring_payment.account) or \
+            recurring_payment.bic[:4] != recurring_payment.iban[4:8]:
 
-def remove_order(order):
-    for donation in order.donations.all():
-        donation.delete()
-    order.delete()
+        # Cleanup the Order if there's an error.
+        if top_three_donation:
+            remove_order(recurring_order)
+        raise RecurringPaymentFailed("Cannot create payment because the IBAN and/or BIC are not available.")
 
+    # Create and fill in the DocDataPaymentOrder.
+    payment = DocDataPaymentOrder()
+    payment.order = recurring_order
+    payment.payment_method_id = 'dd-webdirect'
 
-def correct_donation_amounts(popular_projects, recurring_order, recurring_payment):
-    """
-    Divides the total amount for the monthly donation across all projects. This method deals with the case of a
-    donation filling up a project.
-    """
-    remaining_amount = recurring_payment.amount
-    num_donations = recurring_order.donations.count()
-    amount_per_project = math.floor(recurring_payment.amount / num_donations)
-    donations = recurring_order.donations.all()
-    for i in range(0, num_donations - 1):
-        donation = donations[i]
-        project = Project.objects.get(id=donation.project_id)
-        if project.projectcampaign.money_donated + amount_per_project > project.projectcampaign.money_asked:
-            donation.amount = project.projectcampaign.money_asked - project.projectcampaign.money_donated
+    payment.amount = recurring_payment.amount
+    payment.currency = recurring_payment.currency
+
+    payment.customer_id = recurring_payment.user.id
+    payment.email = recurring_payment.user.email
+
+    # Use the recurring payment name (bank account name) to set the first and last name if they're not set.
+    if not recurring_payment.user.first_name:
+        if ' ' in recurring_payment.name:
+            payment.first_name = recurring_payment.name.split(' ')[0]
         else:
-            donation.amount = amount_per_project
-        donation.donation_type = Donation.DonationTypes.recurring
-        donation.save()
-        remaining_amount -= donation.amount
+            payment.first_name = recurring_payment.name
+    else:
+        payment.first_name = recurring_payment.user.first_name
 
-    # Update the last donation with the remaining amount.
-    update_last_donation(donations[num_donations - 1], remaining_amount, popular_projects)
+    if not recurring_payment.user.last_name:
+        if ' ' in recurring_payment.name:
+            payment.last_name = recurring_payment.name[recurring_payment.name.index(' ') + 1:]
+        else:
+            payment.last_name = recurring_payment.name
+    else:
+        payment.last_name = recurring_payment.user.last_name
 
+    # Try to use the address from the profile if it's set.
+    address = recurring_payment.user.address
+    if not address:
+        # Cleanup the Order if there's an error.
+        if top_three_donation:
+            remove_order(recurring_order)
+        raise RecurringPaymentFailed(
+            "Cannot create a payment for '{0}' because user does not have an address set.".format(recurring_payment))
+
+    # Set a default value for the pieces of the address that we don't have.
+    unknown_value = u'Unknown'
+    if not address.line1:
+        logger.warn("User '{0}' does not have their street and street number set. Using '{1}'.".format(recurring_payment.user, unknown_value))
+        payment.address = unknown_value
+    else:
+        payment.address = address.line1
+    if not address.city:
+        logger.warn("User '{0}' does not have their city set. Using '{1}'.".format(recurring_payment.user, unknown_value))
+        payment.city = unknown_value
+    else:
+        payment.city = address.city
+    if not address.postal_code:
+        logger.warn("User '{0}' does not have their postal code set. Using '{1}'.".format(recurring_payment.user, unknown_value))
+        payment.postal_code = unknown_value
+    else:
+        payment.postal_code = address.postal_code
 
-def process_monthly_donations(recurring_payments_queryset, send_email):
-    """ The starting point for creating DocData payments for the monthly donations. """
+    # Assume the Netherlands when country not set.
+    if address.country:
+        payment.country = address.country.alpha2_code
+    else:
+        payment.country = 'NL'
 
-    recurring_donation_errors = []
-    RecurringDonationError = namedtuple('RecurringDonationError', 'recurring_payment error_message')
-    skipped_recurring_payments = []
-    SkippedRecurringPayment = namedtuple('SkippedRecurringPayment', 'recurring_payment orders')
-    donation_count = 0
+    # Try to use the language from the User settings if it's set.
+    if recurring_payment.user.primary_language:
+        payment.language = recurring_payment.user.primary_language[:2]  # Cut off locale.
+    else:
+        payment.language = 'nl'
 
-    # The adapter is used after the recurring Order and donations have been adjusted. It's created here so that we can
-    # reuse it to process all recurring donations.
-    webdirect_payment_adapter = WebDirectDocDataDirectDebitPaymentAdapter()
+    payment.save()
 
-    # Fixed lists of the popular projects.
-    popular_projects_all = list(Project.objects.filter(phase=ProjectPhases.campaign).order_by('-popularity'))
-    top_three_projects = popular_projects_all[:3]
-    popular_projects_rest = popular_projects_all[3:]
+    # Start the WebDirect payment.
+    try:
+        webdirect_payment_adapter.create_remote_payment_order(payment)
+    except DocDataPaymentException as e:
+        # Cleanup the Order if there's an error.
+        if top_three_donation:
+            remove_order(recurring_order)
+        raise RecurringPaymentFailed("Problem creating remote payment order. {0}".format(e.message))
+    else:
+        recurring_order.status = OrderStatuses.closed
+        recurring_order.save()
 
-    logger.info("Config: Using these projects as 'Top Three':")
-    for project in top_three_projects:
-        logger.info("  {0}".format(project.title))
+    try:
+        webdirect_payment_adapter.start_payment(payment, recurring_payment)
+    except DocDataPaymentException as e:
 
-    # The main loop that processes each monthly donation.
-    for recurring_payment in recurring_payments_queryset:
-        top_three_donation = False
-        user_selected_projects = []
-
-        # Skip payment if there has been a recurring Order recently.
-        ten_days_ago = timezone.now() + timezone.timedelta(days=-10)
-        recent_closed_recurring_orders = Order.objects.filter(user=recurring_payment.user, status=OrderStatuses.closed,
-                                                              recurring=True, updated__gt=ten_days_ago)
-        if recent_closed_recurring_orders.count() > 0:
-            skipped_recurring_payments.append(SkippedRecurringPayment(recurring_payment, list(recent_closed_recurring_orders)))
-            logger.warn(
-                "Skipping '{0}' because it looks like it has been processed recently with one of these Orders:".format(
-                    recurring_payment))
-            for closed_order in recent_closed_recurring_orders:
-                logger.warn("  Order Number: {0}".format(closed_order.order_number))
-            continue
-
-        # Check if there is a monthly shopping cart (Order status is 'recurring') for this recurring_payment user.
-        try:
-            recurring_order = Order.objects.get(user=recurring_payment.user, status=OrderStatuses.recurring)
-            logger.debug("Using existing recurring Order for user: {0}.".format(recurring_payment.user))
-        except Order.DoesNotExist:
-            # There is no monthly shopping cart. The user is supporting the top three projects so we need to create an
-            # Order with Donations for the top three projects.
-            logger.debug("Creating new 'Top Three' recurring Order for user {0}.".format(recurring_payment.user))
-            recurring_order = create_recurring_order(recurring_payment.user, top_three_projects)
-            top_three_donation = True
-        except Order.MultipleObjectsReturned:
-            error_message = "Multiple Orders with status 'recurring' returned for '{0}'. Not processing this recurring donation.".format(
-                recurring_payment)
-            logger.error(error_message)
-            recurring_donation_errors.append(RecurringDonationError(recurring_payment, error_message))
-            continue
-
-        # Check if we're above the DocData minimum for direct debit.
-        if recurring_payment.amount < 113:
-            # Cleanup the Order if there's an error.
-            if top_three_donation:
-                remove_order(recurring_order)
-            error_message = "Payment amount for '{0}' is less than the DocData minimum for direct debit (113). Skipping.".format(
-                recurring_payment)
-            logger.error(error_message)
-            recurring_donation_errors.append(RecurringDonationError(recurring_payment, error_message))
-            continue
-
-        # Remove donations to projects that are no longer in the campaign phase.
-        for donation in recurring_order.donations.all():
-            project = Project.objects.get(id=donation.project.id)
-            if project.phase != ProjectPhases.campaign:
-                donation.delete()
-
-        if recurring_order.donations.count() > 0:
-            # There are donations in the recurring Order and we need to redistribute / correct the donation amounts.
-
-            # Save a copy of the projects that have been selected by the user so that the monthly shopping cart can
-            # recreated after the payment has been successfully started.
-            for donation in recurring_order.donations.all():
-                user_selected_projects.append(donation.project)
-
-            correct_donation_amounts(popular_projects_all, recurring_order, recurring_payment)
+        # Cleanup the Order if there's an error.
+        if top_three_donation:
+            remove_order(recurring_order)
         else:
-            # There are no donations in the recurring Order so we need to create a monthly shopping cart to support the
-            # top three projects and redistribute / correct the donation amounts.
-            create_recurring_order(recurring_payment.user, top_three_projects, recurring_order)
+            recurring_order.status = OrderStatuses.recurring
+            recurring_order.save()
+        raise RecurringPaymentFailed("Problem starting payment. {0}".format(e.message))
 
-            if recurring_order.donations.count() == 0:
-                logger.debug("The top three donations are full. Using next three projects for top three.")
-                top_three_projects = popular_projects_rest[:3]
-                popular_projects_rest = popular_projects_rest[3:]
-                create_recurring_order(recurring_payment.user, top_three_projects, recurring_order)
+    logger.debug("Payment for '{0}' started.".format(recurring_payment))
 
-            correct_donation_amounts(popular_projects_rest, recurring_order, recurring_payment)
-            top_three_donation = True
+    # The payment has been started, so errors from here on mustn't cause the recurring payment to be processed again.
+    errors = []
 
-        # At this point the order should be correctly setup and ready for the DocData payment.
-        if top_three_donation:
-            donation_type_message = "supporting the 'Top Three' projects"
-        else:
-            donation_type_message = "with {0} donations".format(recurring_order.donations.count())
-        logger.info("Starting payment for '{0}' {1}.".format(recurring_payment, donation_type_message))
-
-        # Safety check to ensure the modifications to the donations in the recurring result in an Order total that
-        # matches the RecurringDirectDebitPayment.
-        if recurring_payment.amount != recurring_order.total:
-            # Cleanup the Order if there's an error.
-            if top_three_donation:
-                remove_order(recurring_order)
-            error_message = "RecurringDirectDebitPayment amount: {0} does not equal recurring Order amount: {1} for '{2}'. Not processing this recurring donation.".format(
-                recurring_payment.amount, recurring_order.total, recurring_payment)
-            logger.error(error_message)
-            recurring_donation_errors.append(RecurringDonationError(recurring_payment, error_message))
-            continue
-
-        # Check if the IBAN / BIC is stored correctly on the RecurringDirectDebitPayment.
-        if recurring_payment.iban == '' or recurring_payment.bic == '' or \
-                not recurring_payment.iban.endswith(recurring_payment.account) or \
-                recurring_payment.bic[:4] != recurring_payment.iban[4:8]:
-
-            # Cleanup the Order if there's an error.
-            if top_three_donation:
-                remove_order(recurring_order)
-
-            error_message = "Cannot create payment because the IBAN and/or BIC are not available."
-            logger.error(error_message)
-            recurring_donation_errors.append(RecurringDonationError(recurring_payment, error_message))
-            continue
-
-        # Create and fill in the DocDataPaymentOrder.
-        payment = DocDataPaymentOrder()
-        payment.order = recurring_order
-        payment.payment_method_id = 'dd-webdirect'
-
-        payment.amount = recurring_payment.amount
-        payment.currency = recurring_payment.currency
-
-        payment.customer_id = recurring_payment.user.id
-        payment.email = recurring_payment.user.email
-
-        # Use the recurring payment name (bank account name) to set the first and last name if they're not set.
-        if not recurring_payment.user.first_name:
-            if ' ' in recurring_payment.name:
-                payment.first_name = recurring_payment.name.split(' ')[0]
-            else:
-                payment.first_name = recurring_payment.name
-        else:
-            payment.first_name = recurring_payment.user.first_name
+    # Send an email to the user.
+    if send_email:
+        try:
+            mail_monthly_donation_processed_notification(recurring_payment, recurring_order)
+        except Exception:
+            errors.append("Error while sending the email:\n{0}".format(traceback.format_exc()))
 
-        if not recurring_payment.user.last_name:
-            if ' ' in recurring_payment.name:
-                payment.last_name = recurring_payment.name[recurring_payment.name.index(' ') + 1:]
-            else:
-                payment.last_name = recurring_payment.name
-        else:
-            payment.last_name = recurring_payment.user.last_name  
-            
-        # Try to use the address from the profile if it's set.
-        address = recurring_payment.user.address
-        if not address:
-            # Cleanup the Order if there's an error.
-            if top_three_donation:
-                remove_order(recurring_order)
-            error_message = "Cannot create a payment for '{0}' because user does not have an address set.".format(recurring_payment)
-            logger.error(error_message)
-            recurring_donation_errors.append(RecurringDonationError(recurring_payment, error_message))
-            continue
-
-        # Set a default value for the pieces of the address that we don't have.
-        unknown_value = u'Unknown'
-        if not address.line1:
-            logger.warn("User '{0}' does not have their street and street number set. Using '{1}'.".format(recurring_payment.user, unknown_value))
-            payment.address = unknown_value
-        else:
-            payment.address = address.line1
-        if not address.city:
-            logger.warn("User '{0}' does not have their city set. Using '{1}'.".format(recurring_payment.user, unknown_value))
-            payment.city = unknown_value
-        else:
-            payment.city = address.city
-        if not address.postal_code:
-            logger.warn("User '{0}' does not have their postal code set. Using '{1}'.".format(recurring_payment.user, unknown_value))
-            payment.postal_code = unknown_value
-        else:
-            payment.postal_code = address.postal_code
+    # Create a new recurring Order (monthly shopping cart) for donations that are not to the 'Top Three'.
+    if not top_three_donation and len(planned.user_selected_projects) > 0:
+        try:
+            create_recurring_order(recurring_payment.user, planned.user_selected_projects, recurring_payment.amount)
+        except Exception:
+            errors.append("Error while creating the new recurring Order:\n{0}".format(traceback.format_exc()))
 
-        # Assume the Netherlands when country not set.
-        if address.country:
-            payment.country = address.country.alpha2_code
-        else:
-            payment.country = 'NL'
+    for error in errors:
+        logger.error("Payment for '{0}' started but: {1}".format(recurring_payment, error))
 
-        # Try to use the language from the User settings if it's set.
-        if recurring_payment.user.primary_language:
-            payment.language = recurring_payment.user.primary_language[:2]  # Cut off locale.
-        else:
-            payment.language = 'nl'
+    return recurring_order, '\n'.join(errors)
 
-        payment.save()
 
-        # Start the WebDirect payment.
-        try:
-            webdirect_payment_adapter.create_remote_payment_order(payment)
-        except DocDataPaymentException as e:
-            # Cleanup the Order if there's an error.
-            if top_three_donation:
-                remove_order(recurring_order)
-
-            error_message = "Problem creating remote payment order."
-            logger.error(error_message)
-            recurring_donation_errors.append(
-                RecurringDonationError(recurring_payment, "{0} {1}".format(error_message, e.message)))
-            continue
+def log_allocation_plan(plan):
+    """ Logs the planned donations of a dry run. """
+    project_totals = {}
+    for planned in plan.orders:
+        if planned.skipped:
+            logger.warn(planned.skipped)
+        elif planned.error:
+            logger.error(planned.error)
         else:
-            recurring_order.status = OrderStatuses.closed
-            recurring_order.save()
+            logger.info(u"Planned '{0}'{1}: {2}".format(planned.recurring_payment,
+                                                        " supporting the 'Top Three' projects" if planned.top_three else '',
+                                                        unicode(planned)))
+            for planned_donation in planned.donations:
+                project = planned_donation.project
+                project_totals[project] = project_totals.get(project, 0) + planned_donation.amount
 
-        try:
-            webdirect_payment_adapter.start_payment(payment, recurring_payment)
-        except DocDataPaymentException as e:
+    logger.info("")
+    logger.info("Planned Donations per Project")
+    logger.info("=============================")
+    logger.info("")
+    for project in plan.projects:
+        if project in project_totals:
+            logger.info(u"{0}: {1} (needs {2})".format(project.title, project_totals[project],
+                                                       project.projectcampaign.money_asked -
+                                                       project.projectcampaign.money_donated))
 
-            # Cleanup the Order if there's an error.
-            if top_three_donation:
-                remove_order(recurring_order)
-            else:
-                recurring_order.status = OrderStatuses.recurring
-                recurring_order.save()
 
-            error_message = "Problem starting payment."
-            logger.error(error_message)
-            recurring_donation_errors.append(
-                RecurringDonationError(recurring_payment, "{0} {1}".format(error_message, e.message)))
-            continue
+def process_monthly_donations(recurring_payments_queryset, send_email, workers=1, run=None, dry_run=False,
+                              adapter_class=WebDirectDocDataDirectDebitPaymentAdapter):
+    """
+    The starting point for creating DocData payments for the monthly donations. The donations of all recurring
+    payments are planned first, then the recurring payments are processed by the workers concurrently. The planned
+    donations of a recurring payment are only saved after the worker has claimed it in the MonthlyDonationJournal of
+    the run (the current month by default), so overlapping runs never change the same recurring Order. Running the
+    same month again only processes the recurring payments that haven't been started or have failed.
+    """
+    run = run or timezone.now().strftime('%Y-%m')
+
+    # The recurring payments that have been started in the run are left out of the plan.
+    started_ids = list(MonthlyDonationJournal.objects.filter(run=run).exclude(
+        status=MonthlyDonationJournal.Statuses.failed).values_list('recurring_payment_id', flat=True))
+    if started_ids:
+        logger.info("Config: Continuing run {0}. {1} recurring payments have already been started.".format(
+            run, len(started_ids)))
+        recurring_payments_queryset = recurring_payments_queryset.exclude(id__in=started_ids)
+
+    plan = AllocationPlan.load()
+    logger.info("Config: Processing run {0} with {1} worker(s).".format(run, workers))
+    logger.info("Config: Using these projects as 'Top Three':")
+    for project in plan.top_three:
+        logger.info("  {0}".format(project.title))
+
+    for recurring_payment in recurring_payments_queryset.select_related('user'):
+        plan.add(recurring_payment)
 
-        logger.debug("Payment for '{0}' started.".format(recurring_payment))
-        donation_count += 1
+    if dry_run:
+        log_allocation_plan(plan)
+        return
 
-        # Send an email to the user.
-        if send_email:
-            mail_monthly_donation_processed_notification(recurring_payment, recurring_order)
+    planned_orders = Queue.Queue()
+    for planned in plan.orders:
+        planned_orders.put(planned)
 
-        # Create a new recurring Order (monthly shopping cart) for donations that are not to the 'Top Three'.
-        if not top_three_donation and len(user_selected_projects) > 0:
-            new_recurring_order = create_recurring_order(recurring_payment.user, user_selected_projects)
-
-            # Adjust donation amounts in a simple way for the recurring Order (the monthly donations shopping cart).
-            num_donations = new_recurring_order.donations.count()
-            amount_per_project = math.floor(recurring_payment.amount / num_donations)
-            donations = new_recurring_order.donations.all()
-            for i in range(0, num_donations - 1):
-                donation = donations[i]
-                donation.amount = amount_per_project
-                donation.donation_type = Donation.DonationTypes.recurring
-                donation.save()
-            # Update the last donation with the remaining amount.
-            donation = donations[num_donations - 1]
-            donation.amount = recurring_payment.amount - (amount_per_project * (num_donations - 1))
-            donation.donation_type = Donation.DonationTypes.recurring
-            donation.save()
+    results = []
+    results_lock = threading.Lock()
+
+    def work():
+        # The Suds client of the adapter can't be shared by threads. It's created here so that a worker can reuse it to
+        # process all of its recurring donations.
+        webdirect_payment_adapter = adapter_class()
+        while True:
+            try:
+                planned = planned_orders.get_nowait()
+            except Queue.Empty:
+                return
+            recurring_payment = planned.recurring_payment
+
+            entry = MonthlyDonationJournal.claim(run, recurring_payment)
+            if entry is None:
+                logger.info("Skipping '{0}' because it has already been started in run {1}.".format(
+                    recurring_payment, run))
+                status, message = None, ''
+            else:
+                order = None
+                try:
+                    plan.save_order(planned)
+                    order, message = process_recurring_payment(planned, webdirect_payment_adapter, send_email)
+                except RecurringPaymentSkipped as e:
+                    status, message = MonthlyDonationJournal.Statuses.skipped, str(e)
+                    logger.warn(message)
+                except RecurringPaymentFailed as e:
+                    status, message = MonthlyDonationJournal.Statuses.failed, str(e)
+                    logger.error(message)
+                except Exception:
+                    status, message = MonthlyDonationJournal.Statuses.failed, traceback.format_exc()
+                    logger.error("Error while processing '{0}':\n{1}".format(recurring_payment, message))
+                else:
+                    # Errors after the payment was started are kept in the message of the processed entry.
+                    status = MonthlyDonationJournal.Statuses.processed
+                entry.finish(status, message, order)
+
+            with results_lock:
+                results.append((recurring_payment, status, message))
+
+    def work_in_thread():
+        try:
+            work()
+        finally:
+            # Every thread has its own database connection.
+            connection.close()
+
+    if workers > 1:
+        threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=work_in_thread, name='monthly donations {0}'.format(i))
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+    else:
+        # A single worker runs in this thread and uses its database connection.
+        work()
+
+    recurring_donation_errors = [(rp, message) for rp, status, message in results
+                                 if status == MonthlyDonationJournal.Statuses.failed]
+    skipped_recurring_payments = [(rp, message) for rp, status, message in results
+                                  if status == MonthlyDonationJournal.Statuses.skipped]
+    donation_count = len([status for rp, status, message in results
+                          if status == MonthlyDonationJournal.Statuses.processed])
+    processed_with_errors = [(rp, message) for rp, status, message in results
+                             if status == MonthlyDonationJournal.Statuses.processed and message]
+    started_count = len(started_ids) + len([status for rp, status, message in results if status is None])
+    # The entries of this run have been finished, so these have been started by a run that stopped or is still running.
+    unfinished_entries = MonthlyDonationJournal.objects.filter(
+        run=run, status=MonthlyDonationJournal.Statuses.started).select_related('recurring_payment')
 
     logger.info("")
     logger.info("Recurring Donation Processing Summary")
     logger.info("=====================================")
     logger.info("")
-    logger.info("Total number of recurring donations: {0}".format(recurring_payments_queryset.count()))
+    logger.info("Total number of recurring donations: {0}".format(len(results)))
     logger.info("Number of recurring Orders successfully processed: {0}".format(donation_count))
     logger.info("Number of errors: {0}".format(len(recurring_donation_errors)))
+    logger.info("Number of processed payments with errors afterwards: {0}".format(len(processed_with_errors)))
     logger.info("Number of skipped payments: {0}".format(len(skipped_recurring_payments)))
+    logger.info("Number of payments started in a previous run: {0}".format(started_count))
+    logger.info("Number of payments that were started but not finished: {0}".format(len(unfinished_entries)))
 
     if len(recurring_donation_errors) > 0:
         logger.info("")
@@ -444,9 +427,22 @@ def process_monthly_donations(recurring_payments_queryset, send_email):
         logger.info("Detailed Error List")
         logger.info("===================")
         logger.info("")
-        for error in recurring_donation_errors:
-            logger.info("RecurringDirectDebitPayment: {0} {1}".format(error.recurring_payment.id, error.recurring_payment))
-            logger.info("Error: {0}".format(error.error_message))
+        for recurring_payment, error_message in recurring_donation_errors:
+            logger.info("RecurringDirectDebitPayment: {0} {1}".format(recurring_payment.id, recurring_payment))
+            logger.info("Error: {0}".format(error_message))
+            logger.info("--")
+
+    if len(processed_with_errors) > 0:
+        logger.info("")
+        logger.info("")
+        logger.info("Processed Recurring Payments With Errors")
+        logger.info("========================================")
+        logger.info("")
+        logger.info("These payments have been started at DocData and won't be processed again in this run.")
+        logger.info("")
+        for recurring_payment, error_message in processed_with_errors:
+            logger.info("RecurringDirectDebitPayment: {0} {1}".format(recurring_payment.id, recurring_payment))
+            logger.info("Error: {0}".format(error_message))
             logger.info("--")
 
     if len(skipped_recurring_payments) > 0:
@@ -455,8 +451,22 @@ def process_monthly_donations(recurring_payments_queryset, send_email):
         logger.info("Skipped Recurring Payments")
         logger.info("==========================")
         logger.info("")
-        for skipped_payment in skipped_recurring_payments:
-            logger.info("RecurringDirectDebitPayment: {0} {1}".format(skipped_payment.recurring_payment.id, skipped_payment.recurring_payment))
-            for closed_order in skipped_payment.orders:
-                logger.info("Order Number: {0}".format(closed_order.order_number))
-                logger.info("--")
+        for recurring_payment, message in skipped_recurring_payments:
+            logger.info("RecurringDirectDebitPayment: {0} {1}".format(recurring_payment.id, recurring_payment))
+            logger.info(message)
+            logger.info("--")
+
+    if len(unfinished_entries) > 0:
+        logger.info("")
+        logger.info("")
+        logger.info("Started But Not Finished Recurring Payments")
+        logger.info("===========================================")
+        logger.info("")
+        logger.info("These payments may have been started at DocData. Check them and set the status of the journal "
+                    "entry to 'failed' to process them again.")
+        logger.info("")
+        for entry in unfinished_entries:
+            logger.info("RecurringDirectDebitPayment: {0} {1}".format(entry.recurring_payment_id,
+                                                                      entry.recurring_payment))
+            logger.info("Started: {0}".format(entry.created))
+            logger.info("--")
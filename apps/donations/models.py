@@ -1,10 +1,10 @@
 from django.dispatch import receiver
 from django.db.models.signals import pre_save
-from apps.fund.models import Order, OrderStatuses, Donation, DonationStatuses, RecurringDirectDebitPayment
+from apps.fund.models import OrderStatuses, Donation, DonationStatuses
 from apps.projects.models import Project
 from apps.projects.signals import project_funded
 
-from .mails import mail_project_funded_monthly_donor_notification, mail_new_oneoff_donation
+from .mails import mail_project_funded_monthly_donor_notifications, mail_new_oneoff_donation
 
 
 # The monthly donor email will be sent under these conditions:
@@ -27,17 +27,16 @@ def email_monthly_donor_project_funded(sender, instance, first_time_funded, **kw
     # A project can become funded multiple times if pending donations fail. Only send this email the first time that
     # the project becomes funded.
     if first_time_funded:
-        for order in Order.objects.filter(status=OrderStatuses.recurring):
-            for donation in order.donations.all():
-                if donation.project == instance:
-                    # Only send the email if the monthly payment is turned on.
-                    try:
-                        recurring_payment = RecurringDirectDebitPayment.objects.get(user=order.user)
-                    except RecurringDirectDebitPayment.DoesNotExist:
-                        pass
-                    else:
-                        if recurring_payment.active:
-                            mail_project_funded_monthly_donor_notification(donation.user, instance)
+        # The donations to the project in monthly shopping carts of users with their monthly payment turned on.
+        donations = Donation.objects.filter(project=instance, order__status=OrderStatuses.recurring,
+                                            order__user__recurringdirectdebitpayment__active=True)
+        donations = donations.select_related('user')
+
+        # A user gets one email even if the project is in their shopping cart more than once.
+        receivers = {}
+        for donation in donations:
+            receivers.setdefault(donation.user_id, donation.user)
+        mail_project_funded_monthly_donor_notifications(receivers.values(), instance)
 
 
 @receiver(pre_save, sender=Donation, dispatch_uid="new_oneoff_donation")
@@ -54,9 +53,9 @@ def new_oneoff_donation(sender, instance, **kwargs):
         # NOTE: We cannot check the previous and future state of the ready attribute since it is set in the
         # Donation.save function.
 
-        existing_donation = Donation.objects.get(pk=instance.pk)
-        # If the existing donation is already pending, don't mail.
-        if existing_donation.status == DonationStatuses.pending:
+        # If the existing donation is already pending, don't mail. The Donation remembers the status it was loaded
+        # with so this doesn't need to query the existing donation.
+        if instance._original_status == DonationStatuses.pending:
             return
 
     # If the donation status will be pending, send a mail.
@@ -1,12 +1,19 @@
 import re
 
+import mock
 from django.test import TestCase
 from django.core import mail
 
+from apps.projects.models import Project
+from apps.projects.signals import project_funded
 from apps.projects.tests import ProjectTestsMixin
-from apps.fund.models import Donation, DonationStatuses
+from apps.fund.models import Donation, DonationStatuses, Order, OrderStatuses, RecurringDirectDebitPayment, \
+    MonthlyDonationJournal
+from bluebottle.accounts.models import UserAddress
 from apps.fundraisers.tests.helpers import FundRaiserTestsMixin
 
+from ..allocation import AllocationPlan
+from ..management.commands.process_monthly_donations import process_monthly_donations
 from .helpers import DonationTestsMixin
 
 
@@ -87,4 +94,144 @@ class DonationMailTests(TestCase, ProjectTestsMixin, DonationTestsMixin, FundRai
         self.assertEqual(int(match.group(1)), fundraiser.id)
 
         # verify that the mail is indeed directed to the fundraiser owner
-        self.assertIn(self.fundraiser_owner.email, m.recipients())
\ No newline at end of file
+        self.assertIn(self.fundraiser_owner.email, m.recipients())
+
+    def test_mail_monthly_donors_on_project_funded(self):
+        for email, active in (('active@example.com', True), ('inactive@example.com', False)):
+            user = self.create_user(email=email)
+            RecurringDirectDebitPayment.objects.create(user=user, active=active, amount=1000, name="ABC", city="DEF",
+                                                       account=123)
+            order = self.create_order(user, status=OrderStatuses.recurring, recurring=True)
+            self.create_donation(user, self.project, order=order)
+            self.create_donation(user, self.project, order=order)
+
+        project_funded.send(sender=Project, instance=self.project, first_time_funded=True)
+
+        # Only the user with the monthly payment turned on gets one email.
+        messages = [message for message in mail.outbox if message.subject == "Gefeliciteerd: project afgerond!"]
+        self.assertEqual([message.to for message in messages], [['active@example.com']])
+
+
+class LocalPaymentAdapter(object):
+    """ Stand-in for the WebDirect payment adapter that doesn't connect to DocData. """
+
+    def create_remote_payment_order(self, payment):
+        payment.payment_order_id = 'LOCAL-{0}'.format(payment.id)
+        payment.save()
+
+    def start_payment(self, payment, recurring_payment):
+        pass
+
+
+class AllocationPlanTests(TestCase, ProjectTestsMixin, DonationTestsMixin):
+    def setUp(self):
+        self.projects = []
+        for popularity in (4, 3, 2, 1):
+            project = self.create_project(money_asked=1000, phase='campaign')
+            project.popularity = popularity
+            project.save()
+            self.projects.append(project)
+
+    def create_recurring_payment(self, amount):
+        return RecurringDirectDebitPayment.objects.create(user=self.create_user(), active=True, amount=amount,
+                                                          name="ABC", city="DEF", account=123)
+
+    def test_top_three(self):
+        plan = AllocationPlan.load()
+        planned = plan.add(self.create_recurring_payment(1500))
+
+        self.assertTrue(planned.top_three)
+        self.assertEqual([(d.project.id, d.amount) for d in planned.donations],
+                         [(self.projects[0].id, 500), (self.projects[1].id, 500), (self.projects[2].id, 500)])
+
+    def test_remaining_need_across_donors(self):
+        plan = AllocationPlan.load()
+        plan.add(self.create_recurring_payment(1500))
+        plan.add(self.create_recurring_payment(1500))
+
+        # The 'Top Three' projects have been filled up by the first two donors.
+        self.assertEqual(plan.money_needed[self.projects[0].id], 0)
+        self.assertEqual(plan.top_three, [self.projects[3]])
+
+        planned = plan.add(self.create_recurring_payment(600))
+        self.assertEqual([(d.project.id, d.amount) for d in planned.donations], [(self.projects[3].id, 600)])
+
+    def test_save_user_selected_projects(self):
+        recurring_payment = self.create_recurring_payment(2000)
+        order = self.create_order(recurring_payment.user, status=OrderStatuses.recurring, recurring=True)
+        self.create_donation(recurring_payment.user, self.projects[3], order=order)
+        self.create_donation(recurring_payment.user, self.create_project(), order=order)
+
+        plan = AllocationPlan.load()
+        planned = plan.add(recurring_payment)
+        self.assertFalse(planned.top_three)
+        self.assertEqual(planned.user_selected_projects, [self.projects[3]])
+
+        plan.save()
+
+        # The donation to the project that isn't in the campaign phase is removed and the amount that's more than the
+        # project needs goes to the most popular project.
+        self.assertEqual(order.total, 2000)
+        self.assertEqual(sorted(order.donations.values_list('project_id', 'amount')),
+                         sorted([(self.projects[3].id, 1000), (self.projects[0].id, 1000)]))
+
+    def test_process_user_selected_projects(self):
+        recurring_payment = self.create_recurring_payment(2000)
+        recurring_payment.account = '417164300'
+        recurring_payment.iban = 'NL91ABNA0417164300'
+        recurring_payment.bic = 'ABNANL2A'
+        recurring_payment.save()
+        address, created = UserAddress.objects.get_or_create(user=recurring_payment.user)
+        address.line1 = 'Dam 1'
+        address.city = 'Amsterdam'
+        address.postal_code = '1012JS'
+        address.save()
+
+        order = self.create_order(recurring_payment.user, status=OrderStatuses.recurring, recurring=True)
+        self.create_donation(recurring_payment.user, self.projects[3], order=order)
+        self.create_donation(recurring_payment.user, self.create_project(), order=order)
+
+        process_monthly_donations(RecurringDirectDebitPayment.objects.all(), send_email=False, run='2013-11',
+                                  adapter_class=LocalPaymentAdapter)
+
+        # The redistributed cart passes the amount check and is paid.
+        order = Order.objects.get(id=order.id)
+        self.assertEqual(order.status, OrderStatuses.closed)
+        self.assertEqual(order.total, 2000)
+        self.assertEqual(MonthlyDonationJournal.objects.get(recurring_payment=recurring_payment).status,
+                         MonthlyDonationJournal.Statuses.processed)
+
+        # A new monthly shopping cart has been created with the selected project.
+        new_order = Order.objects.get(user=recurring_payment.user, status=OrderStatuses.recurring)
+        self.assertEqual(list(new_order.donations.values_list('project_id', flat=True)), [self.projects[3].id])
+
+    def test_error_after_payment_started(self):
+        recurring_payment = self.create_recurring_payment(1500)
+
+        with mock.patch('apps.donations.management.commands.process_monthly_donations.'
+                        'mail_monthly_donation_processed_notification', side_effect=Exception("Mail server down")):
+            process_monthly_donations(RecurringDirectDebitPayment.objects.all(), send_email=True, run='2013-11',
+                                      adapter_class=LocalPaymentAdapter)
+
+        # The payment has been started, so the recurring payment isn't processed again.
+        entry = MonthlyDonationJournal.objects.get(recurring_payment=recurring_payment)
+        self.assertEqual(entry.status, MonthlyDonationJournal.Statuses.processed)
+        self.assertEqual(entry.order.status, OrderStatuses.closed)
+        self.assertIn("Mail server down", entry.message)
+        self.assertIsNone(MonthlyDonationJournal.claim('2013-11', recurring_payment))
+
+    def test_overlapping_run(self):
+        recurring_payment = self.create_recurring_payment(1500)
+
+        class OverlappingRunAdapter(LocalPaymentAdapter):
+            """ Another run claims the recurring payment after this run has planned it. """
+            def __init__(self):
+                MonthlyDonationJournal.claim('2013-11', recurring_payment)
+
+        process_monthly_donations(RecurringDirectDebitPayment.objects.all(), send_email=False, run='2013-11',
+                                  adapter_class=OverlappingRunAdapter)
+
+        # The planned 'Top Three' Order hasn't been created.
+        self.assertFalse(Order.objects.filter(user=recurring_payment.user).exists())
+        self.assertEqual(MonthlyDonationJournal.objects.get(recurring_payment=recurring_payment).status,
+                         MonthlyDonationJournal.Statuses.started)
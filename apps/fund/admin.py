@@ -6,7 +6,7 @@ from django.contrib.admin import SimpleListFilter
 from django.contrib.admin.templatetags.admin_static import static
 from django.utils import translation
 from django.utils.translation import ugettext_lazy as _
-from .models import Donation, Order, RecurringDirectDebitPayment, OrderStatuses, DonationStatuses
+from .models import Donation, Order, RecurringDirectDebitPayment, OrderStatuses, DonationStatuses, MonthlyDonationJournal
 
 
 # http://stackoverflow.com/a/16556771
@@ -231,3 +231,13 @@ class RecurringDirectDebitPaymentAdmin(admin.ModelAdmin):
     amount_override.short_description = 'amount'
 
 admin.site.register(RecurringDirectDebitPayment, RecurringDirectDebitPaymentAdmin)
+
+
+class MonthlyDonationJournalAdmin(admin.ModelAdmin):
+    list_display = ('run', 'recurring_payment', 'status', 'order', 'updated')
+    list_filter = ('run', 'status')
+    search_fields = ('recurring_payment__user__email', 'order__order_number')
+    raw_id_fields = ('recurring_payment', 'order')
+    readonly_fields = ('created', 'updated')
+
+admin.site.register(MonthlyDonationJournal, MonthlyDonationJournalAdmin)
@@ -87,6 +87,64 @@ def cancel_recurring_payment_user_delete(sender, instance, **kwargs):
         recurring_payment.delete()
 
 
+class MonthlyDonationJournal(models.Model):
+    """
+    The outcome of processing a recurring payment in the monthly donations run of a month. The entry is created before
+    the payment is started and there's only one entry per recurring payment (and so per user) in a run, so the entry
+    works as a lock on the user. Running the same month again skips the recurring payments that have been started.
+    """
+    class Statuses(DjangoChoices):
+        started = ChoiceItem('started', label=_("Started"))
+        processed = ChoiceItem('processed', label=_("Processed"))
+        skipped = ChoiceItem('skipped', label=_("Skipped"))
+        failed = ChoiceItem('failed', label=_("Failed"))
+
+    # The month of the run, e.g. 2013-11.
+    run = models.CharField(_("Run"), max_length=7, db_index=True)
+    recurring_payment = models.ForeignKey(RecurringDirectDebitPayment, verbose_name=_("Recurring payment"),
+                                          related_name='journal_entries')
+    status = models.CharField(_("Status"), max_length=20, choices=Statuses.choices, default=Statuses.started,
+                              db_index=True)
+    # The Order is removed when a 'Top Three' payment fails, which mustn't remove the entry.
+    order = models.ForeignKey('Order', verbose_name=_("Order"), null=True, blank=True, on_delete=models.SET_NULL)
+    message = models.TextField(_("Message"), blank=True)
+
+    created = CreationDateTimeField(_("Created"))
+    updated = ModificationDateTimeField(_("Updated"))
+
+    class Meta:
+        unique_together = ('run', 'recurring_payment')
+        ordering = ('-created',)
+
+    def __unicode__(self):
+        return u'{0} - {1} - {2}'.format(self.run, self.recurring_payment_id, self.status)
+
+    @classmethod
+    def claim(cls, run, recurring_payment):
+        """
+        Returns the entry of the recurring payment with the status 'started', or None when the recurring payment has
+        already been started in the run. Failed recurring payments are claimed again.
+        """
+        entry, created = cls.objects.get_or_create(run=run, recurring_payment=recurring_payment)
+        if created:
+            return entry
+
+        # Only one worker can move the entry from failed to started.
+        if cls.objects.filter(pk=entry.pk, status=cls.Statuses.failed).update(status=cls.Statuses.started,
+                                                                              message='', order=None):
+            entry.status = cls.Statuses.started
+            entry.message = ''
+            entry.order = None
+            return entry
+        return None
+
+    def finish(self, status, message='', order=None):
+        self.status = status
+        self.message = message
+        self.order = order
+        self.save()
+
+
 class DonationStatuses(DjangoChoices):
     new = ChoiceItem('new', label=_("New"))
     in_progress = ChoiceItem('in_progress', label=_("In progress"))
@@ -131,6 +189,16 @@ class Donation(models.Model):
     objects = models.Manager()
     valid_donations = ValidDonationsManager()
 
+    _original_status = None
+    _original_amount = None
+
+    def __init__(self, *args, **kwargs):
+        super(Donation, self).__init__(*args, **kwargs)
+        # Remember the status and amount the donation was loaded with so post_save receivers can see the transition
+        # without having to query the database for the old values.
+        self._original_status = self.status
+        self._original_amount = self.amount
+
     @property
     def payment_method(self):
         """ The DocData payment method. """
@@ -176,6 +244,11 @@ class Donation(models.Model):
 
         super(Donation, self).save(*args, **kwargs)
 
+        # The post_save receivers have seen the transition so the current values become the 'original' values for
+        # subsequent saves.
+        self._original_status = self.status
+        self._original_amount = self.amount
+
 
 class OrderStatuses(DjangoChoices):
     current = ChoiceItem('current', label=_("Current"))  # The single donation 'shopping cart' (editable).
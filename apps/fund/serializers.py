@@ -128,6 +128,8 @@ class OrderSerializer(serializers.ModelSerializer):
     vouchers = VoucherSerializer(source='vouchers', many=True, read_only=True)
     payments = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
     url = serializers.HyperlinkedIdentityField(view_name='fund-order-detail')
+    # The time the status of the latest payment has been received from DocData.
+    payment_status_checked = serializers.SerializerMethodField('get_payment_status_checked')
 
     # moste are not required because the link is pointing to a different page and facebook will look up the info on that page
     meta_data = MetaField(
@@ -140,6 +142,9 @@ class OrderSerializer(serializers.ModelSerializer):
             url = 'get_share_url',
             )
 
+    def get_payment_status_checked(self, order):
+        return getattr(order.latest_payment, 'status_checked', None)
+
     def validate(self, attrs):
         if self.object.status == OrderStatuses.closed and attrs is not None:
             raise serializers.ValidationError(_("You cannot modify a closed Order."))
@@ -147,7 +152,8 @@ class OrderSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Order
-        fields = ('id', 'url', 'total', 'status', 'recurring', 'donations', 'vouchers', 'payments', 'created', 'meta_data')
+        fields = ('id', 'url', 'total', 'status', 'recurring', 'donations', 'vouchers', 'payments', 'created',
+                  'meta_data', 'payment_status_checked')
 
 
 class RecurringOrderSerializer(serializers.ModelSerializer):
@@ -12,7 +12,7 @@ from bluebottle.bluebottle_utils.tests import UserTestsMixin
 from apps.projects.tests import ProjectTestsMixin
 from apps.projects.models import Project
 from rest_framework import status
-from ..models import Order, OrderStatuses, DonationStatuses, RecurringDirectDebitPayment
+from ..models import Order, OrderStatuses, DonationStatuses, RecurringDirectDebitPayment, MonthlyDonationJournal
 
 
 class CartApiIntegrationTest(ProjectTestsMixin, UserTestsMixin, TestCase):
@@ -489,6 +489,33 @@ class RecurringPaymentTest(UserTestsMixin, TestCase):
         self.assertEqual(len(recurring_payment), 0)
 
 
+class MonthlyDonationJournalTest(UserTestsMixin, TestCase):
+    def setUp(self):
+        self.recurring_payment = RecurringDirectDebitPayment.objects.create(
+            user=self.create_user(), active=True, name="ABC", city="DEF", account=123)
+
+    def test_claim_once_per_run(self):
+        entry = MonthlyDonationJournal.claim('2013-11', self.recurring_payment)
+        self.assertEqual(entry.status, MonthlyDonationJournal.Statuses.started)
+
+        # The payment has been started so a rerun of the same month skips it.
+        self.assertIsNone(MonthlyDonationJournal.claim('2013-11', self.recurring_payment))
+        entry.finish(MonthlyDonationJournal.Statuses.processed)
+        self.assertIsNone(MonthlyDonationJournal.claim('2013-11', self.recurring_payment))
+
+        # The next month is a new run.
+        self.assertIsNotNone(MonthlyDonationJournal.claim('2013-12', self.recurring_payment))
+
+    def test_claim_failed_again(self):
+        entry = MonthlyDonationJournal.claim('2013-11', self.recurring_payment)
+        entry.finish(MonthlyDonationJournal.Statuses.failed, "Problem starting payment.")
+
+        entry = MonthlyDonationJournal.claim('2013-11', self.recurring_payment)
+        self.assertEqual(entry.status, MonthlyDonationJournal.Statuses.started)
+        self.assertEqual(entry.message, '')
+        self.assertIsNone(MonthlyDonationJournal.claim('2013-11', self.recurring_payment))
+
+
 class RecurringOrderApiTest(ProjectTestsMixin, TestCase):
 
     def setUp(self):
@@ -56,15 +56,6 @@ class OrderDetail(generics.RetrieveUpdateAPIView):
     serializer_class = OrderSerializer
     permission_classes = (IsOrderCreator,)
 
-    def get_object(self, queryset=None):
-        order = super(OrderDetail, self).get_object(queryset=queryset)
-        # Do a status check with DocData when we don't know the status of in_progress orders.
-        if order and order.id and order.status == OrderStatuses.current and order.recurring == False:
-            latest_payment = order.latest_payment
-            if latest_payment.payment_order_id and latest_payment.status == PaymentStatuses.in_progress:
-                payments.update_payment_status(order.latest_payment)
-        return order
-
 
 class NestedDonationMixin(object):
     model = Donation
@@ -165,16 +156,6 @@ class RecurringOrderDetail(generics.RetrieveUpdateAPIView):
         else:
             return qs.filter(user=user)
 
-    def get_object(self, queryset=None):
-        order = super(RecurringOrderDetail, self).get_object(queryset=queryset)
-
-        # Do a status check with DocData when we don't know the status of in_progress orders.
-        if order and order.status == OrderStatuses.recurring and order.recurring == True:
-            latest_payment = order.latest_payment
-            if latest_payment.payment_order_id and latest_payment.status == PaymentStatuses.in_progress:
-                payments.update_payment_status(order.latest_payment)
-        return order
-
 
 class RecurringDonationList(generics.ListCreateAPIView):
     model = Donation
@@ -413,11 +394,6 @@ class OrderCurrentDetail(CurrentOrderMixin, generics.RetrieveUpdateAPIView):
         if not self.request.user.is_authenticated() and 'recurring' in self.request.DATA and self.request.DATA['recurring']:
             raise exceptions.PermissionDenied(_("Anonymous users are not permitted to create recurring orders."))
 
-        # Only try to update the status if we're not using the 'current' alias and the statuses match our expectations.
-        if alias != 'current':
-            if order.status == OrderStatuses.current and order.latest_payment.payment_order_id and order.latest_payment.status == PaymentStatuses.in_progress:
-                payments.update_payment_status(order.latest_payment)
-
         return order
 
 
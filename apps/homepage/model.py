@@ -1,12 +1,37 @@
+import random
+import time
+
+from django.core.cache import cache
+from django.utils.datastructures import SortedDict
 from django.utils.timezone import now
 
+from apps.apicache import get_generations
 from apps.banners.models import Slide
 from apps.campaigns.models import Campaign
 from apps.fundraisers.models import FundRaiser
 from apps.projects.models import Project
+from apps.projects.serializers import ProjectPreviewSerializer
 from apps.quotes.models import Quote
 from apps.statistics.models import Statistic
 
+from .serializers import HomePageSerializer
+
+
+# The homepage snapshot of a language is rebuilt when it's older than this many seconds or when one of the models it
+# depends on changed.
+HOMEPAGE_SNAPSHOT_TTL = 60
+
+# Stale snapshots are kept this long so they can be served while another process rebuilds them.
+HOMEPAGE_SNAPSHOT_STALE_TIMEOUT = 60 * 60
+
+# The lock expires after this many seconds in case the process that rebuilds the snapshot dies.
+HOMEPAGE_SNAPSHOT_LOCK_TIMEOUT = 30
+
+HOMEPAGE_PROJECT_COUNT = 4
+
+HOMEPAGE_MODELS = ('quotes.quote', 'banners.slide', 'statistics.statistic', 'projects.project', 'campaigns.campaign',
+                   'fundraisers.fundraiser')
+
 
 # Instead of serving all the objects separately we combine Slide, Quote and Stats into a dummy object
 
@@ -16,24 +41,77 @@ class HomePage(object):
         self.id = 1
         self.quotes= Quote.objects.published().filter(language=language)
         self.slides = Slide.objects.published().filter(language=language)
-        stats = Statistic.objects.order_by('-creation_date').all()
+        stats = Statistic.objects.order_by('-creation_date')[:1]
         if len(stats) > 0:
             self.stats = stats[0]
         else:
             self.stats = None
-        projects = Project.objects.filter(phase='campaign').order_by('?')
-        if len(projects) > 4:
-            self.projects = projects[0:4]
-        elif len(projects) > 0:
-            self.projects = projects[0:len(projects)]
-        else:
-            self.projects = None
+
+        # The projects are picked at random for each request from the ids of all campaign projects.
+        self.projects = None
+        self.project_ids = list(Project.objects.filter(phase='campaign').values_list('id', flat=True))
 
         try:
             self.campaign = Campaign.objects.get(start__lte=now(), end__gte=now())
             # NOTE: MultipleObjectsReturned is not caught yet!
-            self.fundraisers = FundRaiser.objects.filter(project__is_campaign=True).order_by('?')
+            self.fundraisers = FundRaiser.objects.filter(project__is_campaign=True)
         except Campaign.DoesNotExist:
             self.campaign, self.fundraisers = None, None
 
-        return self
\ No newline at end of file
+        return self
+
+
+def _build_snapshot(language):
+    generations = get_generations(HOMEPAGE_MODELS)
+    homepage = HomePage().get(language)
+    return {
+        'expires': time.time() + HOMEPAGE_SNAPSHOT_TTL,
+        'generations': generations,
+        'data': SortedDict(HomePageSerializer().to_native(homepage)),
+        'project_ids': homepage.project_ids,
+    }
+
+
+def get_snapshot(language):
+    """
+    Returns the serialized homepage of the language and the ids of the campaign projects. The snapshot is cached; when
+    it has expired only the process that gets the lock rebuilds it, the others keep serving the stale snapshot.
+    """
+    key = 'homepage:snapshot:{0}'.format(language)
+    snapshot = cache.get(key)
+    if snapshot and snapshot['expires'] > time.time() and snapshot['generations'] == get_generations(HOMEPAGE_MODELS):
+        return snapshot
+
+    lock_key = key + ':lock'
+    if not cache.add(lock_key, 1, HOMEPAGE_SNAPSHOT_LOCK_TIMEOUT):
+        if snapshot:
+            return snapshot
+        # Nothing to serve yet while another process builds the first snapshot.
+        return _build_snapshot(language)
+
+    try:
+        snapshot = _build_snapshot(language)
+        cache.set(key, snapshot, HOMEPAGE_SNAPSHOT_STALE_TIMEOUT)
+    finally:
+        cache.delete(lock_key)
+    return snapshot
+
+
+def get_homepage_data(language):
+    """ The serialized homepage with a random pick of the campaign projects and the fundraisers in random order. """
+    snapshot = get_snapshot(language)
+    data = snapshot['data'].copy()
+
+    project_ids = random.sample(snapshot['project_ids'], min(HOMEPAGE_PROJECT_COUNT, len(snapshot['project_ids'])))
+    if project_ids:
+        projects = Project.objects.filter(id__in=project_ids)
+        projects = projects.select_related('projectplan__country__subregion', 'projectcampaign')
+        projects = dict((project.id, project) for project in Project.objects.with_counts(projects))
+        projects = [projects[project_id] for project_id in project_ids if project_id in projects]
+        data['projects'] = ProjectPreviewSerializer(projects, many=True).data or None
+    else:
+        data['projects'] = None
+
+    if data['fundraisers']:
+        data['fundraisers'] = random.sample(data['fundraisers'], len(data['fundraisers']))
+    return data
@@ -1,6 +1,7 @@
 from datetime import timedelta
 
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
 from django.utils import timezone
 from django.utils.text import slugify
@@ -41,6 +42,24 @@ class HomepageTestCase(FundRaiserTestsMixin, ProjectTestsMixin, TestCase):
         self.assertTrue(project['is_campaign'])
 
 
+    def test_homepage_snapshot(self):
+        """ The homepage is served from a snapshot and doesn't pick random projects in the database. """
+        response = self.client.get(self.homepage_url)
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+
+        connection.use_debug_cursor = True
+        start = len(connection.queries)
+        try:
+            response = self.client.get(self.homepage_url)
+        finally:
+            connection.use_debug_cursor = None
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertEquals(response.data['projects'][0]['id'], self.project.slug)
+
+        queries = [query['sql'] for query in connection.queries[start:]]
+        self.assertFalse([sql for sql in queries if 'RANDOM' in sql.upper()])
+        self.assertFalse([sql for sql in queries if 'quotes_quote' in sql or 'banners_slide' in sql])
+
     def test_homepage_with_campaign(self):
         now = timezone.now()
         start, end = now - timedelta(hours=8), now + timedelta(weeks=1)
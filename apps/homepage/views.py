@@ -1,4 +1,4 @@
-from apps.homepage.model import HomePage
+from apps.homepage.model import get_homepage_data
 from rest_framework import generics, response
 from .serializers import HomePageSerializer
 
@@ -8,8 +8,6 @@ class HomePageDetail(generics.GenericAPIView):
     serializer_class = HomePageSerializer
 
     def get(self, request, language='en'):
-        homepage = HomePage().get(language)
-        serialized = HomePageSerializer().to_native(homepage)
-        return response.Response(serialized)
+        return response.Response(get_homepage_data(language))
 
 
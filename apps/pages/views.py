@@ -3,6 +3,7 @@ from apps.pages.serializers import ContactMessageSerializer
 from django.core.exceptions import ObjectDoesNotExist
 from django.http.response import Http404
 from rest_framework import generics
+from apps.apicache import ResponseCacheMixin
 from .models import Page
 from .serializers import PageSerializer
 from django.utils.timezone import now
@@ -11,11 +12,12 @@ from django.utils.translation import ugettext as _
 
 
 
-class PageList(generics.ListAPIView):
+class PageList(ResponseCacheMixin, generics.ListAPIView):
     model = Page
     serializer_class = PageSerializer
     paginate_by = 10
     filter_fields = ('language', 'slug')
+    cache_models = ('pages.page',)
 
     def get_queryset(self):
         qs = super(PageList, self).get_queryset()
@@ -25,9 +27,10 @@ class PageList(generics.ListAPIView):
         return qs
 
 
-class PageDetail(generics.RetrieveAPIView):
+class PageDetail(ResponseCacheMixin, generics.RetrieveAPIView):
     model = Page
     serializer_class = PageSerializer
+    cache_models = ('pages.page',)
 
     def get_queryset(self):
         qs = super(PageDetail, self).get_queryset()
@@ -0,0 +1,176 @@
+"""
+Keyset (cursor) pagination for DRF list views.
+
+Page number pagination needs a COUNT(*) and an OFFSET, both of which get slower as tables like donations and wallposts
+grow. List views that mix in CursorPaginationMixin can also be paginated with an opaque cursor: requesting the list
+with a 'cursor' query parameter (empty for the first page) returns the page after the cursor and links to the next and
+previous pages, without a count. Each page is a single indexed query regardless of how deep it is.
+
+The cursor encodes the values of the ordering fields of the last (or first) object on the page. The primary key is
+always added as the last ordering field so the ordering is unique. Objects with NULL values in an ordering field are
+left out in cursor mode because they can't be compared.
+"""
+import base64
+import datetime
+import json
+
+from django.db.models import Q
+from django.http import Http404
+from django.utils.translation import ugettext as _
+from rest_framework import pagination, serializers
+from rest_framework.templatetags.rest_framework import replace_query_param
+
+
+class CursorPage(object):
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+
+class CursorField(serializers.Field):
+    cursor_attr = None
+    cursor_query_param = 'cursor'
+
+    def to_native(self, value):
+        cursor = getattr(value, self.cursor_attr)
+        if cursor is None:
+            return None
+        request = self.context.get('request')
+        url = request and request.build_absolute_uri() or ''
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+
+class NextCursorField(CursorField):
+    cursor_attr = 'next_cursor'
+
+
+class PreviousCursorField(CursorField):
+    cursor_attr = 'previous_cursor'
+
+
+class CursorPaginationSerializer(pagination.BasePaginationSerializer):
+    next = NextCursorField(source='*')
+    previous = PreviousCursorField(source='*')
+
+
+def _lookup_field(model, path):
+    """ Returns the model field for a (related) lookup path like 'projectcampaign__deadline'. """
+    field = None
+    for name in path.split('__'):
+        field, field_model, direct, m2m = model._meta.get_field_by_name(name)
+        if not direct:
+            # Reverse relation (e.g. the 'projectcampaign' of a project).
+            model = field.model
+        elif field.rel:
+            model = field.rel.to
+    return field
+
+
+def _lookup_value(obj, path):
+    for name in path.split('__'):
+        obj = getattr(obj, name)
+    return obj
+
+
+class CursorPaginationMixin(object):
+    """
+    Adds opt-in cursor pagination to a DRF list view. The view defines the ordering with cursor_ordering or
+    get_cursor_ordering(), using the ordering syntax of QuerySet.order_by().
+    """
+    cursor_query_param = 'cursor'
+    cursor_ordering = ('-created',)
+
+    def get_cursor_ordering(self):
+        return self.cursor_ordering
+
+    def _full_cursor_ordering(self, model):
+        ordering = list(self.get_cursor_ordering())
+        pk_name = model._meta.pk.name
+        if ordering[-1].lstrip('-') != pk_name:
+            ordering.append('-' + pk_name if ordering[0].startswith('-') else pk_name)
+        return ordering
+
+    def _encode_cursor(self, obj, ordering, reverse):
+        values = []
+        for key in ordering:
+            value = _lookup_value(obj, key.lstrip('-'))
+            if isinstance(value, (datetime.datetime, datetime.date)):
+                value = value.isoformat()
+            values.append(value)
+        return base64.urlsafe_b64encode(json.dumps({'v': values, 'r': reverse}, default=unicode))
+
+    def _decode_cursor(self, cursor, ordering, model):
+        try:
+            data = json.loads(base64.urlsafe_b64decode(str(cursor)))
+            values = [_lookup_field(model, key.lstrip('-')).to_python(value)
+                      for key, value in zip(ordering, data['v'])]
+            if len(values) != len(ordering):
+                raise ValueError()
+            return values, bool(data.get('r'))
+        except Exception:
+            raise Http404(_("Invalid cursor."))
+
+    def _keyset_filter(self, ordering, values, reverse):
+        """ Builds the lexicographic 'after the cursor' condition for the ordering. """
+        keyset = Q()
+        for i, key in enumerate(ordering):
+            descending = key.startswith('-') != reverse
+            condition = Q(**{'{0}__{1}'.format(key.lstrip('-'), 'lt' if descending else 'gt'): values[i]})
+            for previous_key, value in zip(ordering[:i], values[:i]):
+                condition &= Q(**{previous_key.lstrip('-'): value})
+            keyset |= condition
+        return keyset
+
+    def paginate_queryset(self, queryset, page_size=None):
+        if self.cursor_query_param not in self.request.QUERY_PARAMS:
+            return super(CursorPaginationMixin, self).paginate_queryset(queryset, page_size)
+
+        page_size = page_size or self.get_paginate_by()
+        ordering = self._full_cursor_ordering(queryset.model)
+        for key in ordering:
+            queryset = queryset.filter(**{'{0}__isnull'.format(key.lstrip('-')): False})
+
+        cursor = self.request.QUERY_PARAMS.get(self.cursor_query_param)
+        reverse = False
+        if cursor:
+            values, reverse = self._decode_cursor(cursor, ordering, queryset.model)
+            queryset = queryset.filter(self._keyset_filter(ordering, values, reverse))
+
+        if reverse:
+            queryset = queryset.order_by(*[key[1:] if key.startswith('-') else '-' + key for key in ordering])
+        else:
+            queryset = queryset.order_by(*ordering)
+
+        # Fetch one extra object to find out if there's another page without counting.
+        object_list = list(queryset[:page_size + 1])
+        has_more = len(object_list) > page_size
+        object_list = object_list[:page_size]
+        if reverse:
+            object_list.reverse()
+
+        if not object_list:
+            return CursorPage(object_list)
+
+        if reverse:
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+
+        next_cursor = previous_cursor = None
+        if has_next:
+            next_cursor = self._encode_cursor(object_list[-1], ordering, False)
+        if has_previous:
+            previous_cursor = self._encode_cursor(object_list[0], ordering, True)
+        return CursorPage(object_list, next_cursor, previous_cursor)
+
+    def get_pagination_serializer(self, page):
+        if not isinstance(page, CursorPage):
+            return super(CursorPaginationMixin, self).get_pagination_serializer(page)
+
+        class SerializerClass(CursorPaginationSerializer):
+            class Meta:
+                object_serializer_class = self.get_serializer_class()
+
+        return SerializerClass(instance=page, context=self.get_serializer_context())
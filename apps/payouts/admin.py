@@ -1,8 +1,8 @@
 import logging
-from apps.payouts.models import create_sepa_xml
+from apps.payouts.models import iter_sepa_xml
 from django.core.exceptions import PermissionDenied
 from django.core.urlresolvers import reverse
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django.utils.translation import ugettext as _
 from .models import BankMutation, BankMutationLine
@@ -75,10 +75,9 @@ class PayoutAdmin(admin.ModelAdmin):
         objs = queryset.all()
         if not request.user.is_staff:
             raise PermissionDenied
-        response = HttpResponse(mimetype='text/xml')
+        response = StreamingHttpResponse(iter_sepa_xml(objs), content_type='text/xml')
         date = timezone.datetime.strftime(timezone.now(), '%Y%m%d%H%I%S')
         response['Content-Disposition'] = 'attachment; filename=payments_sepa%s.xml' % date
-        response.write(create_sepa_xml(objs))
         return response
 
     export_sepa.short_description = "Export SEPA file."
@@ -101,7 +100,7 @@ class BankMutationAdmin(admin.ModelAdmin):
 
     debit_lines.allow_tags = True
 
-    readonly_fields = ['debit_lines', 'credit_lines']
+    readonly_fields = ['debit_lines', 'credit_lines', 'matched_count', 'unmatched_count', 'duplicate_count']
     fields = readonly_fields + ['mut_file', ]
 
 admin.site.register(BankMutation, BankMutationAdmin)
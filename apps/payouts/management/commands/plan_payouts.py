@@ -0,0 +1,39 @@
+import logging
+from optparse import make_option
+from django.core.management.base import BaseCommand
+from ...models import plan_payouts
+
+logger = logging.getLogger(__name__)
+
+
+#
+# Run with:
+# ./manage.py plan_payouts -v 2 [--dry-run] --settings=bluebottle.settings.local (or .production etc.)
+#
+
+class Command(BaseCommand):
+    help = 'Create the payouts of the projects that have reached the act phase and plan them for the next batch.'
+    requires_model_validation = True
+
+    verbosity_loglevel = {
+        '0': logging.ERROR,    # 0 means no output.
+        '1': logging.WARNING,  # 1 means normal output (default).
+        '2': logging.INFO,     # 2 means verbose output.
+        '3': logging.DEBUG     # 3 means very verbose output.
+    }
+
+    option_list = BaseCommand.option_list + (
+        make_option('--dry-run', action='store_true', dest='dry_run', default=False,
+                    help="Only count the payouts that would be created."),
+    )
+
+    def handle(self, *args, **options):
+        # Setup the log level for root logger.
+        loglevel = self.verbosity_loglevel.get(options['verbosity'])
+        logger.setLevel(loglevel)
+
+        payouts_created = plan_payouts(dry_run=options['dry_run'])
+        if options['dry_run']:
+            logger.info("{0} payouts would be created.".format(payouts_created))
+        else:
+            logger.info("{0} payouts were created.".format(payouts_created))
@@ -1,13 +1,16 @@
-from apps.projects.models import Project, ProjectPhases
+import datetime
+import decimal
+import itertools
+
+from apps.projects.models import Project, ProjectPhases, ProjectCampaign
 from apps.sepa.sepa import SepaDocument, SepaAccount
 from django.conf import settings
 from django.utils import timezone
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Count, Sum
 from django.utils.translation import ugettext as _
 from django_extensions.db.fields import ModificationDateTimeField, CreationDateTimeField
 from djchoices import DjangoChoices, ChoiceItem
-from django.db.models.signals import post_save
-from django.dispatch import receiver
 import csv
 
 
@@ -103,107 +106,201 @@ class BankMutationLine(models.Model):
 
 
 
+# The lines of a mutation file are saved in chunks of this many lines.
+BANK_MUTATION_CHUNK_SIZE = 500
+
+# A line with the same values for these fields as a line that has been imported before is a duplicate.
+BANK_MUTATION_LINE_KEY = ('issuer_account_number', 'start_date', 'dc', 'amount', 'account_number',
+                          'invoice_reference', 'description_line1')
+
+
 class BankMutation(models.Model):
 
     created = CreationDateTimeField(_("Created"))
     mut_file = models.FileField(_("Uploaded mutation file"), upload_to="bank_mutations", null=True)
     mutations = models.TextField(blank=True)
 
+    # Summary of the import of the mutation file.
+    matched_count = models.PositiveIntegerField(_("Matched debit lines"), default=0)
+    unmatched_count = models.PositiveIntegerField(_("Unmatched debit lines"), default=0)
+    duplicate_count = models.PositiveIntegerField(_("Duplicate lines"), default=0)
+
+    _original_mut_file = None
+
+    def __init__(self, *args, **kwargs):
+        super(BankMutation, self).__init__(*args, **kwargs)
+        # The file is only imported when it's uploaded, not on every save of the mutation.
+        self._original_mut_file = self.mut_file.name
+
     def save(self, force_insert=False, force_update=False, using=None):
+        file_uploaded = self.pk is None or self.mut_file.name != self._original_mut_file
         super(BankMutation, self).save()
-        self.mutations = self.mut_file.read()
-        self.parse_file()
-        self.mut_file = None
-
-    def parse_file(self):
-        mutations = csv.reader(self.mut_file)
-        for m in mutations:
-            if len(m) > 1:
-                date = m[2]
-                date = date[0:4] + "-" + date[4:6] + "-" + date[6:]
-                line = BankMutationLine(issuer_account_number=m[0], currency=m[1], start_date=date, dc=m[3],
-                                        amount=m[4], account_number=m[5], account_name=m[6], transaction_type=m[8],
-                                        invoice_reference=m[10], description_line1=m[11], description_line2=m[12],
-                                        description_line3=m[13], description_line4=m[14],
-                                        bank_mutation=self)
-                line.save()
-        match_debit_mutations()
+        if self.mut_file and file_uploaded:
+            self.parse_file(self.mut_file)
+        self._original_mut_file = self.mut_file.name
+
+    def parse_file(self, mutation_file):
+        """
+        Saves the lines of the mutation file in chunks and matches the debit lines with the payouts by their invoice
+        reference. Lines that have been imported before are skipped. The matched payouts are completed afterwards.
+        """
+        payouts = dict((invoice_reference, (payout_id, project_id)) for payout_id, project_id, invoice_reference in
+                       Payout.objects.values_list('id', 'project_id', 'invoice_reference'))
+
+        # The project and date of the matched payouts.
+        matched_payouts = {}
+        imported_keys = set()
+        self.matched_count = self.unmatched_count = self.duplicate_count = 0
+
+        mutation_file.seek(0)
+        rows = (row for row in csv.reader(mutation_file) if len(row) > 1)
+        while True:
+            lines = [self.create_line(row) for row in itertools.islice(rows, BANK_MUTATION_CHUNK_SIZE)]
+            if not lines:
+                break
+
+            imported_keys.update(BankMutationLine.objects.filter(
+                start_date__in=set(line.start_date for line in lines)).values_list(*BANK_MUTATION_LINE_KEY))
+
+            new_lines = []
+            for line in lines:
+                key = tuple(getattr(line, field) for field in BANK_MUTATION_LINE_KEY)
+                if key in imported_keys:
+                    self.duplicate_count += 1
+                    continue
+                imported_keys.add(key)
+
+                if line.dc == 'D':
+                    if line.invoice_reference in payouts:
+                        line.payout_id, project_id = payouts[line.invoice_reference]
+                        matched_payouts[line.payout_id] = (project_id, line.start_date)
+                        self.matched_count += 1
+                    else:
+                        self.unmatched_count += 1
+                new_lines.append(line)
+            BankMutationLine.objects.bulk_create(new_lines)
+
+        complete_payouts(matched_payouts)
+        BankMutation.objects.filter(pk=self.pk).update(matched_count=self.matched_count,
+                                                       unmatched_count=self.unmatched_count,
+                                                       duplicate_count=self.duplicate_count)
+
+    def create_line(self, m):
+        m = [value.decode('utf-8') for value in m]
+        date = datetime.date(int(m[2][0:4]), int(m[2][4:6]), int(m[2][6:]))
+        return BankMutationLine(issuer_account_number=m[0], currency=m[1], start_date=date, dc=m[3],
+                                amount=decimal.Decimal(m[4]), account_number=m[5], account_name=m[6],
+                                transaction_type=m[8], invoice_reference=m[10], description_line1=m[11],
+                                description_line2=m[12], description_line3=m[13], description_line4=m[14],
+                                bank_mutation=self)
 
     def __unicode__(self):
         return "Bank Mutations " + str(self.created.strftime('%B %Y'))
 
 
 
-@receiver(post_save, weak=False, sender=Project)
-def create_payout_for_fully_funded_project(sender, instance, created, **kwargs):
-
-    project = instance
-    now = timezone.now()
-
-    # Check projects in phase Act that have asked for money.
-    if project.phase == ProjectPhases.act and project.projectcampaign.money_asked:
-        if now.day <= 15:
-            next_date = timezone.datetime(now.year, now.month, 15)
-        else:
-            next_date = timezone.datetime(now.year, now.month + 1, 1)
-
-        day = timezone.datetime.strftime(now, '%d%m%Y')
+def next_payout_date(now=None):
+    """ The payouts are made in batches on the 15th and the 1st of the month. """
+    now = now or timezone.now()
+    if now.day <= 15:
+        return datetime.date(now.year, now.month, 15)
+    if now.month == 12:
+        return datetime.date(now.year + 1, 1, 1)
+    return datetime.date(now.year, now.month + 1, 1)
 
-        amount = round(project.projectcampaign.money_donated * settings.PROJECT_PAYOUT_RATE)
-        try:
-            line = Payout.objects.get(project=project)
-            if line.status == Payout.PayoutLineStatuses.new:
-                line.planned = next_date
-                line.save()
-        except Payout.DoesNotExist:
-            line = Payout.objects.create(planned=next_date, project=project, status=Payout.PayoutLineStatuses.new,
-                                         amount=amount)
 
-            organization = project.projectplan.organization
-            line.receiver_account_bic = organization.account_bic
-            line.receiver_account_iban = organization.account_iban
-            line.receiver_account_number = organization.account_number
-            line.receiver_account_name = organization.account_name
-            line.receiver_account_city = organization.account_city
-            line.receiver_account_country = organization.account_bank_country
-            line.invoice_reference = 'PP'
-            line.save()
-            line.invoice_reference = str(project.id) + '-' + str(line.id)
-            line.save()
-
-
-def create_sepa_xml(payouts):
+def plan_payouts(projects=None, dry_run=False):
+    """
+    Creates the payouts of the projects in the act phase that have asked for money and don't have a payout yet (so the
+    projects that reached the act phase since the last run) and plans them for the next batch. The payouts that
+    haven't been processed yet are moved to the next batch as well. Returns the number of created payouts.
+    """
+    if projects is None:
+        projects = Project.objects.all()
+    next_date = next_payout_date()
+
+    # One joined query for the amounts and the bank details of the organizations.
+    rows = projects.filter(phase=ProjectPhases.act, projectcampaign__money_asked__gt=0,
+                           payout__isnull=True).values_list(
+        'id', 'projectcampaign__money_donated', 'projectplan__organization__account_bic',
+        'projectplan__organization__account_iban', 'projectplan__organization__account_number',
+        'projectplan__organization__account_name', 'projectplan__organization__account_city',
+        'projectplan__organization__account_bank_country__name')
+
+    payouts = []
+    for project_id, money_donated, bic, iban, number, name, city, country in rows:
+        payouts.append(Payout(planned=next_date, project_id=project_id, status=Payout.PayoutLineStatuses.new,
+                              amount=int(round(money_donated * settings.PROJECT_PAYOUT_RATE)), currency='EUR',
+                              receiver_account_bic=bic or '', receiver_account_iban=iban or '',
+                              receiver_account_number=number or '', receiver_account_name=name or '',
+                              receiver_account_city=city or '', receiver_account_country=country,
+                              invoice_reference='PP'))
+
+    if dry_run:
+        return len(payouts)
+
+    with transaction.commit_on_success():
+        Payout.objects.filter(project__in=projects, status=Payout.PayoutLineStatuses.new,
+                              planned__lt=next_date).update(planned=next_date)
+
+        Payout.objects.bulk_create(payouts)
+
+        # The invoice reference contains the id of the payout, which is only known after the payouts have been created.
+        # It's filled in for all created payouts with a single UPDATE.
+        if payouts:
+            project_ids = [payout.project_id for payout in payouts]
+            cursor = connection.cursor()
+            cursor.execute(
+                "UPDATE {table} SET invoice_reference = CAST({project} AS VARCHAR) || '-' || CAST({id} AS VARCHAR) "
+                "WHERE invoice_reference = %s AND {project} IN ({placeholders})".format(
+                    table=connection.ops.quote_name(Payout._meta.db_table),
+                    project=connection.ops.quote_name(Payout._meta.get_field('project').column),
+                    id=connection.ops.quote_name(Payout._meta.pk.column),
+                    placeholders=', '.join(['%s'] * len(project_ids))),
+                ['PP'] + project_ids)
+
+    return len(payouts)
+
+
+def iter_sepa_xml(payouts):
+    """
+    Yields the SEPA xml of the payouts in pieces. The number of payouts and their total amount are aggregated first, so
+    the payouts themselves can be iterated without loading them all.
+    """
     batch_id = timezone.datetime.strftime(timezone.now(), '%Y%m%d%H%I%S')
-    sepa = SepaDocument(type='CT')
+    sepa = SepaDocument(type='CT', bank_profile=settings.SEPA.get('bank_profile', 'rabobank'))
     debtor = SepaAccount(name=settings.SEPA['name'], iban=settings.SEPA['iban'], bic=settings.SEPA['bic'])
     sepa.set_debtor(debtor)
     sepa.set_info(message_identification=batch_id, payment_info_id=batch_id)
     sepa.set_initiating_party(name=settings.SEPA['name'], id=settings.SEPA['id'])
-    
-    for line in payouts.all():
-        creditor = SepaAccount(name=line.receiver_account_name, iban=line.receiver_account_iban,
-                               bic=line.receiver_account_bic)
-        sepa.add_credit_transfer(creditor=creditor, amount=line.amount, creditor_payment_id=line.invoice_reference)
-    return sepa.as_xml()
 
+    totals = payouts.aggregate(count=Count('id'), amount=Sum('amount'))
 
-def match_debit_mutations():
-    lines = BankMutationLine.objects.filter(dc='D', payout__isnull=True).all()
-    for line in lines:
+    def transfers():
+        lines = payouts.order_by('id').values_list('receiver_account_name', 'receiver_account_iban',
+                                                   'receiver_account_bic', 'amount', 'invoice_reference')
+        for name, iban, bic, amount, invoice_reference in lines.iterator():
+            creditor = SepaAccount(name=name, iban=iban, bic=bic)
+            yield sepa.create_credit_transfer(creditor=creditor, amount=amount, creditor_payment_id=invoice_reference)
 
-        date = line.start_date
+    return sepa.iter_xml(transfers(), totals['count'], totals['amount'] or 0)
 
-        try:
-            payout = Payout.objects.filter(invoice_reference=line.invoice_reference).get()
-            line.matched = True
-            line.payout_line = payout
-            line.save()
-            payout.status = Payout.PayoutLineStatuses.completed
-            payout.save()
 
-            payout.project.payout_date = date
-            payout.project.save()
+def create_sepa_xml(payouts):
+    return ''.join(iter_sepa_xml(payouts))
 
-        except Payout.DoesNotExist:
-            pass
 
+def complete_payouts(matched_payouts):
+    """
+    Completes the payouts of the {payout id: (project id, date)} dictionary and sets the payout date of their projects
+    with one UPDATE per distinct date.
+    """
+    if not matched_payouts:
+        return
+    Payout.objects.filter(id__in=matched_payouts.keys()).update(status=Payout.PayoutLineStatuses.completed)
+
+    project_ids_by_date = {}
+    for project_id, date in matched_payouts.values():
+        project_ids_by_date.setdefault(date, []).append(project_id)
+    for date, project_ids in project_ids_by_date.items():
+        ProjectCampaign.objects.filter(project_id__in=project_ids).update(payout_date=date)
@@ -0,0 +1,90 @@
+import datetime
+from StringIO import StringIO
+
+from django.core.files.base import ContentFile
+from django.test import TestCase
+
+from apps.projects.models import ProjectCampaign
+from apps.projects.tests import ProjectTestsMixin
+
+from .models import BankMutation, BankMutationLine, Payout, plan_payouts, next_payout_date
+
+
+class BankMutationImportTest(ProjectTestsMixin, TestCase):
+
+    def setUp(self):
+        self.project = self.create_project(money_asked=50000)
+        self.payout = Payout.objects.create(planned=datetime.date(2013, 11, 15), project=self.project,
+                                            status=Payout.PayoutLineStatuses.new, amount=47500, currency='EUR',
+                                            receiver_account_name='Nice Project', receiver_account_city='Amsterdam',
+                                            invoice_reference='{0}-1'.format(self.project.id))
+
+    def create_row(self, dc, amount, invoice_reference):
+        return ','.join(['123456789', 'EUR', '20131118', dc, amount, '987654321', 'Nice Project', '', 'ba', '',
+                         invoice_reference, 'line 1', '', '', '']) + '\n'
+
+    def test_parse_file(self):
+        mutation_file = StringIO(self.create_row('D', '475.00', self.payout.invoice_reference) +
+                                 self.create_row('D', '475.00', self.payout.invoice_reference) +
+                                 self.create_row('D', '10.00', 'unknown') +
+                                 self.create_row('C', '25.00', ''))
+
+        mutation = BankMutation()
+        mutation.save()
+        mutation.parse_file(mutation_file)
+
+        mutation = BankMutation.objects.get(pk=mutation.pk)
+        self.assertEqual(mutation.matched_count, 1)
+        self.assertEqual(mutation.unmatched_count, 1)
+        self.assertEqual(mutation.duplicate_count, 1)
+        self.assertEqual(BankMutationLine.objects.filter(bank_mutation=mutation).count(), 3)
+        self.assertEqual(BankMutationLine.objects.get(payout=self.payout).invoice_reference,
+                         self.payout.invoice_reference)
+
+        self.assertEqual(Payout.objects.get(pk=self.payout.pk).status, Payout.PayoutLineStatuses.completed)
+        self.assertEqual(ProjectCampaign.objects.get(project=self.project).payout_date.date(),
+                         datetime.date(2013, 11, 18))
+
+        # Importing the same file again only finds duplicates.
+        mutation = BankMutation()
+        mutation.save()
+        mutation.parse_file(mutation_file)
+        self.assertEqual(mutation.duplicate_count, 4)
+
+    def test_file_imported_once(self):
+        mutation = BankMutation()
+        mutation.mut_file.save('mutations.csv', ContentFile(
+            self.create_row('D', '475.00', self.payout.invoice_reference)))
+        self.assertEqual(BankMutation.objects.get(pk=mutation.pk).matched_count, 1)
+
+        # Saving the mutation again, e.g. in the admin, doesn't import the stored file again.
+        mutation = BankMutation.objects.get(pk=mutation.pk)
+        mutation.save()
+        mutation = BankMutation.objects.get(pk=mutation.pk)
+        self.assertEqual((mutation.matched_count, mutation.duplicate_count), (1, 0))
+        self.assertEqual(BankMutationLine.objects.count(), 1)
+        mutation.mut_file.delete(save=False)
+
+
+class PlanPayoutsTest(ProjectTestsMixin, TestCase):
+
+    def test_next_payout_date(self):
+        self.assertEqual(next_payout_date(datetime.datetime(2013, 11, 10)), datetime.date(2013, 11, 15))
+        self.assertEqual(next_payout_date(datetime.datetime(2013, 11, 20)), datetime.date(2013, 12, 1))
+        self.assertEqual(next_payout_date(datetime.datetime(2013, 12, 20)), datetime.date(2014, 1, 1))
+
+    def test_plan_payouts(self):
+        project = self.create_project(phase='act', money_asked=50000)
+        self.create_project(phase='campaign', money_asked=50000)
+
+        self.assertEqual(plan_payouts(dry_run=True), 1)
+        self.assertEqual(Payout.objects.count(), 0)
+
+        self.assertEqual(plan_payouts(), 1)
+        payout = Payout.objects.get(project=project)
+        self.assertEqual(payout.status, Payout.PayoutLineStatuses.new)
+        self.assertEqual(payout.planned, next_payout_date())
+        self.assertEqual(payout.invoice_reference, '{0}-{1}'.format(project.id, payout.id))
+
+        # The project already has a payout.
+        self.assertEqual(plan_payouts(), 0)
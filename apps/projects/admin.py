@@ -196,7 +196,7 @@ class ProjectAdmin(AdminImageMixin, admin.ModelAdmin):
     date_hierarchy = 'created'
     ordering = ('-created',)
     save_on_top = True
-    actions = ('set_failed', 'toggle_campaign')
+    actions = ('set_failed', 'toggle_campaign', 'plan_payouts')
 
     prepopulated_fields = {"slug": ("title",)}
 
@@ -311,6 +311,19 @@ class ProjectAdmin(AdminImageMixin, admin.ModelAdmin):
 
     toggle_campaign.short_description = _("Toggle campaign option for selected projects")
 
+    def plan_payouts(self, request, queryset):
+        from apps.payouts.models import plan_payouts
+
+        payouts_created = plan_payouts(queryset)
+
+        if payouts_created == 1:
+            message = "one payout was created."
+        else:
+            message = "{0} payouts were created.".format(payouts_created)
+        self.message_user(request, message)
+
+    plan_payouts.short_description = _("Create payouts for selected projects")
+
 admin.site.register(Project, ProjectAdmin)
 
 
@@ -0,0 +1,144 @@
+"""
+Coalescing of project saves.
+
+Saving a pitch, plan, campaign or donation saves its project again, which runs all Project post_save receivers
+(phase logging, payouts, ...) each time. A single request can easily save the same project three or four times.
+
+While a batch is active, touch_project() and set_project_phase() only record that the project needs to be saved and
+the batch saves every affected project once when it's flushed. The ProjectSaveCoalescingMiddleware runs a batch per
+request and flushes it just before the TransactionMiddleware commits; management commands can use the
+coalesce_project_saves() context manager. Without an active batch the project is saved right away.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+
+
+logger = logging.getLogger(__name__)
+
+_state = threading.local()
+
+# Saving a project can cause other projects (or the same project) to be queued again. Stop when this doesn't settle.
+MAX_FLUSH_ROUNDS = 10
+
+
+class ProjectSaveBatch(object):
+
+    def __init__(self):
+        self.projects = {}
+        self.phases = {}
+        self.queue = []
+        self.flushing = set()
+
+    def add(self, project, phase=None):
+        if phase is None and project.pk in self.flushing:
+            # The project is being saved right now, which already updates it.
+            return
+
+        if project.pk not in self.projects:
+            self.queue.append(project.pk)
+        # Keep the most recent instance of the project.
+        self.projects[project.pk] = project
+        if phase is not None:
+            self.phases[project.pk] = phase
+
+    def flush(self):
+        rounds = 0
+        while self.queue:
+            rounds += 1
+            if rounds > MAX_FLUSH_ROUNDS:
+                logger.error("Project saves didn't settle after {0} rounds, not saving projects {1}.".format(
+                    MAX_FLUSH_ROUNDS, self.queue))
+                break
+
+            queue, self.queue = self.queue, []
+            for pk in queue:
+                project = self.projects.pop(pk)
+                update_fields = ['updated']
+                if pk in self.phases:
+                    project.phase = self.phases.pop(pk)
+                    update_fields.append('phase')
+
+                self.flushing.add(pk)
+                try:
+                    # Only write the fields the batch is responsible for so an older instance of the project can't
+                    # overwrite changes that were saved in the meantime.
+                    project.save(update_fields=update_fields)
+                finally:
+                    self.flushing.discard(pk)
+
+        self.projects.clear()
+        self.phases.clear()
+        self.queue = []
+
+
+def current_batch():
+    return getattr(_state, 'batch', None)
+
+
+def start_batch():
+    """ Start a batch for the current thread. Returns False if a batch was already active. """
+    if current_batch() is not None:
+        return False
+    _state.batch = ProjectSaveBatch()
+    return True
+
+
+def flush_batch():
+    """
+    Save all projects in the current batch and end it. The batch stays active while it's flushed so the project saves
+    caused by the flush are coalesced as well.
+    """
+    batch = current_batch()
+    if batch is None:
+        return
+    try:
+        batch.flush()
+    finally:
+        _state.batch = None
+
+
+def discard_batch():
+    """ End the current batch without saving the projects in it. """
+    _state.batch = None
+
+
+@contextmanager
+def coalesce_project_saves():
+    """
+    Coalesce the project saves in the block and save each affected project once at the end. Nested blocks join the
+    outer batch.
+    """
+    if not start_batch():
+        yield current_batch()
+        return
+
+    try:
+        yield current_batch()
+    except:
+        discard_batch()
+        raise
+    else:
+        flush_batch()
+
+
+def touch_project(project):
+    """
+    Save the project to update its 'updated' field (e.g. for the Salesforce sync script). In a batch the project is
+    only saved once when the batch is flushed.
+    """
+    batch = current_batch()
+    if batch is None:
+        project.save()
+    else:
+        batch.add(project)
+
+
+def set_project_phase(project, phase):
+    """ Move the project to the phase and save it, once when the batch is flushed if a batch is active. """
+    project.phase = phase
+    batch = current_batch()
+    if batch is None:
+        project.save()
+    else:
+        batch.add(project, phase)
@@ -0,0 +1,74 @@
+import logging
+from optparse import make_option
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from apps.apicache import bump_generation
+from apps.fund.models import Donation
+from ...models import ProjectCampaign, MONEY_DONATED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+#
+# Run with:
+# ./manage.py reconcile_campaign_totals -v 2 [--fix] --settings=bluebottle.settings.local (or .production etc.)
+#
+
+class Command(BaseCommand):
+    help = 'Recount the money donated to all project campaigns and report (or fix) totals that drifted.'
+    requires_model_validation = True
+
+    verbosity_loglevel = {
+        '0': logging.ERROR,    # 0 means no output.
+        '1': logging.WARNING,  # 1 means normal output (default).
+        '2': logging.INFO,     # 2 means verbose output.
+        '3': logging.DEBUG     # 3 means very verbose output.
+    }
+
+    option_list = BaseCommand.option_list + (
+        make_option('--fix', action='store_true', dest='fix', default=False,
+                    help="Correct the campaign totals that drifted instead of only reporting them."),
+    )
+
+    def handle(self, *args, **options):
+        # Setup the log level for root logger.
+        loglevel = self.verbosity_loglevel.get(options['verbosity'])
+        logger.setLevel(loglevel)
+
+        drift = reconcile_campaign_totals(fix=options['fix'])
+        if drift and not options['fix']:
+            logger.warn("{0} campaigns have incorrect totals. Run with '--fix' to correct them.".format(len(drift)))
+
+
+@transaction.commit_on_success
+def reconcile_campaign_totals(fix=False):
+    """
+    Recount the money donated to all campaigns with one grouped query and compare it to the stored totals. Returns a
+    list of (campaign id, stored money_donated, counted money_donated) tuples for the campaigns that drifted.
+    """
+    donations = Donation.objects.filter(status__in=MONEY_DONATED_STATUSES)
+    totals = dict(donations.values_list('project').annotate(total=Sum('amount')).order_by())
+
+    drift = []
+    campaigns = ProjectCampaign.objects.values_list('id', 'project_id', 'money_asked', 'money_donated', 'money_needed')
+    for campaign_id, project_id, money_asked, money_donated, money_needed in campaigns:
+        counted = totals.get(project_id) or 0
+        needed = max(money_asked - counted, 0)
+        if counted == money_donated and needed == money_needed:
+            continue
+
+        logger.warn("Campaign {0} (project {1}) has money_donated {2}, counted {3}.".format(
+            campaign_id, project_id, money_donated, counted))
+        drift.append((campaign_id, money_donated, counted))
+
+        if fix:
+            ProjectCampaign.objects.filter(id=campaign_id).update(money_donated=counted, money_needed=needed,
+                                                                  updated=timezone.now())
+
+    if drift and fix:
+        bump_generation(ProjectCampaign)
+
+    logger.info("Checked {0} campaigns, {1} with incorrect totals.".format(len(campaigns), len(drift)))
+    return drift
@@ -0,0 +1,39 @@
+import logging
+from optparse import make_option
+from django.core.management.base import BaseCommand
+from ...popularity import rebuild_popularity_buckets, update_popularity
+
+logger = logging.getLogger(__name__)
+
+
+#
+# Run with (e.g. every 15 minutes from cron):
+# ./manage.py update_project_popularity --settings=bluebottle.settings.local (or .production etc.)
+#
+
+class Command(BaseCommand):
+    help = 'Age out old popularity buckets and recalculate the popularity of all projects.'
+    requires_model_validation = True
+
+    verbosity_loglevel = {
+        '0': logging.ERROR,    # 0 means no output.
+        '1': logging.WARNING,  # 1 means normal output (default).
+        '2': logging.INFO,     # 2 means verbose output.
+        '3': logging.DEBUG     # 3 means very verbose output.
+    }
+
+    option_list = BaseCommand.option_list + (
+        make_option('--rebuild', action='store_true', dest='rebuild', default=False,
+                    help="Rebuild the popularity buckets from the donations before recalculating the popularity."),
+    )
+
+    def handle(self, *args, **options):
+        # Setup the log level for root logger.
+        loglevel = self.verbosity_loglevel.get(options['verbosity'])
+        logger.setLevel(loglevel)
+
+        if options['rebuild']:
+            count = rebuild_popularity_buckets()
+            logger.info("Rebuilt {0} popularity buckets.".format(count))
+
+        update_popularity()
@@ -0,0 +1,21 @@
+from .coalescing import start_batch, flush_batch, discard_batch
+
+
+class ProjectSaveCoalescingMiddleware(object):
+    """
+    Coalesce the project saves of a request so each affected project is saved only once (see
+    apps.projects.coalescing). This needs to be placed after the TransactionMiddleware so the projects are saved
+    before the transaction is committed.
+    """
+    def process_request(self, request):
+        # A batch that's left over from an earlier request on this thread (e.g. when process_response wasn't called)
+        # must not be flushed in this request.
+        discard_batch()
+        start_batch()
+
+    def process_exception(self, request, exception):
+        discard_batch()
+
+    def process_response(self, request, response):
+        flush_batch()
+        return response
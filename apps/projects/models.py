@@ -2,6 +2,7 @@ import datetime
 from apps.tasks.models import Task
 from babel.numbers import format_currency
 from django.db import models
+from django.db.models import F
 from django.db.models.aggregates import Count, Sum
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -14,9 +15,12 @@ from sorl.thumbnail import ImageField
 from taggit_autocomplete_modified.managers import TaggableManagerAutocomplete as TaggableManager
 from apps.fund.models import Donation, DonationStatuses
 from django.template.defaultfilters import slugify
+from django.utils.datastructures import SortedDict
 from django.utils import timezone
+from apps.apicache import bump_generation
 from .mails import mail_project_funded_internal
 from .signals import project_funded
+from .coalescing import touch_project, set_project_phase
 
 
 class ProjectTheme(models.Model):
@@ -65,6 +69,10 @@ class ProjectPhaseLog(models.Model):
             )
 
 
+# Donations in these statuses are counted in the money donated to a project.
+MONEY_DONATED_STATUSES = (DonationStatuses.paid, DonationStatuses.pending)
+
+
 class ProjectManager(models.Manager):
 
     def order_by(self, field):
@@ -104,6 +112,25 @@ class ProjectManager(models.Manager):
         qs = super(ProjectManager, self).order_by(field)
         return qs
 
+    def with_counts(self, queryset=None):
+        """
+        Annotate the number of open tasks and supporters so serializing a list of projects doesn't need extra queries
+        for each project.
+        """
+        if queryset is None:
+            queryset = self.get_query_set()
+
+        select = SortedDict()
+        select['open_task_count'] = 'SELECT COUNT(*) FROM {task} WHERE {task}.project_id = {project}.id ' \
+                                    'AND {task}.status = %s'.format(task=Task._meta.db_table,
+                                                                    project=Project._meta.db_table)
+        select['supporter_donation_count'] = 'SELECT COUNT(*) FROM {donation} ' \
+                                             'WHERE {donation}.project_id = {project}.id ' \
+                                             'AND {donation}.status IN (%s, %s)'.format(
+                                                 donation=Donation._meta.db_table, project=Project._meta.db_table)
+        select_params = (Task.TaskStatuses.open, DonationStatuses.paid, DonationStatuses.in_progress)
+        return queryset.extra(select=select, select_params=select_params)
+
 
 class Project(models.Model):
     """ The base Project model. """
@@ -143,28 +170,12 @@ class Project(models.Model):
             return self.title
         return self.slug
 
-    def update_popularity(self):
-        last_month = timezone.now() - timezone.timedelta(days=30)
-        donations = Donation.objects.filter(status__in=[DonationStatuses.paid, DonationStatuses.pending])
-        donations = donations.exclude(donation_type='recurring')
-        donations = donations.filter(created__gte=last_month)
-
-        # For all projects.
-        total_recent_donors = len(donations)
-        total_recent_donations = donations.aggregate(sum=Sum('amount'))['sum']
-        # For this project
-        donations = donations.filter(project=self)
-        recent_donors = len(donations)
-        recent_donations = donations.aggregate(sum=Sum('amount'))['sum']
-
-        if recent_donors and recent_donations:
-            self.popularity = 50 * (float(recent_donors) / float(total_recent_donors)) + 50 * (float(recent_donations) / float(total_recent_donations))
-        else:
-            self.popularity = 0
-        self.save()
-
     @property
     def supporters_count(self, with_guests=True):
+        # The project list views annotate the count (see ProjectManager.with_counts).
+        if hasattr(self, 'supporter_donation_count'):
+            return self.supporter_donation_count
+
         # TODO: Replace this with a proper Supporters API
         # something like /projects/<slug>/donations
         donations = Donation.objects.filter(project=self)
@@ -182,7 +193,10 @@ class Project(models.Model):
 
     @property
     def task_count(self):
-        return len(self.task_set.filter(status=Task.TaskStatuses.open).all())
+        # The project list views annotate the count (see ProjectManager.with_counts).
+        if hasattr(self, 'open_task_count'):
+            return self.open_task_count
+        return self.task_set.filter(status=Task.TaskStatuses.open).count()
 
     @property
     def get_open_tasks(self):
@@ -452,8 +466,12 @@ class ProjectCampaign(models.Model):
         return total['sum']
 
     def update_money_donated(self):
+        """
+        Recalculate money_donated from all donations. Donation status changes use add_money_donated() instead, this is
+        only needed to (re)initialize the totals. See also the 'reconcile_campaign_totals' management command.
+        """
         donations = Donation.objects.filter(project=self.project)
-        donations = donations.filter(status__in=[DonationStatuses.paid, DonationStatuses.pending])
+        donations = donations.filter(status__in=MONEY_DONATED_STATUSES)
         total = donations.aggregate(sum=Sum('amount'))
         if not total['sum']:
             self.money_donated = 0
@@ -464,6 +482,35 @@ class ProjectCampaign(models.Model):
             self.money_needed = 0
         self.save()
 
+    def add_money_donated(self, amount):
+        """
+        Atomically add amount (which can be negative) to money_donated and recalculate money_needed. The queryset
+        updates with F() expressions make sure concurrent payment notifications for the same project can't overwrite
+        each other's totals, and they don't send the post_save signals of a full save().
+        """
+        if not amount:
+            return
+
+        campaigns = ProjectCampaign.objects.filter(id=self.id)
+        campaigns.update(money_donated=F('money_donated') + amount, updated=timezone.now())
+        campaigns.filter(money_donated__lt=F('money_asked')).update(money_needed=F('money_asked') - F('money_donated'))
+        campaigns.filter(money_donated__gte=F('money_asked')).update(money_needed=0)
+        self.money_donated, self.money_needed = campaigns.values_list('money_donated', 'money_needed')[0]
+
+        # Ensure the project 'updated' field is updated for the Salesforce sync script.
+        Project.objects.filter(id=self.project_id).update(updated=timezone.now())
+        bump_generation(ProjectCampaign)
+
+
+def money_donated_delta(donation, old_status, old_amount):
+    """ The change in money donated to the project of the donation caused by a status and/or amount change. """
+    delta = 0
+    if donation.status in MONEY_DONATED_STATUSES:
+        delta += donation.amount
+    if old_status in MONEY_DONATED_STATUSES:
+        delta -= old_amount
+    return delta
+
 
 class ProjectResult(models.Model):
 
@@ -539,6 +586,25 @@ class ProjectBudgetLine(models.Model):
                                    format_currency(self.amount / 100.0, self.currency, locale=language))
 
 
+class ProjectPopularityBucket(models.Model):
+    """
+    The number of donors and the amount donated to a project on a single day. The buckets of the last days form the
+    rolling window that the project popularity is calculated from (see apps.projects.popularity).
+    """
+    project = models.ForeignKey('projects.Project')
+    day = models.DateField(_("day"))
+    donors = models.IntegerField(_("donors"), default=0)
+    amount = models.IntegerField(_("amount (in cents)"), default=0)
+
+    class Meta:
+        unique_together = (('project', 'day'),)
+        verbose_name = _("popularity bucket")
+        verbose_name_plural = _("popularity buckets")
+
+    def __unicode__(self):
+        return u'{0} - {1}'.format(self.project_id, self.day)
+
+
 @receiver(post_save, weak=False, sender=Project, dispatch_uid="log-project-phase")
 def log_project_phase(sender, instance, created, **kwargs):
     """ Log the project phases when they change """
@@ -652,49 +718,35 @@ def pitch_status_status_changed(sender, instance, created, **kwargs):
     if kwargs.get('raw', False):
         return
 
-    project_saved = False
-
     # If Pitch is approved, move Project to Plan phase.
-    if instance.status == ProjectPitch.PitchStatuses.approved:
-        if instance.project.phase == ProjectPhases.pitch:
-            instance.project.phase = ProjectPhases.plan
-            instance.project.save()
+    if instance.status == ProjectPitch.PitchStatuses.approved and instance.project.phase == ProjectPhases.pitch:
+        set_project_phase(instance.project, ProjectPhases.plan)
     # plan/pitch rejected -> project failed
     elif instance.status == ProjectPitch.PitchStatuses.rejected and instance.project.phase != ProjectPhases.failed:
-        instance.project.phase = ProjectPhases.failed
-        instance.project.save()
-
-    # Ensure the project 'updated' field is updated for the Saleforce sync script.
-    if not project_saved:
-        instance.project.save()
+        set_project_phase(instance.project, ProjectPhases.failed)
+    else:
+        # Ensure the project 'updated' field is updated for the Saleforce sync script.
+        touch_project(instance.project)
 
 
 @receiver(post_save, weak=False, sender=ProjectPlan)
 def plan_status_status_changed(sender, instance, created, **kwargs):
 
-    project_saved = False
-
     # If plan is approved the move Project to Campaign phase.
-    if instance.status == ProjectPlan.PlanStatuses.approved:
-        if instance.project.phase == ProjectPhases.plan:
-            instance.project.phase = ProjectPhases.campaign
-            instance.project.save()
-            project_saved = True
+    if instance.status == ProjectPlan.PlanStatuses.approved and instance.project.phase == ProjectPhases.plan:
+        set_project_phase(instance.project, ProjectPhases.campaign)
     # plan/pitch rejected -> project failed
     elif instance.status == ProjectPlan.PlanStatuses.rejected and instance.project.phase != ProjectPhases.failed:
-        instance.project.phase = ProjectPhases.failed
-        instance.project.save()
-        project_saved = True
-
-    # Ensure the project 'updated' field is updated for the Saleforce sync script.
-    if not project_saved:
-        instance.project.save()
+        set_project_phase(instance.project, ProjectPhases.failed)
+    else:
+        # Ensure the project 'updated' field is updated for the Saleforce sync script.
+        touch_project(instance.project)
 
 
 @receiver(post_save, weak=False, sender=ProjectCampaign, dispatch_uid="update-project-after-campaign-updated")
 def update_project_after_campaign_updated(sender, instance, created, **kwargs):
     """ Ensure the project 'updated' field is updated for the Salesforce sync script. """
-    instance.project.save()
+    touch_project(instance.project)
 
 
 # Change project phase according to donated amount
@@ -704,17 +756,23 @@ def update_project_after_donation(sender, instance, created, **kwargs):
     if kwargs.get('raw', False):
         return
 
+    from .popularity import update_popularity_bucket
+
     project = instance.project
     campaign = project.projectcampaign
 
-    # Don't look at donations that are just created.
-    if instance.status not in [DonationStatuses.in_progress, DonationStatuses.new]:
-        campaign.update_money_donated()
-        project.update_popularity()
+    if created:
+        old_status, old_amount = None, 0
+    else:
+        old_status, old_amount = instance._original_status, instance._original_amount
+
+    campaign.add_money_donated(money_donated_delta(instance, old_status, old_amount))
+
+    # The popularity scores themselves are recalculated periodically by the 'update_project_popularity' command.
+    update_popularity_bucket(instance, old_status)
 
-    if campaign.money_asked <= campaign.money_donated:
-        project.phase = ProjectPhases.act
-        project.save()
+    if campaign.money_asked <= campaign.money_donated and project.phase != ProjectPhases.act:
+        set_project_phase(project, ProjectPhases.act)
     # Never (automatically) move the project back to Campaign phase.
     #else:
     #    project.phase = ProjectPhases.campaign
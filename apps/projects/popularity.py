@@ -0,0 +1,132 @@
+"""
+Incremental project popularity.
+
+The popularity of a project is based on the number of donors and the amount donated to it in the last
+POPULARITY_WINDOW_DAYS days, relative to all donations in that period. Instead of counting all recent donations each
+time a donation changes, every donation status change adds (or removes) its donor and amount to a daily
+ProjectPopularityBucket of its project. The 'update_project_popularity' management command periodically removes the
+buckets that fell out of the window and recalculates the scores of all projects with one grouped query.
+"""
+import datetime
+import logging
+
+from django.db import transaction, IntegrityError
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from apps.apicache import bump_generation
+from apps.fund.models import Donation, DonationStatuses
+
+from .models import Project, ProjectPopularityBucket
+
+
+logger = logging.getLogger(__name__)
+
+POPULARITY_WINDOW_DAYS = 30
+
+# Donations in these statuses count for the popularity of a project.
+POPULARITY_DONATION_STATUSES = (DonationStatuses.paid, DonationStatuses.pending)
+
+
+def _local_date(value):
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date()
+
+
+def window_start():
+    """ The first day that is part of the popularity window. """
+    return _local_date(timezone.now()) - datetime.timedelta(days=POPULARITY_WINDOW_DAYS)
+
+
+def _add_to_bucket(project_id, day, donors, amount):
+    buckets = ProjectPopularityBucket.objects.filter(project_id=project_id, day=day)
+    if buckets.update(donors=F('donors') + donors, amount=F('amount') + amount):
+        return
+
+    # Only create buckets for donations that are added. A removed donation without a bucket was already aged out.
+    if donors < 0:
+        return
+
+    sid = transaction.savepoint()
+    try:
+        ProjectPopularityBucket.objects.create(project_id=project_id, day=day, donors=donors, amount=amount)
+        transaction.savepoint_commit(sid)
+    except IntegrityError:
+        # Another process created the bucket in the meantime.
+        transaction.savepoint_rollback(sid)
+        buckets.update(donors=F('donors') + donors, amount=F('amount') + amount)
+
+
+def update_popularity_bucket(donation, old_status):
+    """
+    Add or remove the donation to the popularity bucket of its project when it changes from or to a status that counts
+    for the popularity. This is a constant number of queries regardless of the number of donations.
+    """
+    if donation.donation_type == Donation.DonationTypes.recurring:
+        return
+
+    counted_before = old_status in POPULARITY_DONATION_STATUSES
+    counted_now = donation.status in POPULARITY_DONATION_STATUSES
+    if counted_before == counted_now:
+        return
+
+    day = _local_date(donation.created or timezone.now())
+    if day < window_start():
+        return
+
+    if counted_now:
+        _add_to_bucket(donation.project_id, day, 1, donation.amount)
+    else:
+        _add_to_bucket(donation.project_id, day, -1, -donation.amount)
+
+
+@transaction.commit_on_success
+def rebuild_popularity_buckets():
+    """ Rebuild all popularity buckets from the donations in the popularity window. """
+    start = window_start()
+    donations = Donation.objects.filter(status__in=POPULARITY_DONATION_STATUSES)
+    donations = donations.exclude(donation_type=Donation.DonationTypes.recurring)
+    donations = donations.filter(created__gte=timezone.now() - datetime.timedelta(days=POPULARITY_WINDOW_DAYS + 1))
+
+    buckets = {}
+    for project_id, created, amount in donations.values_list('project_id', 'created', 'amount').iterator():
+        day = _local_date(created)
+        if day < start:
+            continue
+        bucket = buckets.setdefault((project_id, day), ProjectPopularityBucket(project_id=project_id, day=day))
+        bucket.donors += 1
+        bucket.amount += amount
+
+    ProjectPopularityBucket.objects.all().delete()
+    ProjectPopularityBucket.objects.bulk_create(buckets.values())
+    return len(buckets)
+
+
+@transaction.commit_on_success
+def update_popularity():
+    """
+    Age out the buckets that are no longer part of the popularity window and recalculate the popularity of all
+    projects. Returns the number of projects with a non-zero popularity.
+    """
+    ProjectPopularityBucket.objects.filter(day__lt=window_start()).delete()
+
+    totals = ProjectPopularityBucket.objects.values('project_id').annotate(donors=Sum('donors'), amount=Sum('amount'))
+    totals = [t for t in totals if t['donors'] > 0 and t['amount'] > 0]
+
+    total_donors = sum(t['donors'] for t in totals)
+    total_amount = sum(t['amount'] for t in totals)
+
+    scores = {}
+    for t in totals:
+        scores[t['project_id']] = 50 * (float(t['donors']) / total_donors) + \
+                                  50 * (float(t['amount']) / total_amount)
+
+    # Queryset updates don't send post_save signals so this doesn't trigger the project save cascade.
+    Project.objects.exclude(id__in=scores.keys()).exclude(popularity=0).update(popularity=0)
+    for project_id, popularity in scores.items():
+        Project.objects.filter(id=project_id).update(popularity=popularity)
+    bump_generation(Project)
+
+    logger.info("Updated popularity of {0} projects.".format(len(scores)))
+    return len(scores)
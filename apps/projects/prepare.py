@@ -1,4 +1,5 @@
 from apps.projects.models import Project, ProjectPhases
+from apps.projects.popularity import rebuild_popularity_buckets, update_popularity
 from apps.projects.serializers import ProjectPreviewSerializer
 
 
@@ -9,10 +10,12 @@ def prepare_money_donated():
     for project in projects:
         try:
             project.projectcampaign.update_money_donated()
-            project.update_popularity()
         except Exception:
             pass
 
+    rebuild_popularity_buckets()
+    update_popularity()
+
 
 def prepare_project_images():
     projects = Project.objects.exclude(phase__in=[ProjectPhases.pitch, ProjectPhases.failed]).all()
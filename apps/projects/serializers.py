@@ -123,6 +123,7 @@ class ProjectSerializer(serializers.ModelSerializer):
     campaign = ProjectCampaignSerializer(source='projectcampaign')
 
     task_count = serializers.IntegerField(source='task_count')
+    supporters_count = serializers.IntegerField(source='supporters_count', read_only=True)
 
     meta_data = MetaField(
             title = 'get_meta_title',
@@ -140,7 +141,7 @@ class ProjectSerializer(serializers.ModelSerializer):
         model = Project
         fields = (
             'id', 'created', 'title', 'owner', 'coach', 'plan', 'campaign', 'phase', 'popularity',
-            'task_count', 'meta_data', 'is_campaign',
+            'task_count', 'supporters_count', 'meta_data', 'is_campaign',
         )
 
 
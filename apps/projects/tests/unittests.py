@@ -1,6 +1,8 @@
 import json
 from decimal import Decimal
 
+from django.db import connection
+from django.db.models.signals import post_save
 from django.test import TestCase, RequestFactory
 from django.contrib.contenttypes.models import ContentType
 from rest_framework import status
@@ -9,7 +11,11 @@ from bluebottle.bluebottle_utils.tests import UserTestsMixin, generate_random_sl
 from apps.organizations.tests import OrganizationTestsMixin
 from apps.wallposts.models import TextWallPost
 from apps.fund.models import DonationStatuses, Donation, Order
-from apps.projects.models import ProjectPlan, ProjectCampaign
+from apps.projects.models import ProjectPlan, ProjectCampaign, ProjectPopularityBucket
+from apps.projects.popularity import update_popularity
+from apps.projects.management.commands.reconcile_campaign_totals import reconcile_campaign_totals
+from apps.projects.coalescing import coalesce_project_saves, current_batch, start_batch, discard_batch
+from apps.projects.middleware import ProjectSaveCoalescingMiddleware
 
 from ..models import Project, ProjectPhases, ProjectPitch
 
@@ -150,6 +156,73 @@ class ProjectApiIntegrationTest(ProjectTestsMixin, TestCase):
         response = self.client.get(self.projects_url + '?ordering=deadline&phase=campaign&country=101')
         self.assertEquals(response.status_code, 200)                                   
 
+    def test_project_preview_list_query_count(self):
+        """
+        The number of queries for a page of project previews shouldn't depend on the number of projects on the page.
+        """
+        counts = []
+        for page_size in (2, 20):
+            connection.use_debug_cursor = True
+            start = len(connection.queries)
+            try:
+                response = self.client.get('/api/projects/previews/', {'page_size': page_size})
+            finally:
+                connection.use_debug_cursor = None
+            self.assertEquals(response.status_code, status.HTTP_200_OK)
+            self.assertEquals(len(response.data['results']), page_size)
+            counts.append(len(connection.queries) - start)
+
+        self.assertEquals(counts[0], counts[1])
+
+    def test_project_preview_list_cursor_pagination(self):
+        """ Walk through the project previews with cursors, forwards and backwards. """
+        response = self.client.get('/api/projects/previews/', {'cursor': '', 'page_size': 10})
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertFalse('count' in response.data)
+        self.assertEquals(response.data['previous'], None)
+
+        pages = [[p['id'] for p in response.data['results']]]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            self.assertEquals(response.status_code, status.HTTP_200_OK)
+            pages.append([p['id'] for p in response.data['results']])
+
+        ids = [pk for page in pages for pk in page]
+        self.assertEquals(len(ids), 26)
+        self.assertEquals(len(set(ids)), 26)
+        self.assertEquals([len(page) for page in pages], [10, 10, 6])
+
+        # Going back from the last page returns the page before it.
+        response = self.client.get(response.data['previous'])
+        self.assertEquals([p['id'] for p in response.data['results']], pages[1])
+
+        response = self.client.get('/api/projects/previews/', {'cursor': 'garbage'})
+        self.assertEquals(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_project_preview_list_cache(self):
+        """ Anonymous preview requests are cached until a project changes. """
+        url = '/api/projects/previews/'
+        params = {'ordering': 'title', 'page_size': 5}
+        response = self.client.get(url, params)
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        first = response.data['results'][0]
+
+        connection.use_debug_cursor = True
+        start = len(connection.queries)
+        try:
+            response = self.client.get(url, params)
+        finally:
+            connection.use_debug_cursor = None
+        self.assertEquals(len(connection.queries) - start, 0)
+        self.assertEquals(response.data['results'][0], first)
+
+        project = Project.objects.get(slug=first['id'])
+        project.title = 'zzzz'
+        project.save()
+
+        response = self.client.get(url, params)
+        self.assertNotEquals(response.data['results'][0]['id'], first['id'])
+
     def test_project_detail_view(self):
         """ Tests retrieving a project detail from the API. """
 
@@ -604,6 +677,36 @@ class CalculateProjectMoneyDonatedTest(ProjectTestsMixin, TestCase):
         second_donation.status = DonationStatuses.pending
         second_donation.save()
         self.assertEqual(self.some_project.projectcampaign.money_donated, 4000)
+        self.assertEqual(self.some_project.projectcampaign.money_needed, 496000)
+
+        # Changing the amount of a paid donation should update money donated with the difference.
+        first_donation.amount = 1000
+        first_donation.save()
+        self.assertEqual(self.some_project.projectcampaign.money_donated, 3500)
+
+        # Setting the second donation to status 'failed' money donated should be 1000
+        second_donation.status = DonationStatuses.failed
+        second_donation.save()
+        self.assertEqual(self.some_project.projectcampaign.money_donated, 1000)
+
+        # The totals are stored in the database too.
+        campaign = ProjectCampaign.objects.get(project=self.some_project)
+        self.assertEqual(campaign.money_donated, 1000)
+        self.assertEqual(campaign.money_needed, 499000)
+
+    def test_reconcile_campaign_totals(self):
+        self._create_donation(user=self.some_user, project=self.some_project, amount=1500,
+                              status=DonationStatuses.paid)
+
+        ProjectCampaign.objects.filter(project=self.some_project).update(money_donated=0, money_needed=500000)
+        drift = reconcile_campaign_totals()
+        self.assertEqual(drift, [(self.some_project.projectcampaign.id, 0, 1500)])
+
+        reconcile_campaign_totals(fix=True)
+        campaign = ProjectCampaign.objects.get(project=self.some_project)
+        self.assertEqual(campaign.money_donated, 1500)
+        self.assertEqual(campaign.money_needed, 498500)
+        self.assertEqual(reconcile_campaign_totals(), [])
 
     def _create_donation(self, user=None, amount=None, project=None, status=DonationStatuses.new):
         """ Helper method for creating donations."""
@@ -623,6 +726,154 @@ class CalculateProjectMoneyDonatedTest(ProjectTestsMixin, TestCase):
         return donation
 
 
+class ProjectPopularityTest(ProjectTestsMixin, TestCase):
+
+    def setUp(self):
+        self.some_project = self.create_project(money_asked=500000)
+        self.another_project = self.create_project(money_asked=500000)
+
+        self.some_user = self.create_user()
+
+    def test_popularity_bucket_delta(self):
+        # Donations that are not paid or pending don't count.
+        donation = self._create_donation(project=self.some_project, amount=1500, status=DonationStatuses.new)
+        self.assertEqual(ProjectPopularityBucket.objects.count(), 0)
+
+        donation.status = DonationStatuses.pending
+        donation.save()
+        bucket = ProjectPopularityBucket.objects.get(project=self.some_project)
+        self.assertEqual(bucket.donors, 1)
+        self.assertEqual(bucket.amount, 1500)
+
+        # Pending -> paid doesn't count the donation twice.
+        donation.status = DonationStatuses.paid
+        donation.save()
+        bucket = ProjectPopularityBucket.objects.get(project=self.some_project)
+        self.assertEqual(bucket.donors, 1)
+        self.assertEqual(bucket.amount, 1500)
+
+        donation.status = DonationStatuses.failed
+        donation.save()
+        bucket = ProjectPopularityBucket.objects.get(project=self.some_project)
+        self.assertEqual(bucket.donors, 0)
+        self.assertEqual(bucket.amount, 0)
+
+    def test_update_popularity(self):
+        self._create_donation(project=self.some_project, amount=1000, status=DonationStatuses.paid)
+        self._create_donation(project=self.some_project, amount=1000, status=DonationStatuses.paid)
+        self._create_donation(project=self.another_project, amount=2000, status=DonationStatuses.pending)
+
+        self.assertEqual(update_popularity(), 2)
+
+        some_project = Project.objects.get(id=self.some_project.id)
+        another_project = Project.objects.get(id=self.another_project.id)
+        self.assertAlmostEqual(some_project.popularity, 50 * 2 / 3.0 + 25)
+        self.assertAlmostEqual(another_project.popularity, 50 * 1 / 3.0 + 25)
+
+        projects = Project.objects.filter(id__in=[some_project.id, another_project.id]).order_by('-popularity')
+        self.assertEqual(projects[0], some_project)
+
+    def _create_donation(self, amount, project, status):
+        order = Order.objects.create()
+        return Donation.objects.create(user=self.some_user, amount=amount, status=status, project=project, order=order)
+
+
+class ProjectSaveCoalescingTest(ProjectTestsMixin, TestCase):
+
+    def setUp(self):
+        self.some_project = self.create_project(money_asked=500000)
+        self.some_user = self.create_user()
+
+    def test_project_saved_once(self):
+        saves = []
+
+        def count_saves(sender, instance, **kwargs):
+            saves.append(instance.pk)
+
+        post_save.connect(count_saves, sender=Project, weak=False, dispatch_uid='test-count-project-saves')
+        try:
+            with coalesce_project_saves():
+                self.some_project.projectcampaign.save()
+                self.some_project.projectplan.save()
+                self.some_project.projectpitch.save()
+                # Nothing is saved until the batch is flushed.
+                self.assertEqual(saves, [])
+        finally:
+            post_save.disconnect(sender=Project, dispatch_uid='test-count-project-saves')
+
+        self.assertEqual(saves, [self.some_project.pk])
+
+    def test_phase_change_in_batch(self):
+        project = self.create_project(phase='plan')
+        with coalesce_project_saves():
+            project.projectplan.status = ProjectPlan.PlanStatuses.rejected
+            project.projectplan.save()
+
+        self.assertEqual(Project.objects.get(id=project.id).phase, ProjectPhases.failed)
+
+    def test_flushed_phase_change_saved_once(self):
+        project = self.create_project(phase='plan')
+        saves = []
+
+        def count_saves(sender, instance, **kwargs):
+            saves.append(instance.pk)
+
+        post_save.connect(count_saves, sender=Project, weak=False, dispatch_uid='test-count-project-saves')
+        try:
+            with coalesce_project_saves():
+                project.projectplan.status = ProjectPlan.PlanStatuses.approved
+                project.projectplan.save()
+        finally:
+            post_save.disconnect(sender=Project, dispatch_uid='test-count-project-saves')
+
+        # Moving the project to the campaign phase saves the pitch, plan and campaign, which doesn't save the project
+        # again.
+        self.assertEqual(saves, [project.pk])
+        self.assertEqual(Project.objects.get(id=project.id).phase, ProjectPhases.campaign)
+        self.assertIsNone(current_batch())
+
+    def test_stale_batch_discarded(self):
+        start_batch()
+        current_batch().add(self.some_project)
+
+        ProjectSaveCoalescingMiddleware().process_request(RequestFactory().get('/'))
+        try:
+            self.assertEqual(current_batch().queue, [])
+        finally:
+            discard_batch()
+
+    def test_donation_status_change_query_count(self):
+        """ The number of queries for a donation status change doesn't depend on the number of donations. """
+        self._create_donation(DonationStatuses.paid)
+        first_count = self._count_donation_status_change_queries()
+
+        for i in range(10):
+            self._create_donation(DonationStatuses.paid)
+        second_count = self._count_donation_status_change_queries()
+
+        self.assertEqual(first_count, second_count)
+        self.assertTrue(first_count <= 30, "A donation status change took {0} queries.".format(first_count))
+
+    def _create_donation(self, status):
+        order = Order.objects.create(user=self.some_user)
+        return Donation.objects.create(user=self.some_user, amount=1000, status=status, project=self.some_project,
+                                       order=order)
+
+    def _count_donation_status_change_queries(self):
+        donation = self._create_donation(DonationStatuses.in_progress)
+        donation = Donation.objects.get(id=donation.id)
+        donation.status = DonationStatuses.paid
+
+        connection.use_debug_cursor = True
+        start = len(connection.queries)
+        try:
+            with coalesce_project_saves():
+                donation.save()
+            return len(connection.queries) - start
+        finally:
+            connection.use_debug_cursor = None
+
+
 class ProjectPhaseLoggerTest(ProjectTestsMixin, TestCase):
     def setUp(self):
         self.some_project = self.create_project()
@@ -14,21 +14,37 @@ from apps.fund.models import Donation, DonationStatuses
 from apps.projects.serializers import ProjectSupporterSerializer, ManageProjectSerializer, ManageProjectPitchSerializer, ManageProjectPlanSerializer, ProjectPlanSerializer, ProjectPitchSerializer, ProjectAmbassadorSerializer, ProjectBudgetLineSerializer, ProjectPreviewSerializer, ProjectCampaignSerializer, ProjectThemeSerializer
 from apps.projects.permissions import IsProjectOwner, NoRunningProjectsOrReadOnly, EditablePitchOrReadOnly, EditablePlanOrReadOnly
 from apps.fundraisers.models import FundRaiser
+from apps.apicache import ResponseCacheMixin
+from apps.pagination import CursorPaginationMixin
 
 from .models import Project
 from .serializers import ProjectSerializer, ProjectDonationSerializer
 
 # API views
 
-class ProjectPreviewList(generics.ListAPIView):
+class ProjectPreviewList(ResponseCacheMixin, CursorPaginationMixin, generics.ListAPIView):
     model = Project
     serializer_class = ProjectPreviewSerializer
     paginate_by = 8
     paginate_by_param = 'page_size'
     max_paginate_by = 100
+    cache_models = ('projects.project', 'projects.projectplan', 'projects.projectcampaign', 'tasks.task')
 
     filter_fields = ('phase', )
 
+    # Orderings for cursor pagination. The default ordering is by title.
+    cursor_orderings = {
+        'newest': ('-created',),
+        'title': ('title',),
+        'deadline': ('projectcampaign__deadline',),
+        'money_needed': ('projectcampaign__money_needed',),
+        'popularity': ('-popularity',),
+    }
+
+    def get_cursor_ordering(self):
+        ordering = self.request.QUERY_PARAMS.get('ordering', None)
+        return self.cursor_orderings.get(ordering, ('title',))
+
     def get_queryset(self):
         qs = Project.objects
 
@@ -42,7 +58,7 @@ class ProjectPreviewList(generics.ListAPIView):
         elif ordering == 'deadline':
             qs = qs.order_by('projectcampaign__deadline')
         elif ordering == 'money_needed':
-            qs = qs.order_by('money_needed')
+            qs = qs.order_by('projectcampaign__money_needed')
         elif ordering == 'popularity':
             qs = qs.order_by('-popularity')
 
@@ -65,7 +81,9 @@ class ProjectPreviewList(generics.ListAPIView):
         qs = qs.exclude(phase=ProjectPhases.pitch)
         qs = qs.exclude(phase=ProjectPhases.failed)
 
-        return qs
+        # Fetch everything the ProjectPreviewSerializer needs in the same query.
+        qs = qs.select_related('projectplan__country__subregion', 'projectcampaign')
+        return Project.objects.with_counts(qs)
 
 
 class ProjectPreviewDetail(generics.RetrieveAPIView):
@@ -87,7 +105,12 @@ class ProjectList(generics.ListAPIView):
     def get_queryset(self):
         qs = super(ProjectList, self).get_queryset()
         qs = qs.exclude(phase=ProjectPhases.pitch)
-        return qs
+
+        # Fetch everything the ProjectSerializer needs in as few queries as possible.
+        qs = qs.select_related('owner', 'coach', 'projectplan__country__subregion', 'projectplan__theme',
+                               'projectcampaign')
+        qs = qs.prefetch_related('projectplan__projectambassador_set', 'projectplan__projectbudgetline_set')
+        return Project.objects.with_counts(qs)
 
 
 class ProjectDetail(generics.RetrieveAPIView):
@@ -110,11 +133,12 @@ class ProjectPlanDetail(generics.RetrieveAPIView):
     serializer_class = ProjectPlanSerializer
 
 
-class ProjectSupporterList(generics.ListAPIView):
+class ProjectSupporterList(CursorPaginationMixin, generics.ListAPIView):
     model = Donation
     serializer_class = ProjectSupporterSerializer
     paginate_by = 10
     filter_fields = ('status', )
+    cursor_ordering = ('-ready',)
 
     def get_queryset(self):
         queryset = super(ProjectSupporterList, self).get_queryset()
@@ -269,9 +293,10 @@ class ProjectIframeView(DetailView):
 #             **response_kwargs)
 
 
-class ProjectThemeList(generics.ListAPIView):
+class ProjectThemeList(ResponseCacheMixin, generics.ListAPIView):
     model = ProjectTheme
     serializer_class = ProjectThemeSerializer
+    cache_models = ('projects.projecttheme',)
 
 
 
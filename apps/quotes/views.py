@@ -1,4 +1,5 @@
 from rest_framework import generics
+from apps.apicache import ResponseCacheMixin
 from .models import Quote
 from .serializers import QuoteSerializer
 from django.utils.timezone import now
@@ -7,11 +8,12 @@ from django.db.models import Q
 
 # API views
 
-class QuoteList(generics.ListAPIView):
+class QuoteList(ResponseCacheMixin, generics.ListAPIView):
     model = Quote
     serializer_class = QuoteSerializer
     paginate_by = 10
     filter_fields = ('language', 'segment')
+    cache_models = ('quotes.quote',)
 
     def get_queryset(self):
         qs = super(QuoteList, self).get_queryset()
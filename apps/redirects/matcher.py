@@ -0,0 +1,166 @@
+"""
+Compiled redirect matcher.
+
+Every process keeps a RedirectMatcher that's built from all redirects once: a dictionary for the exact (and slash
+appended) paths and a few combined regular expressions for the regular expression redirects. Saving or deleting a
+redirect bumps its generation in the cache, which makes every process rebuild its matcher on the next 404.
+
+The number of visits of the redirects is counted in memory and written to the database with one UPDATE per distinct
+count every HIT_FLUSH_INTERVAL seconds.
+"""
+from __future__ import unicode_literals
+
+import atexit
+import re
+import threading
+import time
+
+from django.db.models import F
+
+from apps.apicache import get_generations
+
+from .models import Redirect
+
+
+# Write the buffered visit counts to the database at most this many seconds after the first visit.
+HIT_FLUSH_INTERVAL = 60
+
+# References to groups by number or name and inline flags (which apply to the whole expression) can't be used in a
+# combined regular expression.
+UNCOMBINABLE_RE = re.compile(r'\\[1-9]|\(\?P=|\(\?\(|\(\?[iLmsux]+\)')
+
+# Python 2 supports at most 100 groups in a regular expression, and one of them is the whole match. This includes the
+# group that wraps each redirect.
+MAX_GROUPS = 99
+
+
+class RedirectMatcher(object):
+
+    def __init__(self, redirects):
+        # The first redirect (in the order of the middleware) for each path.
+        self.paths = {}
+        for position, redirect in enumerate(redirects):
+            self.paths.setdefault(redirect.old_path, (position, redirect))
+
+        # Consecutive regular expressions are combined into regular expressions of at most MAX_GROUPS groups with a
+        # named group per redirect. A match of a combined expression is the first of its alternatives that matches, so
+        # the order is kept.
+        self.patterns = []
+        combined = []
+        combined_groups = 0
+        for redirect in redirects:
+            if not redirect.regular_expression:
+                continue
+            try:
+                compiled = re.compile(redirect.old_path, re.IGNORECASE)
+            except re.error:
+                # old_path does not compile into regex, ignore it and move on to the next one
+                continue
+
+            if UNCOMBINABLE_RE.search(redirect.old_path) or compiled.groups + 1 > MAX_GROUPS:
+                self._add_combined(combined)
+                combined, combined_groups = [], 0
+                self.patterns.append((re.compile(redirect.old_path), {None: (redirect, compiled)}))
+            else:
+                if combined_groups + compiled.groups + 1 > MAX_GROUPS:
+                    self._add_combined(combined)
+                    combined, combined_groups = [], 0
+                combined.append((redirect, compiled))
+                combined_groups += compiled.groups + 1
+        self._add_combined(combined)
+
+    def _add_combined(self, redirects):
+        if not redirects:
+            return
+        groups = dict(('r{0}'.format(i), (redirect, compiled)) for i, (redirect, compiled) in enumerate(redirects))
+        pattern = '|'.join('(?P<r{0}>{1})'.format(i, redirect.old_path) for i, (redirect, compiled) in
+                           enumerate(redirects))
+        try:
+            self.patterns.append((re.compile(pattern), groups))
+        except re.error:
+            # For example because the same group name is used in two redirects. Match these redirects one by one.
+            for redirect, compiled in redirects:
+                self.patterns.append((re.compile(redirect.old_path), {None: (redirect, compiled)}))
+
+    def match(self, full_path, slashed_full_path=None):
+        """ Returns the redirect for the path and the path to redirect to, or (None, None). """
+        match = self.paths.get(full_path)
+        if slashed_full_path:
+            slashed_match = self.paths.get(slashed_full_path)
+            if slashed_match and (not match or slashed_match[0] < match[0]):
+                match = slashed_match
+        if match:
+            redirect = match[1]
+            return redirect, redirect.new_path
+
+        for pattern, groups in self.patterns:
+            m = pattern.match(full_path)
+            if not m:
+                continue
+            # The group of a redirect wraps its whole pattern so it's always the last group that matched.
+            redirect, compiled = groups[m.lastgroup if None not in groups else None]
+            # Convert $1 into \1 (otherwise users would have to enter \1 via the admin
+            # which would have to be escaped)
+            new_path = redirect.new_path.replace('$', '\\')
+            return redirect, compiled.sub(new_path, full_path)
+
+        return None, None
+
+
+_lock = threading.Lock()
+_matcher = None
+_matcher_generation = None
+
+
+def get_matcher():
+    """ The matcher of this process, rebuilt when the redirects changed. """
+    global _matcher, _matcher_generation
+    generation = get_generations(['redirects.redirect'])[0]
+    if _matcher is None or generation != _matcher_generation:
+        redirects = Redirect.objects.order_by('fallback_redirect', 'regular_expression', 'old_path')
+        _matcher, _matcher_generation = RedirectMatcher(list(redirects)), generation
+    return _matcher
+
+
+_hits = {}
+_hits_since = None
+
+
+def reset_hits():
+    """ Discard the buffered visits. """
+    global _hits, _hits_since
+    with _lock:
+        _hits, _hits_since = {}, None
+
+
+def count_hit(redirect):
+    global _hits_since
+    with _lock:
+        _hits[redirect.id] = _hits.get(redirect.id, 0) + 1
+        if _hits_since is None:
+            _hits_since = time.time()
+        flush = time.time() - _hits_since >= HIT_FLUSH_INTERVAL
+    if flush:
+        flush_hits()
+
+
+def flush_hits():
+    """ Add the buffered visits to the redirects with one UPDATE per distinct number of visits. """
+    global _hits, _hits_since
+    with _lock:
+        hits, _hits, _hits_since = _hits, {}, None
+
+    ids_by_count = {}
+    for redirect_id, count in hits.items():
+        ids_by_count.setdefault(count, []).append(redirect_id)
+    for count, ids in ids_by_count.items():
+        Redirect.objects.filter(id__in=ids).update(nr_times_visited=F('nr_times_visited') + count)
+
+
+@atexit.register
+def _flush_hits_at_exit():
+    try:
+        flush_hits()
+    except Exception:
+        # The database might not be available anymore.
+        pass
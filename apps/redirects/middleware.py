@@ -1,7 +1,6 @@
 from __future__ import unicode_literals
 
 import urllib
-import re
 
 from django.conf import settings
 from django.contrib.sites.models import get_current_site
@@ -9,7 +8,7 @@ from django.core.exceptions import ImproperlyConfigured
 from django import http
 from django.utils import translation
 
-from apps.redirects.models import Redirect
+from apps.redirects.matcher import get_matcher, count_hit
 
 
 class RedirectFallbackMiddleware(object):
@@ -43,41 +42,16 @@ class RedirectFallbackMiddleware(object):
 
         language = translation.get_language()
 
-        redirects = Redirect.objects.all().order_by('fallback_redirect')
-        for redirect in redirects:
-            # Attempt a regular match
-            if redirect.old_path == full_path:
-                redirect.nr_times_visited += 1
-                redirect.save()
-                return http.HttpResponsePermanentRedirect(http_host + '/' + language + redirect.new_path)
+        slashed_full_path = None
+        if settings.APPEND_SLASH and not request.path.endswith('/'):
+            # Try appending a trailing slash.
+            path_len = len(request.path)
+            slashed_full_path = full_path[:path_len] + '/' + full_path[path_len:]
 
-            if settings.APPEND_SLASH and not request.path.endswith('/'):
-                # Try appending a trailing slash.
-                path_len = len(request.path)
-                slashed_full_path = full_path[:path_len] + '/' + full_path[path_len:]
-
-                if redirect.old_path == slashed_full_path:
-                    redirect.nr_times_visited += 1
-                    redirect.save()
-                    return http.HttpResponsePermanentRedirect(http_host + '/' + language + redirect.new_path)
-
-        # Attempt all regular expression redirects
-        reg_redirects = Redirect.objects.filter(regular_expression=True).order_by('fallback_redirect')
-        for redirect in reg_redirects:
-            try:
-                old_path = re.compile(redirect.old_path, re.IGNORECASE)
-            except re.error:
-                # old_path does not compile into regex, ignore it and move on to the next one
-                continue
-                
-            if re.match(redirect.old_path, full_path):
-                # Convert $1 into \1 (otherwise users would have to enter \1 via the admin 
-                # which would have to be escaped)
-                new_path = redirect.new_path.replace('$', '\\')
-                replaced_path = re.sub(old_path, new_path, full_path)
-                redirect.nr_times_visited += 1
-                redirect.save()
-                return http.HttpResponsePermanentRedirect(http_host + '/' + language + replaced_path)
+        redirect, new_path = get_matcher().match(full_path, slashed_full_path)
+        if redirect:
+            count_hit(redirect)
+            return http.HttpResponsePermanentRedirect(http_host + '/' + language + new_path)
 
         # No redirect was found. Return the response.
         return response
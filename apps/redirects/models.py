@@ -1,6 +1,9 @@
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils.translation import ugettext_lazy as _
 from django.utils.encoding import python_2_unicode_compatible
+from apps.apicache import bump_generation
 
 class Redirect(models.Model):
     old_path = models.CharField(_('redirect from'), max_length=200, db_index=True, unique=True,
@@ -26,3 +29,10 @@ class Redirect(models.Model):
 
     def __str__(self):
         return "%s ---> %s" % (self.old_path, self.new_path)
+
+
+@receiver(post_save, weak=False, sender=Redirect)
+@receiver(post_delete, weak=False, sender=Redirect)
+def rebuild_redirect_matchers(sender, instance, **kwargs):
+    # Makes all processes rebuild their redirect matcher (see apps.redirects.matcher).
+    bump_generation(Redirect)
@@ -4,6 +4,7 @@ from django.test import TestCase
 from django.test.utils import override_settings
 from django.utils import six
 
+from .matcher import flush_hits, reset_hits, RedirectMatcher, MAX_GROUPS
 from .middleware import RedirectFallbackMiddleware
 from .models import Redirect
 
@@ -17,7 +18,11 @@ from .models import Redirect
 class RedirectTests(TestCase):
 
     def setUp(self):
-        pass
+        # The visits are buffered per process, so don't count the visits of other tests.
+        reset_hits()
+
+    def tearDown(self):
+        reset_hits()
 
     def test_model(self):
         r1 = Redirect.objects.create(
@@ -56,9 +61,33 @@ class RedirectTests(TestCase):
         self.assertRedirects(response,
                              '/en/my/news/foobar/',
                              status_code=301, target_status_code=404)
+
+        # The visits are buffered until they're flushed.
+        flush_hits()
         redirect = Redirect.objects.get(regular_expression=True)
         self.assertEqual(redirect.nr_times_visited, 1)
 
+    def test_buffered_visit_counts(self):
+        r1 = Redirect.objects.create(old_path='/initial', new_path='/new_target')
+        r2 = Redirect.objects.create(old_path='/other', new_path='/new_target')
+        for path in ('/initial', '/initial', '/other', '/initial'):
+            self.client.get(path)
+        self.assertEqual(Redirect.objects.get(pk=r1.pk).nr_times_visited, 0)
+
+        flush_hits()
+        self.assertEqual(Redirect.objects.get(pk=r1.pk).nr_times_visited, 3)
+        self.assertEqual(Redirect.objects.get(pk=r2.pk).nr_times_visited, 1)
+
+    def test_changed_redirect(self):
+        redirect = Redirect.objects.create(old_path='/initial', new_path='/new_target')
+        response = self.client.get('/initial')
+        self.assertRedirects(response, '/en/new_target', status_code=301, target_status_code=404)
+
+        redirect.new_path = '/other_target'
+        redirect.save()
+        response = self.client.get('/initial')
+        self.assertRedirects(response, '/en/other_target', status_code=301, target_status_code=404)
+
     def test_fallback_redirects(self):
         """
         Ensure redirects with fallback_redirect set are the last evaluated
@@ -111,3 +140,16 @@ class RedirectTests(TestCase):
         self.assertRedirects(response,
                              '/en/my/project/foo/details',
                              status_code=301, target_status_code=404)
+
+    def test_many_regular_expressions(self):
+        redirects = [Redirect(old_path='/page{0}/(\d+)/'.format(i), new_path='/new{0}/$1/'.format(i),
+                              regular_expression=True) for i in range(150)]
+        matcher = RedirectMatcher(redirects)
+
+        # The regular expressions are combined in chunks of at most MAX_GROUPS groups.
+        self.assertEqual(len(matcher.patterns), 4)
+        self.assertTrue(all(pattern.groups <= MAX_GROUPS for pattern, groups in matcher.patterns))
+
+        redirect, new_path = matcher.match('/page140/12/')
+        self.assertEqual(redirect, redirects[140])
+        self.assertEqual(new_path, '/new140/12/')
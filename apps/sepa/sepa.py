@@ -60,15 +60,23 @@ class SepaAccount(object):
         self.bic = kwargs['bic']
 
 
+# The number of transactions in a payment info (PmtInf) block for each bank.
+BANK_PROFILES = {
+    # Rabobank wants only one transaction per payment info.
+    'rabobank': 1,
+    'grouped': 1000,
+}
+
+
 class SepaDocument(object):
     """
     Create a SEPA xml for payments.
 
+    The XML is generated in pieces: the group header, one piece per payment info block and the closing tags. Only the
+    transfers of one payment info block are kept in memory, so the transfers can be written from a generator with
+    write_xml() or iter_xml() when the number of transactions and the control sum have been computed beforehand.
     """
 
-    # If true, the transaction will never be executed.
-    is_test = False
-
     # Unambiguously identify the message.
     message_identification = None
 
@@ -78,13 +86,6 @@ class SepaDocument(object):
     # Debtor's account ISO currency code.
     currency = 'EUR'
 
-    # Total amount of all transactions
-    _header_control_sum_cents = 0
-
-    # Array to hold the transfers
-    _credit_transfers = []
-    _direct_debits = []
-
     # Payment method.
     _type = 'CT'  # CT: Credit transfer, DD: Direct debit
     _payment_method = 'TRF'
@@ -100,18 +101,23 @@ class SepaDocument(object):
     # LclInstrm/Cd: CORE
     # SeqTp: FRST / RCUR
 
+    initiating_party = None
 
-    # XML
-    _xml = None
-
-    def __init__(self, type='CT', *args, **kwargs):
+    def __init__(self, type='CT', bank_profile='rabobank', *args, **kwargs):
         """
         Set transaction type.
         DD: Direct Debit
         CT: Credit Transfer
         """
         self._type = type
+        self.transactions_per_payment_info = BANK_PROFILES[bank_profile]
+
+        # Total amount of all transactions
+        self._header_control_sum_cents = 0
 
+        # Lists to hold the transfers
+        self._credit_transfers = []
+        self._direct_debits = []
 
     def set_initiating_party(self, *args, **kwargs):
         self.initiating_party = InitiatingParty(**kwargs)
@@ -137,7 +143,12 @@ class SepaDocument(object):
 
     def as_xml(self):
         """ Return the XML string. """
-        return tostring(self._generate_xml())
+        return ''.join(self.iter_xml())
+
+    def write_xml(self, output, transfers=None, number_of_transactions=None, control_sum_cents=None):
+        """ Write the XML to a file-like object, for instance a file or an HttpResponse. See iter_xml(). """
+        for chunk in self.iter_xml(transfers, number_of_transactions, control_sum_cents):
+            output.write(chunk)
 
     def get_header_control_sum_cents(self):
         """ Get the header control sum in cents """
@@ -155,17 +166,14 @@ class SepaDocument(object):
 
         transfer.creditor = kwargs['creditor']
 
-        transfer.end_to_end_id = str(self.message_identification) + '-' + str(len(self._credit_transfers))
-
-        transfer.currency = getattr(kwargs, 'currency', self.currency)
-        transfer.remittance_information = getattr(kwargs, 'remittance_information', '')
+        transfer.currency = kwargs.get('currency', self.currency)
+        transfer.remittance_information = kwargs.get('remittance_information', '')
 
         self._credit_transfers.append(transfer)
         self._header_control_sum_cents += transfer.amount
 
-
-    def add_credit_transfer(self, *args, **kwargs):
-        """ Add a credit transfer transaction. """
+    def create_credit_transfer(self, *args, **kwargs):
+        """ Create a credit transaction without adding it, for writing the transfers from a generator. """
         if self._type != 'CT':
             raise Exception("Can only add a credit transfer to Sepa Document of type CT")
 
@@ -175,92 +183,124 @@ class SepaDocument(object):
         transfer.amount = kwargs['amount']
         transfer.creditor = kwargs['creditor']
 
-        transfer.end_to_end_id = str(self.message_identification) + '-' + str(len(self._credit_transfers))
+        transfer.currency = kwargs.get('currency', self.currency)
+        transfer.remittance_information = kwargs.get('remittance_information', '')
+        return transfer
 
-        transfer.currency = getattr(kwargs, 'currency', self.currency)
-        transfer.remittance_information = getattr(kwargs, 'remittance_information', '')
+    def add_credit_transfer(self, *args, **kwargs):
+        """ Add a credit transfer transaction. """
+        transfer = self.create_credit_transfer(**kwargs)
 
         self._credit_transfers.append(transfer)
         self._header_control_sum_cents += transfer.amount
 
-    def _generate_xml(self):
+    def iter_xml(self, transfers=None, number_of_transactions=None, control_sum_cents=None):
         """
-        This were all is put together into an xml.
+        Yield the XML in pieces. The transfers that have been added are used unless an iterable of transfers is given
+        (see create_credit_transfer()). In that case the number of transactions and the control sum in cents of the
+        group header have to be given as well, because the group header comes before the transfers.
         """
-        document = Element('Document')
-        document.set('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance')
-        document.set('xmlns', 'urn:iso:std:iso:20022:tech:xsd:pain.001.001.03')
-
-        if self._type is 'CT':
-            main = SubElement(document, 'CstmrCdtTrfInitn')
-        elif self._type is 'DD':
-            main = SubElement(document, 'CstmrDrctDbtInitn')
+        if transfers is None:
+            transfers = self._credit_transfers
+            number_of_transactions = len(self._credit_transfers)
+            control_sum_cents = self._header_control_sum_cents
+        elif number_of_transactions is None or control_sum_cents is None:
+            raise Exception("The number of transactions and the control sum are needed to write the transfers.")
+
+        if self._type == 'CT':
+            main = 'CstmrCdtTrfInitn'
+        elif self._type == 'DD':
+            main = 'CstmrDrctDbtInitn'
         else:
             raise Exception('Unknown SepaDocument type, or type not set.')
 
-        # Group Header
-        grp_hdr = SubElement(main, 'GrpHdr')
+        now = timezone.now()
+        yield '<Document xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" ' \
+              'xmlns="urn:iso:std:iso:20022:tech:xsd:pain.001.001.03"><{0}>'.format(main)
 
-        SubElement(grp_hdr, 'MsgId').text = str(self.message_identification)
+        yield tostring(self._group_header(now, number_of_transactions, control_sum_cents))
 
-        SubElement(grp_hdr, 'CreDtTm').text = timezone.datetime.strftime(timezone.now(), '%Y-%m-%dT%H:%I:%S')
+        # Credit Transfer Transactions Information
+        payment_info_transfers = []
+        payment_info_count = 0
+        for position, transfer in enumerate(transfers):
+            transfer.end_to_end_id = str(self.message_identification) + '-' + str(position)
+            payment_info_transfers.append(transfer)
+            if len(payment_info_transfers) == self.transactions_per_payment_info:
+                payment_info_count += 1
+                yield tostring(self._payment_info(now, payment_info_count, payment_info_transfers))
+                payment_info_transfers = []
+        if payment_info_transfers:
+            payment_info_count += 1
+            yield tostring(self._payment_info(now, payment_info_count, payment_info_transfers))
+
+        yield '</{0}></Document>'.format(main)
+
+    def _group_header(self, now, number_of_transactions, control_sum_cents):
+        grp_hdr = Element('GrpHdr')
 
-        if self.is_test:
-            prtry = SubElement(grp_hdr, 'Prtry').text = 'TEST'
+        SubElement(grp_hdr, 'MsgId').text = str(self.message_identification)
 
-        SubElement(grp_hdr, 'NbOfTxs').text = str(len(self._credit_transfers))
+        SubElement(grp_hdr, 'CreDtTm').text = timezone.datetime.strftime(now, '%Y-%m-%dT%H:%M:%S')
 
-        SubElement(grp_hdr, 'CtrlSum').text = self._int_to_currency(self._header_control_sum_cents)
+        SubElement(grp_hdr, 'NbOfTxs').text = str(number_of_transactions)
 
-        SubElement(grp_hdr, 'Grpg').text = 'SNGL'
+        SubElement(grp_hdr, 'CtrlSum').text = self._int_to_currency(control_sum_cents)
 
         if self.initiating_party:
             initg_pty = SubElement(grp_hdr, 'InitgPty')
-            SubElement(initg_pty, 'Id').text = self.initiating_party.id
             SubElement(initg_pty, 'Nm').text = self.initiating_party.name
+            initg_pty_id = SubElement(initg_pty, 'Id')
+            othr = SubElement(SubElement(initg_pty_id, 'OrgId'), 'Othr')
+            SubElement(othr, 'Id').text = self.initiating_party.id
 
-        # Credit Transfer Transactions Information
-        # Rabobank wants only one transaction per payment info so we create multiple payment infos here.
-        for transfer in self._credit_transfers:
-            pmt_inf = SubElement(main, 'PmtInf')
+        return grp_hdr
 
-            if self.category_purpose_code:
-                cd = SubElement(pmt_inf, 'Cd')
-                SubElement(cd, 'CtgyPurp').text = self.category_purpose_code
+    def _payment_info(self, now, number, transfers):
+        """ A payment info block with the transfers. """
+        pmt_inf = Element('PmtInf')
 
-            SubElement(pmt_inf, 'PmtMtd').text = self._payment_method
-            SubElement(pmt_inf, 'NbOfTxs').text = "1"
+        SubElement(pmt_inf, 'PmtInfId').text = '{0}-{1}'.format(self.payment_info_id, number)
+        SubElement(pmt_inf, 'PmtMtd').text = self._payment_method
+        SubElement(pmt_inf, 'NbOfTxs').text = str(len(transfers))
+        SubElement(pmt_inf, 'CtrlSum').text = self._int_to_currency(sum(transfer.amount for transfer in transfers))
 
-            pmt_tp_inf = SubElement(pmt_inf, 'PmtTpInf')
-            svc_lvl = SubElement(pmt_tp_inf, 'SvcLvl')
-            SubElement(svc_lvl, 'Cd').text = 'SEPA'
+        pmt_tp_inf = SubElement(pmt_inf, 'PmtTpInf')
+        svc_lvl = SubElement(pmt_tp_inf, 'SvcLvl')
+        SubElement(svc_lvl, 'Cd').text = 'SEPA'
 
-            if self._local_instrument_code:
-                lcl_instr = SubElement(pmt_inf, 'LclInstr')
-                SubElement(lcl_instr, 'Cd').text = self._local_instrument_code
+        if self._local_instrument_code:
+            lcl_instrm = SubElement(pmt_tp_inf, 'LclInstrm')
+            SubElement(lcl_instrm, 'Cd').text = self._local_instrument_code
 
-            SubElement(pmt_inf, 'ReqdExctnDt').text = timezone.datetime.strftime(timezone.now(), '%Y-%m-%d')
+        if self.category_purpose_code:
+            ctgy_purp = SubElement(pmt_tp_inf, 'CtgyPurp')
+            SubElement(ctgy_purp, 'Cd').text = self.category_purpose_code
 
-            dbtr = SubElement(pmt_inf, 'Dbtr')
-            SubElement(dbtr, 'Nm').text = self.debtor.name
+        SubElement(pmt_inf, 'ReqdExctnDt').text = timezone.datetime.strftime(now, '%Y-%m-%d')
 
-            dbtr_acct = SubElement(pmt_inf, 'DbtrAcct')
-            dbtr_id = SubElement(dbtr_acct, 'Id')
-            SubElement(dbtr_id, 'IBAN').text = self.debtor.iban
-            SubElement(dbtr_acct, 'Ccy').text = self.currency
+        dbtr = SubElement(pmt_inf, 'Dbtr')
+        SubElement(dbtr, 'Nm').text = self.debtor.name
 
-            dbtr_agt = SubElement(pmt_inf, 'DbtrAgt')
-            fin_isnstn_id = SubElement(dbtr_agt, 'FinInstnId')
-            SubElement(fin_isnstn_id, 'BIC').text = self.debtor.bic
+        dbtr_acct = SubElement(pmt_inf, 'DbtrAcct')
+        dbtr_id = SubElement(dbtr_acct, 'Id')
+        SubElement(dbtr_id, 'IBAN').text = self.debtor.iban
+        SubElement(dbtr_acct, 'Ccy').text = self.currency
 
-            SubElement(pmt_inf, 'ChrgBr').text = 'SLEV'
+        dbtr_agt = SubElement(pmt_inf, 'DbtrAgt')
+        fin_isnstn_id = SubElement(dbtr_agt, 'FinInstnId')
+        SubElement(fin_isnstn_id, 'BIC').text = self.debtor.bic
 
+        SubElement(pmt_inf, 'ChrgBr').text = 'SLEV'
+
+        for transfer in transfers:
             amount = self._int_to_currency(transfer.amount)
 
             cd_trf_tx_inf = SubElement(pmt_inf, 'CdtTrfTxInf')
 
             pmt_id = SubElement(cd_trf_tx_inf, 'PmtId')
-            SubElement(pmt_id, 'InstrId').text = transfer.transfer_id
+            if transfer.creditor_payment_id:
+                SubElement(pmt_id, 'InstrId').text = transfer.creditor_payment_id
             SubElement(pmt_id, 'EndToEndId').text = transfer.end_to_end_id
 
             amt = SubElement(cd_trf_tx_inf, 'Amt')
@@ -279,12 +319,11 @@ class SepaDocument(object):
             cdtr_id = SubElement(cdtr_acct, 'Id')
             SubElement(cdtr_id, 'IBAN').text = transfer.creditor.iban
 
-            rmt_inf = SubElement(cd_trf_tx_inf, 'RmtInf')
-            SubElement(rmt_inf, 'Ustrd').text = transfer.remittance_information
-
-            SubElement(cd_trf_tx_inf, 'ChrgBr').text = 'SLEV'
+            if transfer.remittance_information:
+                rmt_inf = SubElement(cd_trf_tx_inf, 'RmtInf')
+                SubElement(rmt_inf, 'Ustrd').text = transfer.remittance_information
 
-        return document
+        return pmt_inf
 
     def _int_to_currency(self, amount):
         """ Format an integer as a euro value. """
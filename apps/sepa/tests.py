@@ -1,9 +1,30 @@
+from StringIO import StringIO
+
 from apps.sepa.sepa import SepaAccount
 from django.test import TestCase
 from xml.etree import ElementTree
 from sepa import SepaDocument
 
 
+PAIN_NAMESPACE = '{urn:iso:std:iso:20022:tech:xsd:pain.001.001.03}'
+
+# The order of the elements in pain.001.001.03 (as far as they're used). The first element of each tuple is required.
+PAIN_SEQUENCES = {
+    'CstmrCdtTrfInitn': ('GrpHdr', 'PmtInf'),
+    'GrpHdr': ('MsgId', 'CreDtTm', 'NbOfTxs', 'CtrlSum', 'InitgPty'),
+    'PmtInf': ('PmtInfId', 'PmtMtd', 'NbOfTxs', 'CtrlSum', 'PmtTpInf', 'ReqdExctnDt', 'Dbtr', 'DbtrAcct', 'DbtrAgt',
+               'ChrgBr', 'CdtTrfTxInf'),
+    'CdtTrfTxInf': ('PmtId', 'Amt', 'CdtrAgt', 'Cdtr', 'CdtrAcct', 'RmtInf'),
+    'PmtId': ('InstrId', 'EndToEndId'),
+}
+PAIN_REQUIRED = {
+    'GrpHdr': ('MsgId', 'CreDtTm', 'NbOfTxs', 'InitgPty'),
+    'PmtInf': ('PmtInfId', 'PmtMtd', 'ReqdExctnDt', 'Dbtr', 'DbtrAcct', 'DbtrAgt', 'CdtTrfTxInf'),
+    'CdtTrfTxInf': ('PmtId', 'Amt'),
+    'PmtId': ('EndToEndId',),
+}
+
+
 class CalculateMoneyDonatedTest(TestCase):
 
     def setUp(self):
@@ -86,5 +107,64 @@ class CalculateMoneyDonatedTest(TestCase):
         self.assertEqual(tree[0][0][3].text, total)
 
         # Now lets check The second payment IBANs
-        self.assertEqual(tree[0][2][5][0][0].text, self.some_account['iban'])
-        self.assertEqual(tree[0][2][8][4][0][0].text, self.third_account['iban'])
+        self.assertEqual(tree[0][2][7][0][0].text, self.some_account['iban'])
+        self.assertEqual(tree[0][2][10][4][0][0].text, self.third_account['iban'])
+
+    def create_sepa(self, bank_profile='rabobank'):
+        sepa = SepaDocument(type='CT', bank_profile=bank_profile)
+        sepa.set_info(message_identification='BATCH-1234', payment_info_id='PAYMENTS TODAY')
+        sepa.set_initiating_party(name=self.some_account['name'], id=self.some_account['id'])
+        sepa.set_debtor(SepaAccount(name=self.some_account['name'], iban=self.some_account['iban'],
+                                    bic=self.some_account['bic']))
+        return sepa
+
+    def assertPainStructure(self, element):
+        """ Check the order of the child elements and the required child elements. """
+        tag = element.tag.replace(PAIN_NAMESPACE, '')
+        children = [child.tag.replace(PAIN_NAMESPACE, '') for child in element]
+        if tag in PAIN_SEQUENCES:
+            positions = [PAIN_SEQUENCES[tag].index(child) for child in children]
+            self.assertEqual(positions, sorted(positions), "Wrong order in {0}: {1}".format(tag, children))
+        for required in PAIN_REQUIRED.get(tag, ()):
+            self.assertIn(required, children, "{0} is missing in {1}".format(required, tag))
+        for child in element:
+            self.assertPainStructure(child)
+
+    def test_pain_structure(self):
+        sepa = self.create_sepa()
+        for account, payment in ((self.another_account, self.payment1), (self.third_account, self.payment2)):
+            sepa.add_credit_transfer(creditor=SepaAccount(name=account['name'], iban=account['iban'],
+                                                          bic=account['bic']),
+                                     amount=payment['amount'], creditor_payment_id=payment['id'],
+                                     remittance_information=payment['remittance_info'])
+
+        tree = ElementTree.XML(sepa.as_xml())
+        self.assertEqual(tree.tag, PAIN_NAMESPACE + 'Document')
+        self.assertEqual(tree[0].tag, PAIN_NAMESPACE + 'CstmrCdtTrfInitn')
+        self.assertPainStructure(tree[0])
+
+        # Every payment info has its own id.
+        payment_info_ids = [element.text for element in tree.iter(PAIN_NAMESPACE + 'PmtInfId')]
+        self.assertEqual(len(set(payment_info_ids)), 2)
+
+    def test_write_grouped_transfers(self):
+        sepa = self.create_sepa(bank_profile='grouped')
+        creditor = SepaAccount(name=self.another_account['name'], iban=self.another_account['iban'],
+                               bic=self.another_account['bic'])
+
+        def transfers():
+            for i in range(3):
+                yield sepa.create_credit_transfer(creditor=creditor, amount=1000, creditor_payment_id=str(i))
+
+        output = StringIO()
+        sepa.write_xml(output, transfers(), 3, 3000)
+
+        tree = ElementTree.XML(output.getvalue())
+        self.assertPainStructure(tree[0])
+
+        # All transfers are in one payment info.
+        payment_infos = tree[0].findall(PAIN_NAMESPACE + 'PmtInf')
+        self.assertEqual(len(payment_infos), 1)
+        self.assertEqual(payment_infos[0].find(PAIN_NAMESPACE + 'NbOfTxs').text, '3')
+        self.assertEqual(payment_infos[0].find(PAIN_NAMESPACE + 'CtrlSum').text, '30.00')
+        self.assertEqual(tree[0][0].find(PAIN_NAMESPACE + 'CtrlSum').text, '30.00')
@@ -1,13 +1,15 @@
 from rest_framework import generics
+from apps.apicache import ResponseCacheMixin
 from .models import Statistic
 from .serializers import StatisticSerializer
 
 
 # API views
 
-class StatisticDetail(generics.RetrieveAPIView):
+class StatisticDetail(ResponseCacheMixin, generics.RetrieveAPIView):
     model = Statistic
     serializer_class = StatisticSerializer
+    cache_models = ('statistics.statistic',)
 
     def get_object(self, queryset=None):
         stats = Statistic.objects.order_by('-creation_date').all()[0]
@@ -7,6 +7,7 @@ from bluebottle.bluebottle_drf2.permissions import IsAuthorOrReadOnly, AllowNone
 from bluebottle.bluebottle_utils.utils import set_author_editor_ip, get_client_ip
 from rest_framework import permissions
 from bluebottle.bluebottle_drf2.views import ListCreateAPIView, RetrieveUpdateDeleteAPIView, ListAPIView
+from apps.pagination import CursorPaginationMixin
 from apps.projects.models import Project
 from .models import WallPost, Reaction
 from .serializers import ReactionSerializer, WallPostSerializer
@@ -21,11 +22,12 @@ class WallPostFilter(django_filters.FilterSet):
         fields = ['parent_type', 'parent_id']
 
 
-class WallPostList(ListAPIView):
+class WallPostList(CursorPaginationMixin, ListAPIView):
     model = WallPost
     serializer_class = WallPostSerializer
     filter_class = WallPostFilter
     paginate_by = 5
+    cursor_ordering = ('-created',)
 
     def get_queryset(self):
         queryset = super(WallPostList, self).get_queryset()
@@ -131,12 +133,13 @@ class MediaWallPostPhotoDetail(RetrieveUpdateDeleteAPIView):
     permission_classes = (IsAuthorOrReadOnly, IsConnectedWallPostAuthorOrReadOnly)
 
 
-class ReactionList(ListCreateAPIView):
+class ReactionList(CursorPaginationMixin, ListCreateAPIView):
     model = Reaction
     serializer_class = ReactionSerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,)
     paginate_by = 10
     filter_fields = ('wallpost',)
+    cursor_ordering = ('created',)
 
     def pre_save(self, obj):
         set_author_editor_ip(self.request, obj)
@@ -57,6 +57,17 @@ LANGUAGES = (
 
 SITE_ID = 1
 
+# The cache is used for the responses of the public read APIs (see apps.apicache). The local-memory cache is per
+# process; servers running more than one process should use a cache that's shared between them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Cached API responses also expire after this many seconds.
+API_CACHE_TIMEOUT = 5 * 60
+
 # If you set this to False, Django will make some optimizations so as not
 # to load the internationalization machinery.
 USE_I18N = True
@@ -161,6 +172,8 @@ MIDDLEWARE_CLASSES = [
     # https://docs.djangoproject.com/en/1.4/ref/clickjacking/
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.middleware.transaction.TransactionMiddleware',
+    # Save projects once per request. Needs to be after the TransactionMiddleware.
+    'apps.projects.middleware.ProjectSaveCoalescingMiddleware',
 
     'apps.redirects.middleware.RedirectFallbackMiddleware',
     'apps.crawlable.middleware.HashbangMiddleware',
@@ -271,6 +284,7 @@ INSTALLED_APPS = (
     'apps.homepage',
     'apps.redirects',
     'apps.partners',
+    'apps.apicache',
 
     # Custom dashboard
     'fluent_dashboard',
@@ -603,6 +617,13 @@ COWRY_PAYMENT_METHODS = {
     },
 }
 
+# The parsed DocData WSDL is cached on disk (per test and live endpoint) so the workers don't download it again when they
+# are restarted. The directory defaults to a directory in the system temp directory.
+# COWRY_DOCDATA_WSDL_CACHE_DIR = ''
+COWRY_DOCDATA_WSDL_CACHE_DAYS = 30
+# The SOAP client class for the DocData API. It can be replaced by a local stand-in with the same interface.
+COWRY_DOCDATA_SOAP_CLIENT = 'suds.client.Client'
+
 # The rate that is payed out to projects
 PROJECT_PAYOUT_RATE = 0.95
 
@@ -611,11 +632,16 @@ PROJECT_PAYOUT_RATE = 0.95
 #     'iban': '',
 #     'bic': '',
 #     'name': '',
-#     'id': ''
+#     'id': '',
+#     # Optional, see apps.sepa.sepa.BANK_PROFILES. Rabobank wants one transaction per payment info.
+#     'bank_profile': 'rabobank'
 # }
 
 # Salesforce app settings
 SALESFORCE_QUERY_TIMEOUT = 3
+# The sync upserts this many records at a time with the composite batch resource of the REST API (version 34.0 and up).
+SALESFORCE_SYNC_BATCH_SIZE = 200
+SALESFORCE_API_VERSION = '34.0'
 DATABASE_ROUTERS = [
     "salesforce.router.ModelRouter"
 ]
@@ -646,6 +672,21 @@ CRAWLABLE_PHANTOMJS_DEDICATED_PORT = 8910
 CRAWLABLE_PHANTOMJS_ARGS = []
 # Use HTTPS for PhantomJS requests.
 CRAWLABLE_FORCE_HTTPS = True
+# Rendered pages are stored in this directory (defaults to a directory in the temp dir) for the number of seconds in
+# the TTL. The least recently rendered pages are removed when the snapshots take more than the maximum size in bytes.
+CRAWLABLE_SNAPSHOT_DIR = None
+CRAWLABLE_SNAPSHOT_TTL = 6 * 60 * 60
+CRAWLABLE_SNAPSHOT_MAX_SIZE = 200 * 1024 * 1024
+# The number of pages rendered at the same time per process, and the number of pages that can wait to be rendered.
+CRAWLABLE_RENDER_WORKERS = 2
+CRAWLABLE_RENDER_QUEUE_SIZE = 100
+# Serve stale snapshots while the page is rendered again, instead of waiting for the page to render.
+CRAWLABLE_SERVE_STALE = True
+# Seconds to wait for a page that isn't in the snapshot store yet.
+CRAWLABLE_RENDER_TIMEOUT = 30
+# Maximum seconds to wait for the app to mark a page as ready, and how often to check.
+CRAWLABLE_RENDER_MAX_WAIT = 10
+CRAWLABLE_RENDER_POLL_INTERVAL = 0.1
 
 # Send email to console by default
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
@@ -17,6 +17,14 @@ INSTALLED_APPS += (
     'gunicorn',
 )
 
+# Share the cache between the gunicorn workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/var/tmp/onepercentclub-staging-cache',
+    }
+}
+
 COWRY_RETURN_URL_BASE = 'https://staging.onepercentclub.com'
 COWRY_LIVE_PAYMENTS = False
 
@@ -148,6 +148,38 @@ App.ScrollToTop = Em.Mixin.create({
 });
 
 
+/**
+ * Tell the crawlable renderer (apps/crawlable) that the page is done: the flag is set once there are no pending AJAX
+ * requests and the Ember run loop had a moment to render the results.
+ */
+App.crawlableReadyTimer = null;
+
+App.resetCrawlableReady = function() {
+    window.crawlableReady = false;
+    $('body').removeAttr('data-crawlable-ready');
+};
+
+App.markCrawlableReady = function() {
+    App.resetCrawlableReady();
+    clearTimeout(App.crawlableReadyTimer);
+    App.crawlableReadyTimer = setTimeout(function() {
+        Em.run.next(function() {
+            if ($.active === 0) {
+                window.crawlableReady = true;
+                $('body').attr('data-crawlable-ready', 'true');
+            }
+        });
+    }, 100);
+};
+
+$(document).ajaxStart(App.resetCrawlableReady);
+$(document).ajaxStop(App.markCrawlableReady);
+$(window).on('hashchange', App.markCrawlableReady);
+$(function() {
+    App.markCrawlableReady();
+});
+
+
 /**
  * The Ember Data Adapter and Store configuration.
  */